@@ -1,134 +1,263 @@
 import ctypes
 import json
 import sys
-import threading
 import time
-from pathlib import Path
-from ctypes import wintypes, byref
-
-# Importa todos os nossos módulos
-from .smoothing import AdaptiveEMA, LinearEMAParams
-from .tremor import TremorGuard, TremorParams
-from .win_hook import HookEngine
-from .hotkeys import Hotkeys, ID_TOGGLE_HOTKEY, ID_QUIT_HOTKEY
-from .profiler import LatencyProfiler
-from .calibration import run_calibration
-
-# Constante para a mensagem de hotkey do Windows
-WM_HOTKEY = 0x0312
-
-def monitor_foreground_process(engine, blacklist, stop_event, gui, proc, psutil_mod, *, poll_interval: float = 0.5):
-    """Observa o processo em foco e pausa/resume a suavização conforme a blacklist."""
-    normalized = {item.lower() for item in blacklist}
-    blocked_active = False
-    while not stop_event.wait(poll_interval):
-        try:
-            hwnd = gui.GetForegroundWindow()
-            if not hwnd:
-                continue
-            _, pid = proc.GetWindowThreadProcessId(hwnd)
-            if not pid:
-                continue
-            name = psutil_mod.Process(pid).name().lower()
-        except psutil_mod.NoSuchProcess:
-            continue
-        except Exception as exc:  # noqa: BLE001
-            print(f"Monitor de processos encontrou um erro: {exc}")
-            time.sleep(1.0)
-            continue
-
-        if name in normalized and not blocked_active:
-            blocked_active = True
-            engine.pause("blacklist")
-            print(f"Processo '{name}' está na blacklist. Suavização pausada automaticamente.")
-        elif name not in normalized and blocked_active:
-            blocked_active = False
-            engine.resume("blacklist")
-            status = "ATIVADO" if engine.enabled else "DESATIVADO"
-            print(f"Processo liberado. Suavização: {status}.")
+
+from .startup import StartupTimeline
+
+# Criada antes de qualquer outro módulo do app para medir as importações. Módulos
+# opcionais (Tk, psutil/pywin32, telemetria, gravação...) são importados dentro
+# de `main`, só quando o recurso está habilitado e depois que o hook já está ativo.
+timeline = StartupTimeline()
+timeline.track_imports()
+with timeline.phase("importações"):
+    from .config import (
+        read_config, validate_config, ema_params_from_config, tremor_params_from_config, response_curve_from_config,
+        filter_chain_from_config, watchdog_params_from_config,
+    )
+    from .smoothing import AdaptiveEMA
+    from .tremor import TremorGuard
+    from .win_hook import HookEngine
+    from .hotkeys import Hotkeys
+    from .profiler import LatencyProfiler
+    from .supervisor import Supervisor, EVENT_QUIT, EVENT_TOGGLE
 
 def load_cfg() -> dict:
-    """Carrega o arquivo de configuração JSON."""
+    """Carrega e valida o arquivo de configuração JSON."""
     try:
-        cfg_path = Path(__file__).resolve().parent.parent / "config" / "defaults.json"
-        with open(cfg_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        cfg = read_config()
     except FileNotFoundError:
         print("Erro: Arquivo de configuração 'defaults.json' não encontrado.")
         sys.exit(1)
     except json.JSONDecodeError:
         print("Erro: Arquivo de configuração 'defaults.json' está mal formatado.")
         sys.exit(1)
+    problems = validate_config(cfg)
+    if problems:
+        print("Erro: Arquivo de configuração 'defaults.json' inválido:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    return cfg
 
 def main():
     """Ponto de entrada principal do aplicativo."""
     print("Iniciando o Suavizador de Mira (usando ctypes)...")
-    cfg = load_cfg()
-
-    # 1. Instancia todos os componentes com os parâmetros do arquivo de configuração
-    ema_params = LinearEMAParams(v_min=cfg["v_min"], v_max=cfg["v_max"], alpha_min=cfg["alpha_min"], alpha_max=cfg["alpha_max"])
-    tremor_params = TremorParams(jitter_deadzone_px=cfg["jitter_deadzone_px"], jitter_speed_max=cfg["jitter_speed_max"], extra_damp_factor=cfg["extra_damp_factor"])
-    
-    ema = AdaptiveEMA(ema_params)
-    tremor = TremorGuard(tremor_params)
-    profiler = LatencyProfiler(cfg["profiler_log_interval_sec"])
-    engine = HookEngine(ema, tremor, profiler, cfg["magic_number"])
-    engine.enabled = cfg.get("enabled_on_start", True)
-    
-    hk = Hotkeys(cfg["hotkey_toggle"], cfg["hotkey_quit"])
+    with timeline.phase("configuração"):
+        cfg = load_cfg()
+
+    # 1. Instancia só o que o hook precisa, com os parâmetros do arquivo de configuração
+    with timeline.phase("componentes"):
+        ema_params = ema_params_from_config(cfg)
+        tremor_params = tremor_params_from_config(cfg)
 
-    blacklist = [item for item in cfg.get("blacklist", []) if item]
-    monitor_thread = None
-    stop_event = None
-    if blacklist:
-        try:
-            import psutil  # type: ignore[import-not-found]
-            import win32gui  # type: ignore[import-not-found]
-            import win32process  # type: ignore[import-not-found]
-        except ImportError as exc:
-            print(f"Monitoramento de processos indisponível ({exc}). Instale psutil e pywin32 para habilitar a blacklist.")
-        else:
-            stop_event = threading.Event()
-            monitor_thread = threading.Thread(
-                target=monitor_foreground_process,
-                args=(engine, blacklist, stop_event, win32gui, win32process, psutil),
-                daemon=True,
+        ema = AdaptiveEMA(ema_params, response_curve_from_config(cfg))
+        tremor = TremorGuard(tremor_params)
+        profiler = LatencyProfiler(
+            cfg["profiler_log_interval_sec"],
+            background=cfg.get("profiler_background_reporter", True),
+        )
+        chain = filter_chain_from_config(cfg, tremor, ema)
+        if chain.reports:
+            profiler.reporters.append(chain.report)
+        engine = HookEngine(
+            ema,
+            tremor,
+            profiler,
+            cfg["magic_number"],
+            alpha_table_step=cfg.get("alpha_table_step", 1.0),
+            chain=chain,
+            callback_budget_us=watchdog_params_from_config(cfg).budget_us,
+            os_event_dt=cfg.get("event_dt_source", "perf") == "os",
+        )
+        engine.enabled = cfg.get("enabled_on_start", True)
+
+        scheduler = None
+        if cfg.get("output_mode", "inline") == "scheduled":
+            from .scheduler import OutputScheduler
+
+            scheduler = OutputScheduler(
+                tremor,
+                ema,
+                engine.injector,
+                rate_hz=cfg.get("output_rate_hz", 1000.0),
+                report_interval_sec=cfg["profiler_log_interval_sec"],
+                chain=None if chain.fusable(tremor, ema) else chain,
             )
-            monitor_thread.start()
+            engine.scheduler = scheduler
+
+        profile_selector = None
+        if cfg.get("profiles"):
+            from .profiles import Profile, ProfileSelector, profiles_from_config
+
+            # Cada perfil ganha filtros próprios e um pipeline pré-compilado.
+            profiles = profiles_from_config(cfg, Profile("default", ema, tremor, chain))
+            engine.set_profiles(profiles)
+            profile_selector = ProfileSelector(engine, profiles)
+            profiler.reporters.append(profile_selector.report)
+
+    hk = Hotkeys(cfg["hotkey_toggle"], cfg["hotkey_quit"])
+    # O hook e as hotkeys vivem na thread da bomba de mensagens; a thread principal
+    # fica com a interface (calibração) e os avisos.
+    supervisor = Supervisor(
+        engine,
+        hk,
+        priority=cfg.get("hook_thread_priority", "highest"),
+        switch_interval_sec=cfg.get("gil_switch_interval_ms", 0.5) / 1000.0,
+    )
+    auto_calibrator = None
+    config_watcher = None
+    telemetry = None
+    recorder = None
+    foreground_watcher = None
+    polling_check = None
+    watchdog = None
 
     # 2. Bloco Try...Finally para garantir que os hooks e hotkeys sejam sempre desregistrados
     try:
-        engine.install()
-        hk.register()
+        with timeline.phase("hook"):
+            supervisor.start()
+        timeline.mark("hook instalado")
+        print(f"Cadeia de filtros: {' -> '.join(chain.names)}")
+        if profile_selector:
+            print(f"Perfis: {', '.join(engine.profiles)} (ativo: '{engine.active_profile}')")
+
+        # Recursos opcionais: importados e iniciados com o hook já ativo.
+        with timeline.phase("recursos"):
+            profiler.start()
+            if scheduler:
+                scheduler.start()
+
+            if cfg.get("latency_tracking", False):
+                from .input_latency import InputLatencyTracker
+
+                latency_tracker = InputLatencyTracker()
+                engine.latency_tracker = latency_tracker
+                profiler.reporters.append(latency_tracker.report)
+
+            if cfg.get("watchdog_enabled", True):
+                from .watchdog import HookWatchdog, cursor_position
+
+                # A reinstalação precisa rodar na thread que atende o hook.
+                watchdog = HookWatchdog(
+                    engine,
+                    watchdog_params_from_config(cfg),
+                    reinstall=lambda: supervisor.call_in_pump(engine.reinstall),
+                    cursor_pos=cursor_position(ctypes.windll.user32),
+                )
+                profiler.reporters.append(watchdog.report)
+                watchdog.start()
+
+            if cfg.get("auto_calibration", False):
+                from .calibration import AutoCalibrator
+
+                auto_calibrator = AutoCalibrator(
+                    engine,
+                    window=cfg.get("auto_calibration_window", 4000),
+                    blend=cfg.get("auto_calibration_blend", 0.25),
+                )
+                engine.speed_observer = auto_calibrator.observe
+                auto_calibrator.start()
+
+            if cfg.get("config_watch", True):
+                from .config_watcher import ConfigWatcher
+
+                config_watcher = ConfigWatcher(
+                    engine,
+                    interval_sec=cfg.get("config_watch_interval_sec", 0.5),
+                    initial=cfg,
+                )
+                config_watcher.start()
+
+            if cfg.get("telemetry_enabled", False):
+                from .telemetry import MotionTap, TelemetryPublisher
+
+                try:
+                    telemetry = TelemetryPublisher(
+                        engine,
+                        cfg.get("telemetry_path") or None,
+                        interval_sec=cfg.get("telemetry_interval_sec", 0.05),
+                    )
+                except OSError as exc:
+                    print(f"Telemetria indisponível ({exc}).")
+                else:
+                    engine.motion_tap = MotionTap()
+                    print(f"Publicando telemetria em '{telemetry.path}'.")
+                    telemetry.start()
+
+            record_dir = cfg.get("trace_record_dir")
+            if record_dir:
+                from pathlib import Path
+                from .trace import TraceRecorder
+
+                try:
+                    record_path = Path(record_dir)
+                    record_path.mkdir(parents=True, exist_ok=True)
+                    recorder = TraceRecorder(record_path / time.strftime("sessao-%Y%m%d-%H%M%S.aimtrace"))
+                except OSError as exc:
+                    print(f"Gravação de traços indisponível ({exc}).")
+                else:
+                    engine.recorder = recorder
+                    print(f"Gravando traço do mouse em '{recorder.path}'.")
+
+        blacklist = [item for item in cfg.get("blacklist", []) if item]
+        if blacklist or profile_selector:
+            with timeline.phase("monitor de foco"):
+                try:
+                    import psutil  # type: ignore[import-not-found]
+                    import win32gui  # type: ignore[import-not-found]
+                    import win32process  # type: ignore[import-not-found]
+                except ImportError as exc:
+                    print(f"Monitoramento de processos indisponível ({exc}). Instale psutil e pywin32 para habilitar a blacklist e os perfis.")
+                else:
+                    from .foreground import ForegroundWatcher
+
+                    foreground_watcher = ForegroundWatcher(
+                        engine,
+                        blacklist,
+                        win32gui,
+                        win32process,
+                        psutil,
+                        min_interval_sec=cfg.get("foreground_poll_min_sec", 0.05),
+                        max_interval_sec=cfg.get("foreground_poll_max_sec", 0.5),
+                        on_process=profile_selector.apply if profile_selector else None,
+                    )
+                    foreground_watcher.start()
+
+        timeline.stop_tracking()
+        if cfg.get("startup_timeline", True):
+            timeline.report()
 
         print("\nSuavizador de Mira ativo e rodando.")
         print("Pressione a hotkey de Ligar/Desligar para pausar/retomar.")
         print("Pressione a hotkey de Sair para fechar o aplicativo.\n")
 
         if cfg.get("run_calibration_on_start", False):
-            print("Iniciando calibração guiada...")
-            run_calibration(
-                engine,
-                ema,
-                slow_duration_sec=cfg.get("calibration_slow_duration_sec", 5.0),
-                fast_duration_sec=cfg.get("calibration_fast_duration_sec", 5.0),
-            )
-            print("Calibração finalizada.")
-
-        # 3. Inicia o loop de mensagens do Windows.
-        msg = wintypes.MSG()
-        while ctypes.windll.user32.GetMessageW(byref(msg), 0, 0, 0) != 0:
-            if msg.message == WM_HOTKEY:
-                hotkey_id = msg.wParam
-                if hotkey_id == ID_TOGGLE_HOTKEY:
-                    status = "ATIVADO" if engine.toggle_user_enabled() else "DESATIVADO"
-                    print(f"Filtro de suavizacao: {status}")
-                elif hotkey_id == ID_QUIT_HOTKEY:
-                    print("Hotkey de saida pressionada. Encerrando...")
-                    ctypes.windll.user32.PostQuitMessage(0)
-
-            ctypes.windll.user32.TranslateMessage(byref(msg))
-            ctypes.windll.user32.DispatchMessageW(byref(msg))
+            # Tkinter só é carregado aqui, quando a calibração guiada pode rodar. O
+            # mainloop do Tk roda nesta thread; o hook segue atendido pela bomba.
+            from .calibration import run_calibration
+            from .calibration_cache import restore_or_calibrate
+
+            def wizard():
+                print("Iniciando calibração guiada...")
+                applied = run_calibration(
+                    engine,
+                    slow_duration_sec=cfg.get("calibration_slow_duration_sec", 5.0),
+                    fast_duration_sec=cfg.get("calibration_fast_duration_sec", 5.0),
+                )
+                print("Calibração finalizada.")
+                return applied
+
+            polling_check = restore_or_calibrate(engine, ema, cfg, wizard, user32=ctypes.windll.user32)
+
+        # 3. Consome os avisos da thread do hook até a hotkey de saída.
+        def on_event(kind, payload):
+            if kind == EVENT_TOGGLE:
+                print(f"Filtro de suavizacao: {'ATIVADO' if payload else 'DESATIVADO'}")
+            elif kind == EVENT_QUIT and payload == "hotkey":
+                print("Hotkey de saida pressionada. Encerrando...")
+
+        supervisor.run(on_event=on_event)
 
     except OSError as e:
         print(f"Erro fatal da API do Windows: {e}")
@@ -136,14 +265,29 @@ def main():
         print(f"Erro inesperado: {e}")
     finally:
         # 4. Limpeza.
+        timeline.stop_tracking()
         print("\nEncerrando. Realizando limpeza...")
-        if stop_event:
-            stop_event.set()
-        if monitor_thread:
-            monitor_thread.join(timeout=1.5)
+        if foreground_watcher:
+            foreground_watcher.stop()
+        if polling_check:
+            polling_check.stop()
+        if watchdog:
+            watchdog.stop()
         engine.resume("blacklist")
-        hk.unregister()
-        engine.uninstall()
+        supervisor.stop()
+        if config_watcher:
+            config_watcher.stop()
+        if auto_calibrator:
+            auto_calibrator.stop()
+        if scheduler:
+            scheduler.stop()
+        profiler.stop()
+        if telemetry:
+            telemetry.close()
+        if recorder:
+            engine.recorder = None
+            recorder.close()
+            print(f"Traço salvo com {recorder.records} amostras.")
         print("Limpeza concluída. Adeus!")
 
 if __name__ == "__main__":
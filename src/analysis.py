@@ -0,0 +1,339 @@
+"""
+Métricas objetivas de qualidade da suavização.
+
+Uso:
+    python -m src.analysis [--config caminho.json] [--synthetic cenário ...] [--json saida.json] [traco ...]
+
+Compara a sequência bruta de deltas com a filtrada e mede:
+- atraso (ms) pela correlação cruzada das velocidades na banda do movimento intencional;
+- atenuação do tremor (dB) pela potência na banda de 8-12 Hz (FFT) e a razão de jitter;
+- overshoot e tempo de acomodação após cada flick;
+- o erro de trajeto introduzido pela deadzone do `TremorGuard` e o desvio do
+  deslocamento total.
+
+Tudo é vetorizado com NumPy; uma sessão de minutos é pontuada em milissegundos.
+Em Python, use `analyze` (sequências já filtradas) ou `analyze_trace` (filtra e
+pontua). Traços: .aimtrace, CSV `dx,dy,t` ou NumPy `.npy` com colunas dx, dy, t.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .config import (
+    read_config, ema_params_from_config, tremor_params_from_config, response_curve_from_config,
+    filter_chain_from_config,
+)
+from .filters import FilterChain
+from .replay import filter_arrays
+from .smoothing import AdaptiveEMA
+from .synthetic import GENERATORS
+from .trace import load_trace_arrays
+from .tremor import TremorGuard
+
+GRID_RATE_HZ = 1000.0
+MAX_LAG_MS = 100.0
+# O atraso é medido só na banda do movimento intencional: acima dela o tremor e o
+# ruído dominam e a correlação com a saída do EMA atinge o pico em atraso zero.
+LAG_BAND_HZ = 6.0
+TREMOR_BAND_HZ = (8.0, 12.0)
+FLICK_SPEED = 1500.0  # px/s da velocidade bruta média em 10 ms
+FLICK_MIN_MS = 20.0
+SETTLE_WINDOW_MS = 300.0
+SETTLE_PX = 2.0
+
+
+def load_input_trace(path: Path) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Carrega um traço (dx, dy, t) de um arquivo .aimtrace, .csv ou .npy."""
+    suffix = path.suffix.lower()
+    if suffix == ".npy":
+        data = np.load(path)
+    elif suffix == ".csv":
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    else:
+        return load_trace_arrays(path)
+    if data.ndim != 2 or data.shape[1] < 3:
+        raise ValueError(f"{path}: esperado um array com colunas dx, dy, t.")
+    return data[:, 0].astype(np.float64), data[:, 1].astype(np.float64), data[:, 2].astype(np.float64)
+
+
+def uniform_positions(t: np.ndarray, dx: np.ndarray, dy: np.ndarray, grid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Posição acumulada dos deltas reamostrada na grade de tempo uniforme `grid`."""
+    return np.interp(grid, t, np.cumsum(dx)), np.interp(grid, t, np.cumsum(dy))
+
+
+def lag_ms(raw_x: np.ndarray, raw_y: np.ndarray, out_x: np.ndarray, out_y: np.ndarray) -> float:
+    """
+    Atraso (ms) que maximiza a correlação cruzada entre as velocidades bruta e
+    filtrada (x e y somados, amostradas a `GRID_RATE_HZ`), restrita à banda de
+    `LAG_BAND_HZ` e refinada com interpolação parabólica em torno do pico.
+    """
+    n = len(raw_x)
+    if n < 4:
+        return 0.0
+    size = 1 << (2 * n - 1).bit_length()
+    band = np.fft.rfftfreq(size, 1.0 / GRID_RATE_HZ) <= LAG_BAND_HZ
+    spectrum = np.zeros(size // 2 + 1, dtype=np.complex128)
+    for raw, out in ((raw_x, out_x), (raw_y, out_y)):
+        spectrum += np.fft.rfft(out - out.mean(), size) * np.conj(np.fft.rfft(raw - raw.mean(), size))
+    xcorr = np.fft.irfft(spectrum * band, size)
+    max_lag = min(int(MAX_LAG_MS * GRID_RATE_HZ / 1000.0), n - 1)
+    window = xcorr[: max_lag + 2]
+    peak = int(np.argmax(window[: max_lag + 1]))
+    offset = 0.0
+    if 0 < peak:
+        left, center, right = window[peak - 1], window[peak], window[peak + 1]
+        curvature = left - 2 * center + right
+        if curvature < 0:
+            offset = 0.5 * (left - right) / curvature
+    return (peak + offset) * 1000.0 / GRID_RATE_HZ
+
+
+def jitter_energy(x: np.ndarray, y: np.ndarray) -> float:
+    """Energia da segunda diferença da posição (aceleração), sensível ao tremor."""
+    return float(np.sum(np.diff(x, 2) ** 2 + np.diff(y, 2) ** 2))
+
+
+def band_attenuation_db(
+    raw_x: np.ndarray, raw_y: np.ndarray, out_x: np.ndarray, out_y: np.ndarray,
+    band: tuple[float, float] = TREMOR_BAND_HZ,
+) -> float:
+    """
+    Potência da velocidade filtrada na `band` relativa à bruta, em dB (negativo
+    = atenuação). Entradas são velocidades amostradas a `GRID_RATE_HZ`.
+    """
+    n = len(raw_x)
+    if n < 4:
+        return 0.0
+    freqs = np.fft.rfftfreq(n, 1.0 / GRID_RATE_HZ)
+    mask = (freqs >= band[0]) & (freqs <= band[1])
+    window = np.hanning(n)
+
+    def power(x: np.ndarray, y: np.ndarray) -> float:
+        return float(
+            np.sum(np.abs(np.fft.rfft((x - x.mean()) * window)[mask]) ** 2)
+            + np.sum(np.abs(np.fft.rfft((y - y.mean()) * window)[mask]) ** 2)
+        )
+
+    raw_power = power(raw_x, raw_y)
+    out_power = power(out_x, out_y)
+    if raw_power <= 0.0 or out_power <= 0.0:
+        return 0.0
+    return 10.0 * float(np.log10(out_power / raw_power))
+
+
+def flick_segments(raw_x: np.ndarray, raw_y: np.ndarray, *, speed: float = FLICK_SPEED) -> list[tuple[int, int]]:
+    """
+    Intervalos [início, fim) da grade em que a velocidade bruta (média de 10 ms)
+    passa de `speed` por pelo menos `FLICK_MIN_MS`.
+    """
+    window = max(int(0.01 * GRID_RATE_HZ), 1)
+    vx = np.diff(raw_x, prepend=raw_x[:1]) * GRID_RATE_HZ
+    vy = np.diff(raw_y, prepend=raw_y[:1]) * GRID_RATE_HZ
+    kernel = np.full(window, 1.0 / window)
+    fast = np.hypot(np.convolve(vx, kernel, "same"), np.convolve(vy, kernel, "same")) > speed
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], fast.astype(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts) >= FLICK_MIN_MS * GRID_RATE_HZ / 1000.0
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+
+def flick_response(
+    raw_x: np.ndarray, raw_y: np.ndarray, out_x: np.ndarray, out_y: np.ndarray,
+    *, speed: float = FLICK_SPEED, settle_px: float = SETTLE_PX,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Overshoot (px) e tempo de acomodação (ms) de cada flick.
+
+    O alvo é a posição bruta média na janela de acomodação após o flick. O
+    overshoot é o quanto a saída passa do alvo na direção do flick; a
+    acomodação é o tempo, desde o fim do flick bruto, até a saída ficar a menos
+    de `settle_px` do alvo pelo resto da janela. O desvio que a saída já tinha
+    antes do flick é descontado, para medir só a resposta ao flick.
+    """
+    segments = flick_segments(raw_x, raw_y, speed=speed)
+    n = len(raw_x)
+    window = int(SETTLE_WINDOW_MS * GRID_RATE_HZ / 1000.0)
+    pre = int(0.05 * GRID_RATE_HZ)
+    overshoots, settling = [], []
+    for index, (start, end) in enumerate(segments):
+        stop = min(end + window, segments[index + 1][0] if index + 1 < len(segments) else n, n)
+        if stop - end < 2:
+            continue
+        before = slice(max(start - pre, 0), start) if start > 0 else slice(0, 1)
+        offset_x = np.mean(out_x[before] - raw_x[before])
+        offset_y = np.mean(out_y[before] - raw_y[before])
+        target_x = np.mean(raw_x[end:stop])
+        target_y = np.mean(raw_y[end:stop])
+        direction = np.array([target_x - raw_x[start], target_y - raw_y[start]])
+        distance = np.hypot(*direction)
+        if distance == 0.0:
+            continue
+        direction /= distance
+        ex = out_x[start:stop] - offset_x - target_x
+        ey = out_y[start:stop] - offset_y - target_y
+        overshoots.append(max(float(np.max(ex * direction[0] + ey * direction[1])), 0.0))
+        outside = np.flatnonzero(np.hypot(ex[end - start:], ey[end - start:]) > settle_px)
+        settled_at = outside[-1] + 1 if len(outside) else 0
+        settling.append(settled_at * 1000.0 / GRID_RATE_HZ)
+    return np.array(overshoots), np.array(settling)
+
+
+def deadzone_path_error(dx: np.ndarray, dy: np.ndarray, dt: np.ndarray, tremor: TremorGuard) -> float:
+    """Fração do comprimento do trajeto bruto removida pela deadzone do `TremorGuard`."""
+    raw_path = float(np.sum(np.hypot(dx, dy)))
+    if raw_path == 0.0:
+        return 0.0
+    pdx, pdy, _ = tremor.preprocess_batch(dx, dy, dt)
+    return 1.0 - float(np.sum(np.hypot(pdx, pdy))) / raw_path
+
+
+@dataclass
+class QualityReport:
+    """Métricas de qualidade de uma sequência filtrada (ver `analyze`)."""
+    events: int
+    duration_sec: float
+    lag_ms: float
+    jitter_ratio: float
+    tremor_attenuation_db: float
+    flicks: int
+    overshoot_px: float
+    max_overshoot_px: float
+    settling_ms: float
+    net_error_px: float
+    deadzone_path_error: Optional[float] = None
+    elapsed_ms: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def format(self) -> str:
+        deadzone = (
+            f", deadzone remove {self.deadzone_path_error * 100:.2f}% do trajeto"
+            if self.deadzone_path_error is not None else ""
+        )
+        return (
+            f"{self.events} eventos ({self.duration_sec:.1f}s): atraso {self.lag_ms:.1f} ms, "
+            f"jitter {self.jitter_ratio:.3f}x, tremor {self.tremor_attenuation_db:+.1f} dB, "
+            f"{self.flicks} flicks (overshoot médio {self.overshoot_px:.1f} px, máx {self.max_overshoot_px:.1f} px, "
+            f"acomodação {self.settling_ms:.0f} ms), desvio total {self.net_error_px:.1f} px{deadzone} "
+            f"[{self.elapsed_ms:.1f} ms]"
+        )
+
+
+def analyze(
+    t: np.ndarray,
+    raw_dx: np.ndarray,
+    raw_dy: np.ndarray,
+    out_dx: np.ndarray,
+    out_dy: np.ndarray,
+    *,
+    tremor: Optional[TremorGuard] = None,
+) -> QualityReport:
+    """
+    Pontua a saída (`out_dx`, `out_dy`) contra a entrada bruta, amostra a amostra
+    nos tempos `t` (como devolvido por `replay.filter_arrays`). Com `tremor`,
+    também mede o trajeto removido pela deadzone.
+    """
+    started = time.perf_counter()
+    t = np.asarray(t, dtype=np.float64)
+    raw_dx = np.asarray(raw_dx, dtype=np.float64)
+    raw_dy = np.asarray(raw_dy, dtype=np.float64)
+    out_dx = np.asarray(out_dx, dtype=np.float64)
+    out_dy = np.asarray(out_dy, dtype=np.float64)
+    if len(t) < 4:
+        raise ValueError("Sequência curta demais para análise (mínimo de 4 eventos).")
+
+    grid = np.arange(t[0], t[-1], 1.0 / GRID_RATE_HZ)
+    rx, ry = uniform_positions(t, raw_dx, raw_dy, grid)
+    fx, fy = uniform_positions(t, out_dx, out_dy, grid)
+    raw_jitter = jitter_energy(rx, ry)
+    rvx, rvy, fvx, fvy = np.diff(rx), np.diff(ry), np.diff(fx), np.diff(fy)
+    overshoots, settling = flick_response(rx, ry, fx, fy)
+
+    dz_error = None
+    if tremor is not None:
+        dt = np.diff(t, prepend=t[0] - (t[1] - t[0]))
+        dz_error = deadzone_path_error(raw_dx, raw_dy, dt, tremor)
+
+    return QualityReport(
+        events=len(t),
+        duration_sec=float(t[-1] - t[0]),
+        lag_ms=lag_ms(rvx, rvy, fvx, fvy),
+        jitter_ratio=jitter_energy(fx, fy) / raw_jitter if raw_jitter else 1.0,
+        tremor_attenuation_db=band_attenuation_db(rvx, rvy, fvx, fvy),
+        flicks=len(overshoots),
+        overshoot_px=float(overshoots.mean()) if len(overshoots) else 0.0,
+        max_overshoot_px=float(overshoots.max()) if len(overshoots) else 0.0,
+        settling_ms=float(settling.mean()) if len(settling) else 0.0,
+        net_error_px=float(np.hypot(out_dx.sum() - raw_dx.sum(), out_dy.sum() - raw_dy.sum())),
+        deadzone_path_error=dz_error,
+        elapsed_ms=(time.perf_counter() - started) * 1000.0,
+    )
+
+
+def analyze_trace(
+    dx, dy, t, tremor: TremorGuard, ema: AdaptiveEMA, *, chain: Optional[FilterChain] = None,
+) -> QualityReport:
+    """Filtra um traço (dx, dy, t) em lote e pontua a saída."""
+    t_kept, raw_dx, raw_dy, ox, oy = filter_arrays(
+        np.asarray(dx, dtype=np.float64), np.asarray(dy, dtype=np.float64), np.asarray(t, dtype=np.float64),
+        tremor, ema, chain=chain,
+    )
+    return analyze(t_kept, raw_dx, raw_dy, ox, oy, tremor=tremor)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.analysis", description="Métricas de qualidade da suavização.")
+    parser.add_argument("traces", nargs="*", type=Path, help="Traços .aimtrace, .csv (dx,dy,t) ou .npy.")
+    parser.add_argument("--config", type=Path, default=None, help="Configuração a usar (padrão: config/defaults.json).")
+    parser.add_argument("--synthetic", nargs="*", choices=list(GENERATORS), default=None,
+                        help="Cenários sintéticos a pontuar (padrão, sem traços: todos).")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Taxa de polling dos cenários sintéticos (Hz).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, default=None, help="Grava os relatórios em JSON.")
+    args = parser.parse_args(argv)
+
+    cfg = read_config(args.config)
+    inputs: list[tuple[str, tuple]] = []
+    for path in args.traces:
+        try:
+            inputs.append((path.name, load_input_trace(path)))
+        except (OSError, ValueError) as exc:
+            print(f"[Análise] {path}: ignorado ({exc})", file=sys.stderr)
+    scenarios = args.synthetic if args.synthetic is not None else ([] if args.traces else list(GENERATORS))
+    for name in scenarios:
+        trace = GENERATORS[name](rate_hz=args.rate, seed=args.seed)
+        inputs.append((name, (trace.dx, trace.dy, trace.t)))
+    if not inputs:
+        print("[Análise] Nenhum traço disponível.", file=sys.stderr)
+        return 1
+
+    reports = {}
+    for name, (dx, dy, t) in inputs:
+        tremor = TremorGuard(tremor_params_from_config(cfg))
+        ema = AdaptiveEMA(ema_params_from_config(cfg), response_curve_from_config(cfg))
+        try:
+            report = analyze_trace(dx, dy, t, tremor, ema, chain=filter_chain_from_config(cfg, tremor, ema))
+        except ValueError as exc:
+            print(f"[Análise] {name}: ignorado ({exc})", file=sys.stderr)
+            continue
+        reports[name] = report.as_dict()
+        print(f"[Análise] {name}: {report.format()}")
+
+    if args.json is not None and reports:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+        print(f"[Análise] Relatórios gravados em '{args.json}'.")
+    return 0 if reports else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
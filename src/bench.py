@@ -0,0 +1,249 @@
+"""
+Suíte de microbenchmarks dos filtros, executável sem Windows e sem interface gráfica.
+
+Uso:
+    python -m src.bench [--rates 125 1000 4000 8000] [--scenarios ...] [--cases ...]
+                        [--out resultados.json] [--baseline base.json] [--threshold 0.25]
+
+Cada caso (`TremorGuard.preprocess`, `AdaptiveEMA.update`,
+`LinearEMAParams.alpha_for_speed`, `LatencyProfiler.log`,
+`CalibrationCollector.record` e o callback compilado do hook) é alimentado com
+movimento sintético com semente (`src.synthetic`) em cada taxa de polling. O
+resultado (ns/evento e eventos/s, melhor de `--repeat` execuções) é impresso e
+pode ser gravado em JSON. Com `--baseline`, a execução falha (código 1) se algum
+caso ficar mais lento que a base além de `--threshold`; ela também falha se o
+custo médio de algum caso, ou o p99 do hook, ultrapassar o orçamento de 0.5 ms
+por evento do plano do projeto.
+"""
+from __future__ import annotations
+
+import argparse
+import ctypes
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from .bench_hook import FakeUser32
+from .calibration import CalibrationCollector
+from .config import read_config, snapshot_from_config
+from .profiler import LatencyProfiler
+from .smoothing import AdaptiveEMA
+from .synthetic import fast_flicks, slow_tremor, steady_tracking
+from .tremor import TremorGuard
+from .win_hook import HookEngine, MSLLHOOKSTRUCT, WM_MOUSEMOVE
+
+BUDGET_NS = 500_000  # 0.5 ms por evento (Plan/Projeto_Suavizador_de_Mira.md)
+DEFAULT_RATES = (125, 1000, 4000, 8000)
+SCENARIOS = {
+    "slow_tremor": slow_tremor,
+    "steady_tracking": steady_tracking,
+    "fast_flicks": fast_flicks,
+}
+
+
+class Workload:
+    """Eventos de um cenário sintético já convertidos para tipos Python, como no hook."""
+
+    def __init__(self, scenario: str, rate_hz: int, duration_sec: float, seed: int):
+        trace = SCENARIOS[scenario](duration_sec, rate_hz, seed=seed)
+        t = trace.t
+        dt = np.diff(t, prepend=t[0] - 1.0 / rate_hz)
+        self.scenario = scenario
+        self.rate_hz = rate_hz
+        self.dx = trace.dx.astype(np.int64).tolist()
+        self.dy = trace.dy.astype(np.int64).tolist()
+        self.dt = dt.tolist()
+        self.speed = (np.hypot(trace.dx, trace.dy) / dt).tolist()
+        self.x = np.cumsum(trace.dx).astype(np.int64).tolist()
+        self.y = np.cumsum(trace.dy).astype(np.int64).tolist()
+
+    def __len__(self) -> int:
+        return len(self.dt)
+
+
+def _bench_tremor(w: Workload, snapshot) -> tuple[int, dict]:
+    preprocess = TremorGuard(snapshot.tremor).preprocess
+    events = list(zip(w.dx, w.dy, w.dt))
+    start = time.perf_counter_ns()
+    for dx, dy, dt in events:
+        preprocess(dx, dy, dt)
+    return time.perf_counter_ns() - start, {}
+
+
+def _bench_ema(w: Workload, snapshot) -> tuple[int, dict]:
+    preprocess = TremorGuard(snapshot.tremor).preprocess
+    events = [(*preprocess(dx, dy, dt), dt) for dx, dy, dt in zip(w.dx, w.dy, w.dt)]
+    update = AdaptiveEMA(snapshot.ema, snapshot.curve).update
+    start = time.perf_counter_ns()
+    for dx, dy, gain, dt in events:
+        update(dx, dy, dt, gain)
+    return time.perf_counter_ns() - start, {}
+
+
+def _bench_alpha(w: Workload, snapshot) -> tuple[int, dict]:
+    alpha_for_speed = snapshot.ema.alpha_for_speed
+    speeds = w.speed
+    start = time.perf_counter_ns()
+    for speed in speeds:
+        alpha_for_speed(speed)
+    return time.perf_counter_ns() - start, {}
+
+
+def _bench_profiler(w: Workload, snapshot) -> tuple[int, dict]:
+    log = LatencyProfiler(background=True, ring_capacity=len(w)).log
+    latencies = [1.0 + (i % 97) * 0.25 for i in range(len(w))]
+    start = time.perf_counter_ns()
+    for latency in latencies:
+        log(latency)
+    return time.perf_counter_ns() - start, {}
+
+
+def _bench_collector(w: Workload, snapshot) -> tuple[int, dict]:
+    record = CalibrationCollector().record
+    events = list(zip(w.dx, w.dy, w.dt))
+    start = time.perf_counter_ns()
+    for dx, dy, dt in events:
+        record("slow", dx, dy, dt)
+    return time.perf_counter_ns() - start, {}
+
+
+def _bench_hook(w: Workload, snapshot) -> tuple[int, dict]:
+    profiler = LatencyProfiler(background=True, ring_capacity=len(w))
+    engine = HookEngine(
+        AdaptiveEMA(snapshot.ema, snapshot.curve),
+        TremorGuard(snapshot.tremor),
+        profiler,
+        65535,
+        user32=FakeUser32(),
+        alpha_table_step=snapshot.alpha_table_step,
+    )
+    callback = engine._callback
+    struct = MSLLHOOKSTRUCT()
+    pt = struct.pt
+    lparam = ctypes.addressof(struct)
+    points = list(zip(w.x, w.y))
+    start = time.perf_counter_ns()
+    for x, y in points:
+        pt.x = x
+        pt.y = y
+        callback(0, WM_MOUSEMOVE, lparam)
+    elapsed = time.perf_counter_ns() - start
+    profiler.drain()
+    return elapsed, {"p99_us": profiler.interval.percentile(0.99), "max_us": profiler.interval.max_us}
+
+
+CASES: dict[str, Callable[[Workload, object], tuple[int, dict]]] = {
+    "tremor.preprocess": _bench_tremor,
+    "ema.update": _bench_ema,
+    "params.alpha_for_speed": _bench_alpha,
+    "profiler.log": _bench_profiler,
+    "collector.record": _bench_collector,
+    "hook.callback": _bench_hook,
+}
+
+
+def run_suite(
+    cases: list[str],
+    scenarios: list[str],
+    rates: list[int],
+    *,
+    duration_sec: float,
+    repeat: int,
+    seed: int,
+    snapshot,
+) -> dict[str, dict]:
+    """Executa todos os casos e devolve {"caso/cenário/taxaHz": métricas}."""
+    results = {}
+    for scenario in scenarios:
+        for rate in rates:
+            workload = Workload(scenario, rate, duration_sec, seed)
+            for case in cases:
+                best_ns, extra = None, {}
+                for _ in range(max(repeat, 1)):
+                    elapsed, info = CASES[case](workload, snapshot)
+                    if best_ns is None or elapsed < best_ns:
+                        best_ns, extra = elapsed, info
+                ns_per_event = best_ns / len(workload)
+                results[f"{case}/{scenario}/{rate}Hz"] = {
+                    "events": len(workload),
+                    "ns_per_event": round(ns_per_event, 1),
+                    "events_per_sec": round(1e9 / ns_per_event, 1) if ns_per_event else 0.0,
+                    **{key: round(value, 2) for key, value in extra.items()},
+                }
+    return results
+
+
+def check_results(results: dict, baseline: Optional[dict], threshold: float) -> list[str]:
+    """Lista de falhas: regressões contra a base e estouros do orçamento de 0.5 ms."""
+    failures = []
+    for key, metrics in results.items():
+        if metrics["ns_per_event"] > BUDGET_NS:
+            failures.append(f"{key}: {metrics['ns_per_event']:.0f} ns/evento acima do orçamento de {BUDGET_NS} ns")
+        if "p99_us" in metrics and metrics["p99_us"] * 1000.0 > BUDGET_NS:
+            failures.append(f"{key}: p99 de {metrics['p99_us']:.1f} µs acima do orçamento de {BUDGET_NS / 1000:.0f} µs")
+        reference = (baseline or {}).get(key)
+        if reference and metrics["ns_per_event"] > reference["ns_per_event"] * (1.0 + threshold):
+            change = metrics["ns_per_event"] / reference["ns_per_event"] - 1.0
+            failures.append(
+                f"{key}: {metrics['ns_per_event']:.0f} ns/evento vs. base {reference['ns_per_event']:.0f} "
+                f"(+{change * 100:.0f}%, limite {threshold * 100:.0f}%)"
+            )
+    return failures
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.bench", description="Microbenchmarks dos filtros com portões de regressão.")
+    parser.add_argument("--cases", nargs="*", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--rates", nargs="*", type=int, default=list(DEFAULT_RATES))
+    parser.add_argument("--duration", type=float, default=2.0, help="Duração de cada cenário sintético (s).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", type=Path, default=None, help="Parâmetros dos filtros (padrão: config/defaults.json).")
+    parser.add_argument("--out", type=Path, default=None, help="Arquivo JSON onde gravar os resultados.")
+    parser.add_argument("--baseline", type=Path, default=None, help="Resultados JSON de referência.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Regressão tolerada (fração, padrão 0.25).")
+    args = parser.parse_args(argv)
+
+    snapshot = snapshot_from_config(read_config(args.config))
+    results = run_suite(
+        args.cases, args.scenarios, args.rates,
+        duration_sec=args.duration, repeat=args.repeat, seed=args.seed, snapshot=snapshot,
+    )
+    for key, metrics in results.items():
+        tail = f" | p99 {metrics['p99_us']:.1f} µs" if "p99_us" in metrics else ""
+        print(f"[Bench] {key:<45} {metrics['ns_per_event']:>9.0f} ns/evento {metrics['events_per_sec']:>14,.0f} eventos/s{tail}")
+
+    if args.out is not None:
+        payload = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "duration_sec": args.duration,
+                "repeat": args.repeat,
+                "seed": args.seed,
+            },
+            "results": results,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"[Bench] Resultados gravados em '{args.out}'.")
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    failures = check_results(results, baseline, args.threshold)
+    for failure in failures:
+        print(f"[Bench] FALHA {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
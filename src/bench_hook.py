@@ -0,0 +1,193 @@
+"""
+Microbenchmark do callback do hook, executável fora do Windows.
+
+Uso:
+    python -m src.bench_hook [--events N] [--repeat R]
+
+Alimenta o `HookEngine` com um MSLLHOOKSTRUCT falso (o `lParam` é o endereço de
+uma estrutura em memória) e um `user32` substituto, e compara eventos/s do
+callback original (`ReferenceCallback`, a linha de base) com o pipeline compilado. Também
+confere quantas chamadas a `SendInput` e quantos blocos de memória o `Injector`
+gasta por movimento, usando o mesmo `user32` substituto.
+"""
+from __future__ import annotations
+
+import argparse
+import ctypes
+import math
+import sys
+import time
+import tracemalloc
+from ctypes import POINTER, cast
+from typing import Optional
+
+from .injector import INPUT, INPUT_MOUSE, MOUSEEVENTF_MOVE, MOUSEINPUT, Injector
+from .profiler import LatencyProfiler
+from .smoothing import AdaptiveEMA, LinearEMAParams
+from .tremor import TremorGuard, TremorParams
+from .win_hook import HookEngine, MSLLHOOKSTRUCT, WM_MOUSEMOVE
+
+
+class FakeUser32:
+    """Substituto mínimo do user32 para o hook e o injetor: só conta as chamadas."""
+
+    def __init__(self) -> None:
+        self.call_next = 0
+        self.send_input_calls = 0
+        self.sent_inputs = 0
+
+    def CallNextHookEx(self, hhk, nCode, wParam, lParam):  # noqa: N802 - nome da API do Windows
+        self.call_next += 1
+        return 0
+
+    def SendInput(self, count, inputs, size):  # noqa: N802 - nome da API do Windows
+        self.send_input_calls += 1
+        self.sent_inputs += count
+        return count
+
+
+class ReferenceCallback:
+    """
+    O callback de antes do pipeline compilado, usado como linha de base.
+
+    Reproduz o caminho original: lê o MSLLHOOKSTRUCT por ponteiro, consulta modo,
+    estado e filtros do engine a cada evento, passa por `TremorGuard.preprocess` e
+    `AdaptiveEMA.update` e monta as estruturas de `SendInput` a cada envio (como o
+    antigo `send_mouse_move`). A posição fica no próprio objeto, e os erros vão
+    para `engine.error_log`, como no pipeline compilado.
+    """
+
+    def __init__(self, engine: HookEngine, user32: FakeUser32):
+        self.engine = engine
+        self.user32 = user32
+        self.last_x = None
+        self.last_y = None
+        self.last_t = None
+
+    def send_mouse_move(self, dx: int, dy: int, magic_number: int) -> None:
+        extra = ctypes.c_ulong(magic_number)
+        inp = INPUT()
+        inp.type = INPUT_MOUSE
+        inp.i.mi = MOUSEINPUT(dx=dx, dy=dy, mouseData=0, dwFlags=MOUSEEVENTF_MOVE, time=0,
+                              dwExtraInfo=ctypes.pointer(extra))
+        self.user32.SendInput(1, ctypes.byref(inp), ctypes.sizeof(INPUT))
+
+    def __call__(self, nCode, wParam, lParam):
+        engine = self.engine
+        user32 = self.user32
+        start_time = time.perf_counter_ns()
+        try:
+            hook_struct = cast(lParam, POINTER(MSLLHOOKSTRUCT)).contents
+            if hook_struct.dwExtraInfo and hook_struct.dwExtraInfo.contents.value == engine.magic_number:
+                return user32.CallNextHookEx(engine._hHook, nCode, wParam, lParam)
+            if wParam == WM_MOUSEMOVE:
+                current_x = hook_struct.pt.x
+                current_y = hook_struct.pt.y
+                current_t = time.perf_counter()
+                if self.last_x is None:
+                    self.last_x, self.last_y, self.last_t = current_x, current_y, current_t
+                    return user32.CallNextHookEx(engine._hHook, nCode, wParam, lParam)
+                dx = current_x - self.last_x
+                dy = current_y - self.last_y
+                dt = current_t - self.last_t
+                if dt > 0:
+                    if engine.mode.startswith("calibration") and engine._calibration_sink:
+                        phase = engine.mode.split("_", 1)[1]
+                        engine._calibration_sink(phase, dx, dy, dt)
+                        self.last_x, self.last_y, self.last_t = current_x, current_y, current_t
+                        return user32.CallNextHookEx(engine._hHook, nCode, wParam, lParam)
+
+                    if engine.enabled:
+                        processed_dx, processed_dy, gain = engine.tremor.preprocess(dx, dy, dt)
+                        smoothed_dx, smoothed_dy = engine.ema.update(processed_dx, processed_dy, dt, gain)
+                        if smoothed_dx != 0 or smoothed_dy != 0:
+                            self.send_mouse_move(int(round(smoothed_dx)), int(round(smoothed_dy)), engine.magic_number)
+                self.last_x, self.last_y, self.last_t = current_x, current_y, current_t
+                if engine.enabled:
+                    end_time = time.perf_counter_ns()
+                    engine.profiler.log((end_time - start_time) / 1000.0)
+                    return 1
+        except Exception as e:
+            engine.error_log(e)
+        return user32.CallNextHookEx(engine._hHook, nCode, wParam, lParam)
+
+
+def synthetic_path(events: int, *, radius: float = 400.0, turns: float = 20.0) -> list[tuple[int, int]]:
+    """Posições absolutas de um movimento circular com pequeno tremor, em pixels inteiros."""
+    points = []
+    for i in range(events):
+        angle = 2 * math.pi * turns * i / events
+        wobble = 1.5 * math.sin(i * 0.7)
+        points.append((int(radius * math.cos(angle) + wobble), int(radius * math.sin(angle) - wobble)))
+    return points
+
+
+def make_engine(user32: FakeUser32) -> HookEngine:
+    ema = AdaptiveEMA(LinearEMAParams(v_min=0.0, v_max=1200.0, alpha_min=0.05, alpha_max=0.85))
+    tremor = TremorGuard(TremorParams(jitter_deadzone_px=0.4, jitter_speed_max=200.0, extra_damp_factor=0.5))
+    profiler = LatencyProfiler(background=True)
+    return HookEngine(ema, tremor, profiler, 65535, user32=user32)
+
+
+def run_callback(callback, points: list[tuple[int, int]]) -> float:
+    """Executa o callback para cada ponto e devolve os eventos por segundo."""
+    struct = MSLLHOOKSTRUCT()
+    pt = struct.pt
+    lparam = ctypes.addressof(struct)
+    start = time.perf_counter()
+    for x, y in points:
+        pt.x = x
+        pt.y = y
+        callback(0, WM_MOUSEMOVE, lparam)
+    elapsed = time.perf_counter() - start
+    return len(points) / elapsed
+
+
+def check_injector(moves: int = 10_000, batch: int = 8) -> None:
+    """Mede chamadas a SendInput e blocos alocados por movimento no `Injector`."""
+    user32 = FakeUser32()
+    inj = Injector(65535, capacity=batch, user32=user32)
+    inj.send(1, 1)  # aquece caches internos do ctypes
+    user32.send_input_calls = user32.sent_inputs = 0
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(moves):
+        inj.send(i & 7, -(i & 3))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    print(f"[Bench] Injector.send: {user32.send_input_calls} chamadas para {moves} movimentos, "
+          f"{blocks / moves:.3f} blocos retidos/movimento")
+
+    user32.send_input_calls = user32.sent_inputs = 0
+    chunk = [(1, -1)] * batch
+    for _ in range(moves // batch):
+        inj.send_many(chunk)
+    print(f"[Bench] Injector.send_many: {user32.send_input_calls} chamadas para {user32.sent_inputs} movimentos")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.bench_hook", description="Microbenchmark do callback do hook.")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    points = synthetic_path(args.events)
+    best = {"referência": 0.0, "compilado": 0.0}
+    for _ in range(args.repeat):
+        for label in best:
+            user32 = FakeUser32()
+            engine = make_engine(user32)
+            callback = ReferenceCallback(engine, user32) if label == "referência" else engine._callback
+            best[label] = max(best[label], run_callback(callback, points))
+
+    for label, rate in best.items():
+        print(f"[Bench] {label:>10}: {rate:,.0f} eventos/s ({1e9 / rate:.0f} ns/evento)")
+    print(f"[Bench] Ganho do pipeline compilado: {best['compilado'] / best['referência']:.2f}x")
+    check_injector()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,45 +1,70 @@
 from __future__ import annotations
 
 import math
+import threading
+from array import array
+from dataclasses import replace
 from typing import Optional
 
-from .calibration_ui import CalibrationWindow
-from .smoothing import AdaptiveEMA, LinearEMAParams
+from .quantiles import P2Quantile
+from .smoothing import LinearEMAParams
 from .win_hook import HookEngine
 
 
+# Quantis estimados por fase; fases desconhecidas recebem todos eles.
+PHASE_QUANTILES: dict[str, tuple[float, ...]] = {"slow": (0.65,), "fast": (0.5, 0.9)}
+_ALL_QUANTILES = (0.5, 0.65, 0.9)
+
+
 class CalibrationCollector:
-    """Armazena as amostras de velocidade por fase e gera recomendações."""
+    """
+    Estima os percentis de velocidade por fase e gera recomendações.
+
+    Cada fase usa estimadores P² em fluxo (um por quantil necessário), então a
+    memória fica constante e cada amostra custa O(1), por mais longa que seja a fase.
+    """
 
     def __init__(self) -> None:
-        self._samples: dict[str, list[float]] = {"slow": [], "fast": []}
+        self._sketches: dict[str, dict[float, P2Quantile]] = {
+            phase: {q: P2Quantile(q) for q in quantiles} for phase, quantiles in PHASE_QUANTILES.items()
+        }
 
     def record(self, phase: str, dx: float, dy: float, dt: float) -> None:
         if dt <= 0:
             return
-        speed = math.hypot(dx, dy) / dt
-        self._samples.setdefault(phase, []).append(speed)
+        self.record_speed(phase, math.hypot(dx, dy) / dt)
+
+    def record_speed(self, phase: str, speed: float) -> None:
+        sketches = self._sketches.get(phase)
+        if sketches is None:
+            sketches = self._sketches[phase] = {q: P2Quantile(q) for q in _ALL_QUANTILES}
+        for sketch in sketches.values():
+            sketch.add(speed)
+
+    def count(self, phase: str) -> int:
+        sketches = self._sketches.get(phase)
+        return next(iter(sketches.values())).count if sketches else 0
+
+    def quantile(self, phase: str, fraction: float) -> float:
+        sketch = self._sketches.get(phase, {}).get(fraction)
+        return sketch.value() if sketch is not None else 0.0
 
     def has_enough_data(self) -> bool:
-        return all(len(values) >= 25 for values in self._samples.values())
+        return all(self.count(phase) >= 25 for phase in self._sketches)
 
     def recommendations(self, current: LinearEMAParams) -> Optional[LinearEMAParams]:
         if not self.has_enough_data():
             return None
 
-        slow = sorted(self._samples.get("slow", []))
-        fast = sorted(self._samples.get("fast", []))
-        if not slow or not fast:
-            return None
-
-        v_min = percentile(slow, 0.65)
-        v_med_fast = percentile(fast, 0.5)
-        v_max = percentile(fast, 0.9)
+        v_min = self.quantile("slow", 0.65)
+        v_med_fast = self.quantile("fast", 0.5)
+        v_max = self.quantile("fast", 0.9)
 
         v_min = max(10.0, v_min * 0.75)
         v_max = max(v_min + 120.0, v_max * 1.1, v_med_fast * 1.3)
 
-        return LinearEMAParams(
+        return replace(
+            current,
             v_min=float(round(v_min, 2)),
             v_max=float(round(v_max, 2)),
             alpha_min=float(round(current.alpha_min, 4)),
@@ -47,12 +72,133 @@ class CalibrationCollector:
         )
 
 
-def percentile(values: list[float], fraction: float) -> float:
-    if not values:
-        return 0.0
-    fraction = min(1.0, max(0.0, fraction))
-    index = int(round((len(values) - 1) * fraction))
-    return values[index]
+class AutoCalibrator:
+    """
+    Calibração contínua em segundo plano durante o uso normal.
+
+    A thread do hook só chama `observe(speed)`, que grava a velocidade em um
+    buffer circular pré-alocado (descartando se estiver cheio). Uma thread
+    própria drena o buffer e classifica cada amostra como lenta ou rápida em
+    relação ao ponto médio da curva atual, alimentando um `CalibrationCollector`.
+    A cada `window` amostras, a recomendação do coletor é misturada aos
+    parâmetros vigentes (fator `blend`), publicada como um novo
+    `LinearEMAParams` via `HookEngine.publish` e o coletor é reiniciado, de
+    modo que a memória não cresce e a curva acompanha mudanças de estilo ao
+    longo da sessão. Vale para o EMA do perfil ativo.
+
+    Há realimentação: a divisão lenta/rápida usa a curva que a própria
+    calibração ajusta. A mistura amortece cada passo e, quando o ajuste de uma
+    janela fica abaixo de `tolerance` (fração de `v_max - v_min`) em `v_min` e
+    `v_max`, nada é publicado (a curva é considerada estável até a recomendação
+    se afastar de novo).
+    Curvas que não dependem de `v_min`/`v_max` (`piecewise`, `spline`, sigmoide
+    com ponto médio e largura fixos) são deixadas como estão.
+    """
+
+    def __init__(
+        self,
+        engine: HookEngine,
+        *,
+        window: int = 4000,
+        blend: float = 0.25,
+        tolerance: float = 0.02,
+        capacity: int = 4096,
+        drain_interval_sec: float = 0.1,
+    ) -> None:
+        self.engine = engine
+        self.window = max(window, 50)
+        self.blend = min(1.0, max(0.0, blend))
+        self.tolerance = max(tolerance, 0.0)
+        self.updates = 0
+        self.settled = False
+        self.dropped = 0
+        self._collector = CalibrationCollector()
+        self._seen = 0
+
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._ring = array("d", bytes(8 * capacity))
+        self._head = 0  # escrito apenas pela thread do hook
+        self._tail = 0  # escrito apenas pela thread do calibrador
+        self._drain_interval = drain_interval_sec
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def observe(self, speed: float) -> None:
+        """Enfileira a velocidade de um evento. Chamado no caminho quente do hook."""
+        head = self._head
+        if head - self._tail >= self._capacity:
+            self.dropped += 1
+            return
+        self._ring[head & self._mask] = speed
+        self._head = head + 1
+
+    def drain(self) -> None:
+        """Processa as amostras pendentes e aplica uma nova curva ao fim de cada janela."""
+        head = self._head
+        ring, mask = self._ring, self._mask
+        params = self.engine.ema.params
+        split = (params.v_min + params.v_max) / 2.0
+        for index in range(self._tail, head):
+            speed = ring[index & mask]
+            if speed <= 0.0:
+                continue
+            self._collector.record_speed("slow" if speed < split else "fast", speed)
+            self._seen += 1
+            if self._seen >= self.window:
+                self._apply_window()
+                params = self.engine.ema.params
+                split = (params.v_min + params.v_max) / 2.0
+        self._tail = head
+
+    def _apply_window(self) -> None:
+        ema = self.engine.ema
+        current = ema.params
+        suggestion = self._collector.recommendations(current)
+        self._collector = CalibrationCollector()
+        self._seen = 0
+        if suggestion is None:
+            return
+        if ema.curve is not None and not ema.curve.uses_speed_range:
+            return
+        blend = self.blend
+        updated = replace(
+            current,
+            v_min=round(current.v_min + blend * (suggestion.v_min - current.v_min), 2),
+            v_max=round(current.v_max + blend * (suggestion.v_max - current.v_max), 2),
+        )
+        tolerance = self.tolerance * (current.v_max - current.v_min)
+        if abs(updated.v_min - current.v_min) < tolerance and abs(updated.v_max - current.v_max) < tolerance:
+            if not self.settled:
+                self.settled = True
+                print(f"[AutoCalibração] Curva estável em v_min={current.v_min}, v_max={current.v_max}.")
+            return
+        self.settled = False
+        self.engine.publish(replace(self.engine.params_snapshot(), ema=updated))
+        self.updates += 1
+        print(f"[AutoCalibração] v_min={updated.v_min}, v_max={updated.v_max} (ajuste #{self.updates})")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="auto-calibration", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._drain_interval):
+            try:
+                self.drain()
+            except Exception as exc:  # noqa: BLE001
+                print(f"Erro na calibração contínua: {exc}")
 
 
 class CalibrationSession:
@@ -61,18 +207,20 @@ class CalibrationSession:
     def __init__(
         self,
         engine: HookEngine,
-        ema: AdaptiveEMA,
         *,
         slow_duration_sec: float,
         fast_duration_sec: float,
     ) -> None:
         self.engine = engine
-        self.ema = ema
         self.collector = CalibrationCollector()
         self.slow_duration = max(slow_duration_sec, 1.0)
         self.fast_duration = max(fast_duration_sec, 1.0)
+        # Importado aqui para que coletor e calibração contínua funcionem sem Tk (ex.: benchmarks headless).
+        from .calibration_ui import CalibrationWindow
+
         self.window = CalibrationWindow()
         self._closed = False
+        self.applied: Optional[LinearEMAParams] = None
 
     def execute(self) -> None:
         """Executa o fluxo sincrono utilizando o mainloop do Tkinter."""
@@ -117,12 +265,10 @@ class CalibrationSession:
         self.window.after(600, self._apply_results)
 
     def _apply_results(self) -> None:
-        suggestion = self.collector.recommendations(self.ema.params)
+        suggestion = self.collector.recommendations(self.engine.ema.params)
         if suggestion:
-            self.ema.params.v_min = suggestion.v_min
-            self.ema.params.v_max = suggestion.v_max
-            self.ema.params.alpha_min = suggestion.alpha_min
-            self.ema.params.alpha_max = suggestion.alpha_max
+            self.engine.publish(replace(self.engine.params_snapshot(), ema=suggestion))
+            self.applied = suggestion
             summary = (
                 f"Calibração concluída!\n"
                 f"v_min={suggestion.v_min}, v_max={suggestion.v_max}\n"
@@ -150,22 +296,25 @@ class CalibrationSession:
 
 def run_calibration(
     engine: HookEngine,
-    ema: AdaptiveEMA,
     *,
     slow_duration_sec: float = 5.0,
     fast_duration_sec: float = 5.0,
-) -> None:
+) -> Optional[LinearEMAParams]:
     """
     Executa a calibração guiada. Quaisquer exceções do Tkinter são tratadas para
     não derrubar o aplicativo principal.
+
+    Retorna os parâmetros aplicados, ou None se a calibração foi cancelada,
+    falhou ou não teve dados suficientes.
     """
     try:
         session = CalibrationSession(
             engine,
-            ema,
             slow_duration_sec=slow_duration_sec,
             fast_duration_sec=fast_duration_sec,
         )
         session.execute()
     except Exception as exc:  # noqa: BLE001
         print(f"Calibração foi ignorada: {exc}")
+        return None
+    return session.applied
@@ -0,0 +1,360 @@
+"""
+Cache persistente dos resultados da calibração guiada.
+
+A calibração de ~15 s só é refeita quando não há uma entrada válida para a
+identidade atual: perfil (`calibration_profile`), mouses conectados (VID/PID) e
+impressão digital do ponteiro (velocidade e "aumentar precisão" do Windows e o
+`mouse_dpi` declarado na configuração). O Windows não expõe o DPI do sensor, então
+ele entra pela configuração. A taxa de polling é verificada depois que o hook
+já está ativo (`PollingRateCheck`): se mudou, a entrada é invalidada e a
+calibração roda de novo na próxima inicialização.
+
+O arquivo é versionado (`CACHE_VERSION`); versões diferentes são descartadas,
+entradas mais velhas que `max_age_sec` são removidas e, acima de `max_entries`,
+saem as usadas há mais tempo. A gravação é atômica (arquivo temporário + rename).
+"""
+from __future__ import annotations
+
+import ctypes
+import json
+import os
+import re
+import statistics
+import threading
+import time
+from ctypes import byref, wintypes
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Optional
+
+from .smoothing import AdaptiveEMA, LinearEMAParams
+from .telemetry import MotionTap
+
+CACHE_VERSION = 1
+# Só o que o assistente ajusta: os alphas vêm sempre da configuração, para que
+# editá-los no `defaults.json` valha já na próxima inicialização.
+CACHED_FIELDS = ("v_min", "v_max")
+STANDARD_POLLING_HZ = (125, 250, 500, 1000, 2000, 4000, 8000)
+
+RIM_TYPEMOUSE = 0
+RIDI_DEVICENAME = 0x20000007
+SPI_GETMOUSE = 0x0003
+SPI_GETMOUSESPEED = 0x0070
+_VID_PID = re.compile(r"vid_([0-9a-f]{4}).*?pid_([0-9a-f]{4})")
+
+
+def default_cache_path() -> Path:
+    base = os.environ.get("LOCALAPPDATA")
+    root = Path(base) if base else Path.home() / ".cache"
+    return root / "AimSmoother" / "calibration_cache.json"
+
+
+class RAWINPUTDEVICELIST(ctypes.Structure):
+    _fields_ = [("hDevice", wintypes.HANDLE), ("dwType", wintypes.DWORD)]
+
+
+def mouse_device_ids(user32) -> list[str]:
+    """
+    Identificadores `vid:pid` dos mouses conectados (Raw Input), ordenados.
+
+    Usa VID/PID em vez do caminho completo do dispositivo para que trocar a porta
+    USB não invalide o cache. Dispositivos virtuais (sem VID/PID) são ignorados.
+    """
+    if user32 is None:
+        return []
+    size = ctypes.sizeof(RAWINPUTDEVICELIST)
+    count = wintypes.UINT()
+    if user32.GetRawInputDeviceList(None, byref(count), size) != 0 or not count.value:
+        return []
+    devices = (RAWINPUTDEVICELIST * count.value)()
+    found = user32.GetRawInputDeviceList(devices, byref(count), size)
+    if found in (-1, 0xFFFFFFFF):
+        return []
+    ids = set()
+    for device in devices[:found]:
+        if device.dwType != RIM_TYPEMOUSE:
+            continue
+        length = wintypes.UINT()
+        user32.GetRawInputDeviceInfoW(device.hDevice, RIDI_DEVICENAME, None, byref(length))
+        if not length.value:
+            continue
+        name = ctypes.create_unicode_buffer(length.value)
+        if user32.GetRawInputDeviceInfoW(device.hDevice, RIDI_DEVICENAME, name, byref(length)) <= 0:
+            continue
+        match = _VID_PID.search(name.value.lower())
+        if match:
+            ids.add(f"{match.group(1)}:{match.group(2)}")
+    return sorted(ids)
+
+
+def pointer_settings(user32) -> dict:
+    """Velocidade do ponteiro (1-20) e "aumentar precisão do ponteiro" do Windows."""
+    if user32 is None:
+        return {}
+    speed = ctypes.c_int()
+    mouse = (ctypes.c_int * 3)()
+    settings = {}
+    if user32.SystemParametersInfoW(SPI_GETMOUSESPEED, 0, byref(speed), 0):
+        settings["pointer_speed"] = speed.value
+    if user32.SystemParametersInfoW(SPI_GETMOUSE, 0, mouse, 0):
+        settings["enhance_precision"] = bool(mouse[2])
+    return settings
+
+
+def cache_key(profile: str, devices: list[str], pointer: dict, dpi: float) -> str:
+    """Chave estável da identidade (perfil | mouses | ponteiro e DPI)."""
+    pointer_part = ",".join(f"{name}={value}" for name, value in sorted(pointer.items()))
+    return f"{profile}|{'+'.join(devices) or 'desconhecido'}|{pointer_part};dpi={dpi:g}"
+
+
+def nominal_polling_hz(measured_hz: float) -> int:
+    """Taxa padrão (125 Hz a 8 kHz) mais próxima da medida, em escala logarítmica."""
+    return min(STANDARD_POLLING_HZ, key=lambda rate: abs(rate / measured_hz - measured_hz / rate))
+
+
+class CalibrationCache:
+    """Arquivo JSON versionado de calibrações por chave de identidade."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        *,
+        max_age_sec: float = 30 * 86400.0,
+        max_entries: int = 16,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path) if path else default_cache_path()
+        self.max_age = max_age_sec
+        self.max_entries = max(max_entries, 1)
+        self.clock = clock
+        self.entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Lê o arquivo; ausente, corrompido ou de outra versão vira um cache vazio."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except (OSError, ValueError) as exc:
+            print(f"[Calibração] Cache ilegível, ignorado ({exc}).")
+            data = {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            data = {}
+        entries = data.get("entries")
+        with self._lock:
+            self.entries = entries if isinstance(entries, dict) else {}
+            self._evict()
+
+    def save(self) -> None:
+        with self._lock:
+            self._evict()
+            payload = {"version": CACHE_VERSION, "entries": self.entries}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(temp, self.path)
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """Entrada válida e dentro do prazo para `key`, ou None."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if not self._valid(entry):
+                del self.entries[key]
+                return None
+            entry["used"] = self.clock()
+            return entry
+
+    def store(self, key: str, params: LinearEMAParams, *, polling_hz: Optional[int] = None) -> None:
+        now = self.clock()
+        with self._lock:
+            self.entries[key] = {
+                "created": now,
+                "used": now,
+                "params": {name: getattr(params, name) for name in CACHED_FIELDS},
+                "polling_hz": polling_hz,
+            }
+            self._evict()
+
+    def set_polling(self, key: str, polling_hz: int) -> None:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry["polling_hz"] = polling_hz
+
+    def invalidate(self, key: str) -> bool:
+        with self._lock:
+            return self.entries.pop(key, None) is not None
+
+    def _valid(self, entry) -> bool:
+        if not isinstance(entry, dict):
+            return False
+        params = entry.get("params")
+        if not isinstance(params, dict) or any(not isinstance(params.get(name), (int, float)) for name in CACHED_FIELDS):
+            return False
+        created = entry.get("created")
+        return isinstance(created, (int, float)) and self.clock() - created <= self.max_age
+
+    def _evict(self) -> None:
+        entries = self.entries
+        for key in [key for key, entry in entries.items() if not self._valid(entry)]:
+            del entries[key]
+        if len(entries) > self.max_entries:
+            by_use = sorted(entries, key=lambda key: entries[key].get("used", entries[key]["created"]))
+            for key in by_use[: len(entries) - self.max_entries]:
+                del entries[key]
+
+
+class PollingRateCheck:
+    """
+    Mede a taxa de polling a partir do `MotionTap` depois que o hook está ativo.
+
+    Considera só intervalos entre eventos com movimento (o mouse não reporta
+    parado). Com `expected_hz`, invalida a entrada se a taxa mudou; sem ele,
+    grava a taxa medida na entrada recém-criada. Se o engine não tinha um tap,
+    instala um temporário e o remove ao terminar.
+    """
+
+    def __init__(
+        self,
+        engine,
+        cache: CalibrationCache,
+        key: str,
+        expected_hz: Optional[int],
+        *,
+        samples: int = 512,
+        timeout_sec: float = 300.0,
+        poll_interval_sec: float = 0.5,
+    ):
+        self.engine = engine
+        self.cache = cache
+        self.key = key
+        self.expected_hz = expected_hz
+        self.samples = samples
+        self.timeout = timeout_sec
+        self.poll_interval = poll_interval_sec
+        self.measured_hz: Optional[int] = None
+        self._own_tap = False
+        self._intervals: list[float] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def collect(self, samples) -> None:
+        """Acumula os intervalos entre amostras consecutivas com movimento."""
+        previous = None
+        for raw_dx, raw_dy, _, _, t in samples:
+            if raw_dx or raw_dy:
+                if previous is not None and 0.0 < t - previous < 0.02:
+                    self._intervals.append(t - previous)
+                previous = t
+            else:
+                previous = None
+
+    def finish(self) -> Optional[int]:
+        """Conclui a verificação com os intervalos coletados. Retorna a taxa nominal medida."""
+        if len(self._intervals) < self.samples:
+            return None
+        self.measured_hz = nominal_polling_hz(1.0 / statistics.median(self._intervals))
+        if self.expected_hz is None:
+            self.cache.set_polling(self.key, self.measured_hz)
+            self.cache.save()
+        elif self.measured_hz != self.expected_hz:
+            self.cache.invalidate(self.key)
+            self.cache.save()
+            print(
+                f"[Calibração] Taxa de polling mudou ({self.measured_hz} Hz; calibrado a {self.expected_hz} Hz). "
+                "A calibração será refeita na próxima inicialização."
+            )
+        return self.measured_hz
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if self.engine.motion_tap is None:
+            self.engine.motion_tap = MotionTap(4096)
+            self._own_tap = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="polling-check", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        tap = self.engine.motion_tap
+        cursor = tap.head
+        deadline = time.monotonic() + self.timeout
+        try:
+            while not self._stop.wait(self.poll_interval) and time.monotonic() < deadline:
+                cursor, samples = tap.read_since(cursor)
+                self.collect(samples)
+                if len(self._intervals) >= self.samples:
+                    self.finish()
+                    break
+        except Exception as exc:  # noqa: BLE001
+            print(f"Erro na verificação da taxa de polling: {exc}")
+        finally:
+            if self._own_tap:
+                self.engine.motion_tap = None
+
+
+def restore_or_calibrate(engine, ema: AdaptiveEMA, cfg: dict, run_wizard: Callable[[], Optional[LinearEMAParams]], *, user32=None) -> Optional[PollingRateCheck]:
+    """
+    Aplica a calibração em cache da identidade atual ou roda `run_wizard` e a guarda.
+
+    Retorna a `PollingRateCheck` iniciada (para ser parada no encerramento), ou
+    None quando o cache está desligado ou não há o que verificar.
+    """
+    if not cfg.get("calibration_cache", True):
+        run_wizard()
+        return None
+
+    cache = CalibrationCache(
+        cfg.get("calibration_cache_path") or None,
+        max_age_sec=float(cfg.get("calibration_cache_max_age_days", 30)) * 86400.0,
+        max_entries=int(cfg.get("calibration_cache_max_entries", 16)),
+    )
+    cache.load()
+    key = cache_key(
+        str(cfg.get("calibration_profile", "default")),
+        mouse_device_ids(user32),
+        pointer_settings(user32),
+        float(cfg.get("mouse_dpi", 0)),
+    )
+    entry = cache.lookup(key)
+    if entry is not None:
+        # Entradas antigas também guardavam os alphas; só os campos calibrados são aplicados.
+        params = replace(ema.params, **{name: entry["params"][name] for name in CACHED_FIELDS})
+        engine.publish(replace(engine.params_snapshot(), ema=params))
+        age_days = (cache.clock() - entry["created"]) / 86400.0
+        print(
+            f"[Calibração] Reutilizando calibração em cache ({age_days:.1f} dias): "
+            f"v_min={params.v_min}, v_max={params.v_max}"
+        )
+        expected = entry.get("polling_hz")
+    else:
+        params = run_wizard()
+        if params is None:
+            return None
+        cache.store(key, params)
+        expected = None
+
+    try:
+        cache.save()
+    except OSError as exc:
+        print(f"[Calibração] Não foi possível gravar o cache ({exc}).")
+        return None
+    if engine.scheduler is not None:
+        # No modo agendado o tap recebe lotes coalescidos, não os eventos do mouse.
+        return None
+    check = PollingRateCheck(engine, cache, key, expected)
+    check.start()
+    return check
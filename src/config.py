@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from numbers import Real
+from pathlib import Path
+from typing import Optional
+
+from .curves import ResponseCurve, curve_from_spec
+from .filters import DEFAULT_CHAIN, STAGE_NAMES, FilterChain, OneEuroParams, PredictorParams, build_chain
+from .smoothing import LinearEMAParams
+from .supervisor import THREAD_PRIORITIES
+from .watchdog import WatchdogParams
+from .tremor import TremorParams
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "defaults.json"
+
+# Chaves aplicadas em tempo real pelo `ConfigWatcher`; as demais exigem reiniciar.
+HOT_RELOAD_KEYS = frozenset({
+    "v_min", "v_max", "alpha_min", "alpha_max",
+    "jitter_deadzone_px", "jitter_speed_max", "extra_damp_factor",
+    "response_curve", "alpha_table_step",
+    "ema_time_constant_mode", "ema_reference_rate_hz", "speed_window_ms",
+    "profiles",
+})
+
+# Chaves que um perfil de `profiles` pode redefinir (as omitidas herdam o nível principal).
+PROFILE_KEYS = frozenset({
+    "v_min", "v_max", "alpha_min", "alpha_max",
+    "jitter_deadzone_px", "jitter_speed_max", "extra_damp_factor",
+    "response_curve", "ema_time_constant_mode", "ema_reference_rate_hz", "speed_window_ms",
+})
+
+
+# Campos dos estágios da cadeia e do watchdog que dividem ou definem uma frequência/tempo.
+_NONZERO_STAGE_FIELDS = frozenset({
+    "min_cutoff", "d_cutoff", "alpha", "recovery_ms",
+    "budget_us", "interval_sec", "trip_after", "error_storm", "probe_after_sec", "liveness_timeout_sec",
+})
+# Campos que são frações em (0, 1].
+_FRACTION_FIELDS = frozenset({"alpha", "overrun_ratio"})
+# Origem do `dt` dos filtros: relógio lido no callback ou carimbo do evento (`MSLLHOOKSTRUCT.time`).
+EVENT_DT_SOURCES = ("perf", "os")
+
+
+class ConfigError(ValueError):
+    """Configuração inválida; `problems` lista cada campo rejeitado."""
+
+    def __init__(self, problems: list[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+@dataclass(frozen=True)
+class ParamsSnapshot:
+    """
+    Conjunto imutável de todos os parâmetros que o pipeline do hook consome.
+
+    É publicado de uma vez (`HookEngine.publish`), então o hook sempre enxerga
+    parâmetros de uma única versão da configuração.
+    """
+    ema: LinearEMAParams
+    tremor: TremorParams
+    curve: ResponseCurve
+    alpha_table_step: float = 1.0
+
+
+def read_config(path: Optional[Path] = None) -> dict:
+    """
+    Lê o arquivo de configuração JSON.
+
+    Diferente de `__main__.load_cfg`, não encerra o processo em caso de erro:
+    as exceções (`FileNotFoundError`, `json.JSONDecodeError`) sobem para quem
+    chamou, o que permite reutilizar a função em ferramentas offline.
+    """
+    cfg_path = Path(path) if path is not None else DEFAULT_CONFIG_PATH
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ema_params_from_config(cfg: dict) -> LinearEMAParams:
+    """Monta os parâmetros do EMA adaptativo a partir do dicionário de configuração."""
+    return LinearEMAParams(
+        v_min=cfg["v_min"],
+        v_max=cfg["v_max"],
+        alpha_min=cfg["alpha_min"],
+        alpha_max=cfg["alpha_max"],
+        time_constant_mode=bool(cfg.get("ema_time_constant_mode", False)),
+        reference_rate_hz=float(cfg.get("ema_reference_rate_hz", 1000.0)),
+        speed_window_ms=float(cfg.get("speed_window_ms", 0.0)),
+    )
+
+
+def tremor_params_from_config(cfg: dict) -> TremorParams:
+    """Monta os parâmetros do TremorGuard a partir do dicionário de configuração."""
+    return TremorParams(
+        jitter_deadzone_px=cfg["jitter_deadzone_px"],
+        jitter_speed_max=cfg["jitter_speed_max"],
+        extra_damp_factor=cfg["extra_damp_factor"],
+    )
+
+
+def response_curve_from_config(cfg: dict) -> ResponseCurve:
+    """Monta a curva de resposta velocidade -> alpha (padrão: linear)."""
+    return curve_from_spec(cfg.get("response_curve"))
+
+
+def one_euro_params_from_config(cfg: dict) -> OneEuroParams:
+    """Monta os parâmetros do estágio One Euro (campos ausentes usam o padrão)."""
+    return OneEuroParams(**(cfg.get("one_euro") or {}))
+
+
+def predictor_params_from_config(cfg: dict) -> PredictorParams:
+    """Monta os parâmetros do estágio preditivo (campos ausentes usam o padrão)."""
+    return PredictorParams(**(cfg.get("predictor") or {}))
+
+
+def watchdog_params_from_config(cfg: dict) -> WatchdogParams:
+    """Monta os parâmetros do watchdog do hook (campos ausentes usam o padrão)."""
+    return WatchdogParams(**(cfg.get("watchdog") or {}))
+
+
+def filter_chain_from_config(cfg: dict, tremor, ema) -> FilterChain:
+    """Monta a cadeia de filtros de `filter_chain` sobre o TremorGuard e o EMA informados."""
+    return build_chain(
+        cfg.get("filter_chain") or DEFAULT_CHAIN,
+        tremor,
+        ema,
+        one_euro=one_euro_params_from_config(cfg),
+        predictor=predictor_params_from_config(cfg),
+        timing=bool(cfg.get("filter_chain_timing", False)),
+    )
+
+
+def validate_config(cfg: dict) -> list[str]:
+    """Verifica os parâmetros de suavização. Retorna a lista de problemas (vazia se válida)."""
+    problems: list[str] = []
+
+    def number(key: str, low: float = float("-inf"), high: float = float("inf")) -> Optional[float]:
+        value = cfg.get(key)
+        if isinstance(value, bool) or not isinstance(value, Real):
+            problems.append(f"'{key}' deve ser numérico (recebido {value!r})")
+            return None
+        if not low <= value <= high:
+            problems.append(f"'{key}'={value} fora do intervalo [{low}, {high}]")
+            return None
+        return float(value)
+
+    v_min = number("v_min", 0.0)
+    v_max = number("v_max", 0.0)
+    alpha_min = number("alpha_min", 0.0, 1.0)
+    alpha_max = number("alpha_max", 0.0, 1.0)
+    number("jitter_deadzone_px", 0.0)
+    number("jitter_speed_max", 0.0)
+    number("extra_damp_factor", 0.0, 1.0)
+    if v_min is not None and v_max is not None and v_max < v_min:
+        problems.append(f"'v_max' ({v_max}) menor que 'v_min' ({v_min})")
+    if alpha_min is not None and alpha_max is not None and alpha_max < alpha_min:
+        problems.append(f"'alpha_max' ({alpha_max}) menor que 'alpha_min' ({alpha_min})")
+    if "ema_reference_rate_hz" in cfg:
+        rate = number("ema_reference_rate_hz", 0.0)
+        if rate == 0.0:
+            problems.append("'ema_reference_rate_hz' deve ser positivo")
+    if "speed_window_ms" in cfg:
+        number("speed_window_ms", 0.0, 1000.0)
+    if "alpha_table_step" in cfg:
+        step = number("alpha_table_step", 0.0)
+        if step == 0.0:
+            problems.append("'alpha_table_step' deve ser positivo")
+    priority = cfg.get("hook_thread_priority", "highest")
+    if priority not in THREAD_PRIORITIES:
+        problems.append(f"'hook_thread_priority' deve ser um de {list(THREAD_PRIORITIES)} (recebido {priority!r})")
+    dt_source = cfg.get("event_dt_source", "perf")
+    if dt_source not in EVENT_DT_SOURCES:
+        problems.append(f"'event_dt_source' deve ser um de {list(EVENT_DT_SOURCES)} (recebido {dt_source!r})")
+    if "gil_switch_interval_ms" in cfg:
+        interval = number("gil_switch_interval_ms", 0.0, 100.0)
+        if interval == 0.0:
+            problems.append("'gil_switch_interval_ms' deve ser positivo")
+    if "mouse_dpi" in cfg:
+        number("mouse_dpi", 0.0)
+    if "calibration_cache_max_age_days" in cfg:
+        number("calibration_cache_max_age_days", 0.0)
+    if "calibration_cache_max_entries" in cfg:
+        number("calibration_cache_max_entries", 1.0)
+    try:
+        response_curve_from_config(cfg)
+    except (KeyError, TypeError, ValueError, AttributeError) as exc:
+        problems.append(f"'response_curve' inválida ({exc})")
+    chain = cfg.get("filter_chain", list(DEFAULT_CHAIN))
+    if not isinstance(chain, list) or not chain or any(name not in STAGE_NAMES for name in chain):
+        problems.append(f"'filter_chain' deve ser uma lista não vazia de {list(STAGE_NAMES)} (recebido {chain!r})")
+    for section, params_cls in (("one_euro", OneEuroParams), ("predictor", PredictorParams), ("watchdog", WatchdogParams)):
+        fields = cfg.get(section) or {}
+        if not isinstance(fields, dict):
+            problems.append(f"'{section}' deve ser um objeto (recebido {fields!r})")
+            continue
+        for key, value in fields.items():
+            if key not in params_cls.__dataclass_fields__:
+                problems.append(f"'{section}.{key}' desconhecido")
+            elif isinstance(value, bool) or not isinstance(value, Real) or value < 0:
+                problems.append(f"'{section}.{key}' deve ser numérico e não negativo (recebido {value!r})")
+            elif value == 0 and key in _NONZERO_STAGE_FIELDS:
+                problems.append(f"'{section}.{key}' deve ser positivo")
+            elif key in _FRACTION_FIELDS and value > 1.0:
+                problems.append(f"'{section}.{key}'={value} fora do intervalo (0, 1]")
+    base_problems = set(problems)
+    profiles = cfg.get("profiles") or {}
+    if not isinstance(profiles, dict):
+        problems.append(f"'profiles' deve ser um objeto (recebido {profiles!r})")
+        profiles = {}
+    for name, fields in profiles.items():
+        if name == "default" or not isinstance(fields, dict):
+            problems.append(f"'profiles.{name}' deve ser um objeto com nome diferente de 'default'")
+            continue
+        processes = fields.get("processes", [])
+        if not isinstance(processes, list) or not all(isinstance(item, str) and item for item in processes):
+            problems.append(f"'profiles.{name}.processes' deve ser uma lista de nomes de processo")
+        unknown = sorted(set(fields) - PROFILE_KEYS - {"processes"})
+        if unknown:
+            problems.append(f"'profiles.{name}' tem chaves desconhecidas: {', '.join(unknown)}")
+            continue
+        merged = {key: value for key, value in cfg.items() if key != "profiles"}
+        merged.update({key: value for key, value in fields.items() if key != "processes"})
+        # Problemas herdados do nível principal já foram listados.
+        problems.extend(
+            f"'profiles.{name}': {problem}" for problem in validate_config(merged) if problem not in base_problems
+        )
+    return problems
+
+
+def snapshot_from_config(cfg: dict) -> ParamsSnapshot:
+    """Valida `cfg` e monta um `ParamsSnapshot`. Levanta `ConfigError` se houver problemas."""
+    problems = validate_config(cfg)
+    if problems:
+        raise ConfigError(problems)
+    return ParamsSnapshot(
+        ema=ema_params_from_config(cfg),
+        tremor=tremor_params_from_config(cfg),
+        curve=response_curve_from_config(cfg),
+        alpha_table_step=float(cfg.get("alpha_table_step", 1.0)),
+    )
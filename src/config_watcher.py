@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import DEFAULT_CONFIG_PATH, HOT_RELOAD_KEYS, ConfigError, read_config, snapshot_from_config
+from .profiles import profile_snapshots
+
+
+def _profile_layout(cfg: dict) -> dict:
+    """Nomes dos perfis e seus processos: o que não pode mudar sem reiniciar."""
+    return {name: fields.get("processes") for name, fields in (cfg.get("profiles") or {}).items()}
+
+
+class ConfigWatcher:
+    """
+    Recarrega `defaults.json` em tempo real.
+
+    Uma thread em segundo plano compara o `mtime`/tamanho do arquivo a cada
+    `interval_sec`. Quando ele muda, o arquivo é relido e validado; se for
+    válido, um `ParamsSnapshot` novo é publicado no engine com uma única troca
+    de referência. Se for inválido (ou estiver pela metade durante a gravação
+    pelo editor), os parâmetros atuais são mantidos e o problema é informado;
+    a próxima gravação dispara uma nova tentativa.
+
+    Apenas as chaves de `HOT_RELOAD_KEYS` são aplicadas em tempo real; mudanças
+    nas demais (comparadas com `initial`, a configuração usada na inicialização)
+    são avisadas e passam a valer no próximo início. Com perfis, os parâmetros
+    de cada perfil são publicados nele; incluir/remover perfis ou mudar seus
+    processos exige reiniciar.
+    """
+
+    def __init__(
+        self,
+        engine,
+        path: Optional[Path] = None,
+        *,
+        interval_sec: float = 0.5,
+        initial: Optional[dict] = None,
+    ):
+        self.engine = engine
+        self.path = Path(path) if path is not None else DEFAULT_CONFIG_PATH
+        self.interval = max(interval_sec, 0.05)
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload_ms = 0.0
+        self._startup = dict(initial) if initial is not None else None
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _stat(self) -> Optional[tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def poll(self) -> bool:
+        """Verifica o arquivo uma vez. Retorna se novos parâmetros foram publicados."""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        return self.reload()
+
+    def reload(self) -> bool:
+        """Relê, valida e publica a configuração. Retorna se foi aplicada."""
+        started = time.perf_counter()
+        try:
+            cfg = read_config(self.path)
+            snapshot = snapshot_from_config(cfg)
+        except ConfigError as exc:
+            self.failures += 1
+            print("[Config] Configuração inválida, mantendo os parâmetros atuais:")
+            for problem in exc.problems:
+                print(f"[Config]   - {problem}")
+            return False
+        except (OSError, json.JSONDecodeError) as exc:
+            self.failures += 1
+            print(f"[Config] Falha ao ler '{self.path.name}', mantendo os parâmetros atuais ({exc}).")
+            return False
+
+        if self.engine.profiles:
+            self.engine.publish_profiles(profile_snapshots(cfg))
+        else:
+            self.engine.publish(snapshot)
+        self.last_reload_ms = (time.perf_counter() - started) * 1000.0
+        self.reloads += 1
+
+        ema, tremor = snapshot.ema, snapshot.tremor
+        print(
+            f"[Config] Recarregada em {self.last_reload_ms:.2f} ms (#{self.reloads}): "
+            f"v_min={ema.v_min}, v_max={ema.v_max}, alpha_min={ema.alpha_min}, alpha_max={ema.alpha_max}, "
+            f"deadzone={tremor.jitter_deadzone_px}, curva={snapshot.curve.kind}"
+        )
+        if self._startup is not None:
+            cold = sorted(
+                key for key in set(cfg) | set(self._startup)
+                if key not in HOT_RELOAD_KEYS and cfg.get(key) != self._startup.get(key)
+            )
+            if cold:
+                print(f"[Config] Alterações em {', '.join(cold)} só valem após reiniciar.")
+            if _profile_layout(cfg) != _profile_layout(self._startup):
+                print("[Config] Perfis incluídos/removidos ou processos alterados só valem após reiniciar.")
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as exc:  # noqa: BLE001
+                print(f"Erro ao recarregar a configuração: {exc}")
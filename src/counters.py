@@ -0,0 +1,18 @@
+"""
+Índices de `HookEngine.counters`.
+
+Ficam aqui, e não na telemetria, porque o hook e o watchdog os usam antes de o
+hook ser instalado: importar `telemetry` nesse caminho traria mmap, tempfile e
+companhia para a inicialização.
+"""
+
+COUNTER_EVENTS = 0
+COUNTER_INJECTED = 1
+COUNTER_PASSTHROUGH = 2
+COUNTER_ERRORS = 3
+COUNTER_OVERRUNS = 4  # callbacks acima do orçamento
+# Escritos pelo `HookWatchdog`, não pelo hook.
+COUNTER_WATCHDOG_TRIPS = 5
+COUNTER_WATCHDOG_RECOVERIES = 6
+COUNTER_HOOK_REINSTALLS = 7
+COUNTER_COUNT = 8
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from typing import Optional, Sequence
+
+from .smoothing import LinearEMAParams
+
+
+class ResponseCurve:
+    """
+    Curva de resposta velocidade -> alpha. A base é a reta de `LinearEMAParams`.
+
+    As curvas são avaliadas em conjunto com os parâmetros vigentes, então a mesma
+    curva continua válida quando a calibração altera `v_min`/`v_max`.
+    """
+    kind = "linear"
+    # Se a forma depende de `v_min`/`v_max` (a calibração só tem efeito nesse caso).
+    uses_speed_range = True
+
+    def alpha(self, v: float, params: LinearEMAParams) -> float:
+        return params.alpha_for_speed(v)
+
+    def alpha_batch(self, v, params: LinearEMAParams):
+        return params.alpha_for_speed_batch(v)
+
+    def saturation_speed(self, params: LinearEMAParams) -> float:
+        """Velocidade a partir da qual a curva é (praticamente) constante."""
+        return max(params.v_max, 0.0)
+
+
+class PiecewiseLinearCurve(ResponseCurve):
+    """Interpolação linear entre pontos (v, alpha); constante fora do intervalo."""
+    kind = "piecewise"
+    uses_speed_range = False
+
+    def __init__(self, points: Sequence[Sequence[float]]):
+        ordered = sorted((float(v), float(a)) for v, a in points)
+        if len(ordered) < 2:
+            raise ValueError("A curva precisa de pelo menos dois pontos.")
+        if any(b[0] <= a[0] for a, b in zip(ordered, ordered[1:])):
+            raise ValueError("As velocidades dos pontos da curva devem ser distintas.")
+        if any(not 0.0 < a <= 1.0 for _, a in ordered):
+            raise ValueError("Os valores de alpha da curva devem estar em (0, 1].")
+        self.xs = [v for v, _ in ordered]
+        self.ys = [a for _, a in ordered]
+
+    def _segment(self, v: float) -> int:
+        return min(max(bisect_right(self.xs, v) - 1, 0), len(self.xs) - 2)
+
+    def alpha(self, v: float, params: LinearEMAParams) -> float:
+        xs, ys = self.xs, self.ys
+        if v <= xs[0]:
+            return ys[0]
+        if v >= xs[-1]:
+            return ys[-1]
+        k = self._segment(v)
+        t = (v - xs[k]) / (xs[k + 1] - xs[k])
+        return ys[k] + t * (ys[k + 1] - ys[k])
+
+    def alpha_batch(self, v, params: LinearEMAParams):
+        import numpy as np
+
+        return np.interp(np.asarray(v, dtype=np.float64), self.xs, self.ys)
+
+    def saturation_speed(self, params: LinearEMAParams) -> float:
+        return self.xs[-1]
+
+
+class SplineCurve(PiecewiseLinearCurve):
+    """
+    Spline cúbica monotônica (Fritsch-Carlson) pelos pontos: suave como uma
+    spline, mas sem ultrapassar os valores dos pontos vizinhos.
+    """
+    kind = "spline"
+
+    def __init__(self, points: Sequence[Sequence[float]]):
+        super().__init__(points)
+        xs, ys = self.xs, self.ys
+        slopes = [(ys[i + 1] - ys[i]) / (xs[i + 1] - xs[i]) for i in range(len(xs) - 1)]
+        tangents = [slopes[0]] + [
+            0.0 if s0 * s1 <= 0 else (s0 + s1) / 2.0 for s0, s1 in zip(slopes, slopes[1:])
+        ] + [slopes[-1]]
+        for i, s in enumerate(slopes):
+            if s == 0.0:
+                tangents[i] = tangents[i + 1] = 0.0
+                continue
+            a, b = tangents[i] / s, tangents[i + 1] / s
+            norm = a * a + b * b
+            if norm > 9.0:
+                scale = 3.0 / math.sqrt(norm)
+                tangents[i], tangents[i + 1] = scale * a * s, scale * b * s
+        self.tangents = tangents
+
+    def alpha(self, v: float, params: LinearEMAParams) -> float:
+        xs, ys, ms = self.xs, self.ys, self.tangents
+        if v <= xs[0]:
+            return ys[0]
+        if v >= xs[-1]:
+            return ys[-1]
+        k = self._segment(v)
+        h = xs[k + 1] - xs[k]
+        t = (v - xs[k]) / h
+        t2, t3 = t * t, t * t * t
+        return ((2 * t3 - 3 * t2 + 1) * ys[k] + (t3 - 2 * t2 + t) * h * ms[k]
+                + (-2 * t3 + 3 * t2) * ys[k + 1] + (t3 - t2) * h * ms[k + 1])
+
+    def alpha_batch(self, v, params: LinearEMAParams):
+        import numpy as np
+
+        xs, ys, ms = (np.asarray(a, dtype=np.float64) for a in (self.xs, self.ys, self.tangents))
+        v = np.clip(np.asarray(v, dtype=np.float64), xs[0], xs[-1])
+        k = np.clip(np.searchsorted(xs, v, side="right") - 1, 0, len(xs) - 2)
+        h = xs[k + 1] - xs[k]
+        t = (v - xs[k]) / h
+        t2, t3 = t * t, t * t * t
+        return ((2 * t3 - 3 * t2 + 1) * ys[k] + (t3 - 2 * t2 + t) * h * ms[k]
+                + (-2 * t3 + 3 * t2) * ys[k + 1] + (t3 - t2) * h * ms[k + 1])
+
+
+class SigmoidCurve(ResponseCurve):
+    """
+    Sigmoide logística entre `alpha_min` e `alpha_max`. Por padrão, o ponto médio
+    fica no centro de [v_min, v_max] e a largura é 1/8 desse intervalo.
+    """
+    kind = "sigmoid"
+
+    def __init__(self, midpoint: Optional[float] = None, width: Optional[float] = None):
+        if width is not None and width <= 0:
+            raise ValueError("A largura da sigmoide deve ser positiva.")
+        self.midpoint = midpoint
+        self.width = width
+
+    @property
+    def uses_speed_range(self) -> bool:
+        return self.midpoint is None or self.width is None
+
+    def _shape(self, params: LinearEMAParams) -> tuple[float, float]:
+        midpoint = self.midpoint if self.midpoint is not None else (params.v_min + params.v_max) / 2.0
+        width = self.width if self.width is not None else max((params.v_max - params.v_min) / 8.0, 1e-6)
+        return midpoint, width
+
+    def alpha(self, v: float, params: LinearEMAParams) -> float:
+        midpoint, width = self._shape(params)
+        z = max(-60.0, min(60.0, (v - midpoint) / width))
+        return params.alpha_min + (params.alpha_max - params.alpha_min) / (1.0 + math.exp(-z))
+
+    def alpha_batch(self, v, params: LinearEMAParams):
+        import numpy as np
+
+        midpoint, width = self._shape(params)
+        z = np.clip((np.asarray(v, dtype=np.float64) - midpoint) / width, -60.0, 60.0)
+        return params.alpha_min + (params.alpha_max - params.alpha_min) / (1.0 + np.exp(-z))
+
+    def saturation_speed(self, params: LinearEMAParams) -> float:
+        midpoint, width = self._shape(params)
+        return max(midpoint + 12.0 * width, 0.0)
+
+
+def curve_from_spec(spec: Optional[dict]) -> ResponseCurve:
+    """
+    Constrói uma curva a partir da seção `response_curve` da configuração.
+
+    Exemplos:
+        {"type": "linear"}
+        {"type": "piecewise", "points": [[0, 0.05], [300, 0.2], [1200, 0.85]]}
+        {"type": "spline", "points": [[0, 0.05], [300, 0.2], [1200, 0.85]]}
+        {"type": "sigmoid", "midpoint": 600, "width": 150}
+    """
+    if not spec:
+        return ResponseCurve()
+    kind = spec.get("type", "linear")
+    if kind == "linear":
+        return ResponseCurve()
+    if kind == "piecewise":
+        return PiecewiseLinearCurve(spec["points"])
+    if kind == "spline":
+        return SplineCurve(spec["points"])
+    if kind == "sigmoid":
+        return SigmoidCurve(spec.get("midpoint"), spec.get("width"))
+    raise ValueError(f"Tipo de curva de resposta desconhecido: '{kind}'.")
+
+
+class AlphaTable:
+    """
+    Tabela quantizada velocidade -> alpha final, com o ganho do TremorGuard embutido.
+
+    O balde `i` cobre as velocidades [i*step, (i+1)*step) e guarda a curva avaliada
+    no centro do balde; acima do último balde a curva é constante. A consulta é
+    uma multiplicação e um índice, qualquer que seja o formato da curva.
+    """
+    __slots__ = ("values", "step", "inv_step", "last", "alpha_at_rest")
+
+    def __init__(self, values: list[float], step: float, alpha_at_rest: float):
+        self.values = values
+        self.step = step
+        self.inv_step = 1.0 / step
+        self.last = len(values) - 1
+        self.alpha_at_rest = alpha_at_rest
+
+    def lookup(self, speed: float) -> float:
+        index = int(speed * self.inv_step)
+        return self.values[index if index < self.last else self.last]
+
+
+def build_alpha_table(
+    curve: ResponseCurve,
+    params: LinearEMAParams,
+    *,
+    step: float = 1.0,
+    damp_gain: float = 1.0,
+    damp_below: float = 50.0,
+    max_entries: int = 65536,
+) -> AlphaTable:
+    """
+    Pré-calcula a tabela de alpha para `curve` com os `params` atuais.
+
+    `damp_gain` é o ganho extra do TremorGuard, aplicado aos baldes abaixo de
+    `damp_below` (exato quando `damp_below` é múltiplo de `step`).
+    `alpha_at_rest` guarda o alpha sem ganho em velocidade zero, usado quando a
+    deadzone zera o movimento e o ganho depende da velocidade bruta.
+    """
+    step = max(step, 1e-6)
+    limit = max(curve.saturation_speed(params), damp_below) + step
+    count = int(math.ceil(limit / step)) + 1
+    if count > max_entries:
+        count = max_entries
+        step = limit / (count - 1)
+    values = []
+    for i in range(count):
+        alpha = curve.alpha((i + 0.5) * step, params)
+        if i * step < damp_below:
+            alpha *= damp_gain
+        values.append(alpha)
+    return AlphaTable(values, step, curve.alpha(0.0, params))
@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from math import hypot
+from typing import Optional, Protocol, Sequence
+
+from .profiler import LatencyHistogram, format_summary
+from .smoothing import AdaptiveEMA, _linear_recurrence
+from .tremor import TremorGuard
+
+STAGE_NAMES = ("tremor", "ema", "one_euro", "predict")
+DEFAULT_CHAIN = ("tremor", "ema")
+# Sem eventos por este tempo, o mouse é considerado parado e a dianteira do
+# estágio preditivo é devolvida (`FilterChain.settle`).
+SETTLE_IDLE_SEC = 0.02
+
+
+class FilterStage(Protocol):
+    """
+    Protocolo de um estágio da cadeia de filtros.
+
+    `process` recebe o delta (dx, dy), o intervalo `dt` (> 0) e o `gain` acumulado
+    pelos estágios anteriores, e devolve o novo (dx, dy, gain). Estágios que
+    consomem o ganho (suavizadores) devolvem 1.0. `reset` descarta o estado.
+    """
+    name: str
+
+    def process(self, dx: float, dy: float, dt: float, gain: float) -> tuple[float, float, float]: ...
+
+    def reset(self) -> None: ...
+
+
+class TremorStage:
+    """Deadzone e amortecimento extra do `TremorGuard` (sem estado)."""
+    name = "tremor"
+
+    def __init__(self, guard: TremorGuard):
+        self.guard = guard
+
+    def process(self, dx: float, dy: float, dt: float, gain: float) -> tuple[float, float, float]:
+        pdx, pdy, extra = self.guard.preprocess(dx, dy, dt)
+        return pdx, pdy, gain * extra
+
+    def process_batch(self, dx, dy, dt, gain):
+        pdx, pdy, extra = self.guard.preprocess_batch(dx, dy, dt)
+        return pdx, pdy, gain * extra
+
+    def reset(self) -> None:
+        pass
+
+
+class EMAStage:
+    """`AdaptiveEMA` com alpha pela curva de resposta, multiplicado pelo ganho recebido."""
+    name = "ema"
+
+    def __init__(self, ema: AdaptiveEMA):
+        self.ema = ema
+
+    def process(self, dx: float, dy: float, dt: float, gain: float) -> tuple[float, float, float]:
+        sdx, sdy = self.ema.update(dx, dy, dt, gain)
+        return sdx, sdy, 1.0
+
+    def process_batch(self, dx, dy, dt, gain):
+        import numpy as np
+
+        sdx, sdy = self.ema.update_batch(dx, dy, dt, gain)
+        return sdx, sdy, np.ones(len(sdx))
+
+    def reset(self) -> None:
+        self.ema.reset()
+
+
+@dataclass(frozen=True)
+class OneEuroParams:
+    """
+    Parâmetros do filtro One Euro (Casiez et al., 2012).
+
+    `min_cutoff` (Hz) é o corte em repouso; `beta` ((Hz) por px/s) aumenta o
+    corte com a velocidade filtrada; `d_cutoff` (Hz) suaviza a estimativa de
+    velocidade.
+    """
+    min_cutoff: float = 8.0
+    beta: float = 0.5
+    d_cutoff: float = 10.0
+
+
+def _smoothing_factor(dt: float, cutoff: float) -> float:
+    return 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff * dt))
+
+
+class OneEuroStage:
+    """
+    Filtro One Euro aplicado à posição acumulada, emitindo deltas.
+
+    O corte cresce com a velocidade bruta filtrada (|v| suavizada a `d_cutoff`),
+    então movimentos lentos são fortemente suavizados e flicks passam com pouco
+    atraso. O estado é o resíduo (posição bruta - posição filtrada) por eixo:
+    nenhum deslocamento se perde, ele apenas é entregue mais tarde. A saída é
+    quantizada em pixels inteiros com a fração guardada para o próximo evento;
+    sem isso, movimentos lentos (saída < 0.5 px por evento) seriam descartados
+    pelo arredondamento da injeção. O `gain` recebido (ex.: amortecimento do
+    TremorGuard) multiplica o fator de suavização.
+    """
+    name = "one_euro"
+
+    def __init__(self, params: OneEuroParams):
+        self.params = params
+        self.reset()
+
+    def reset(self) -> None:
+        self._rx = self._ry = 0.0
+        self._vx = self._vy = 0.0
+        self._cx = self._cy = 0.0
+        self._initialized = False
+
+    def process(self, dx: float, dy: float, dt: float, gain: float) -> tuple[float, float, float]:
+        if not self._initialized:
+            # Primeiro evento: sem histórico, passa direto (como o AdaptiveEMA).
+            self._initialized = True
+            return dx, dy, 1.0
+        p = self.params
+        ad = _smoothing_factor(dt, p.d_cutoff)
+        self._vx += ad * (dx / dt - self._vx)
+        self._vy += ad * (dy / dt - self._vy)
+        a = _smoothing_factor(dt, p.min_cutoff + p.beta * hypot(self._vx, self._vy)) * gain
+        rx = self._rx + dx
+        ry = self._ry + dy
+        fx = a * rx
+        fy = a * ry
+        self._rx = rx - fx
+        self._ry = ry - fy
+        fx += self._cx
+        fy += self._cy
+        ox = float(round(fx))
+        oy = float(round(fy))
+        self._cx = fx - ox
+        self._cy = fy - oy
+        return ox, oy, 1.0
+
+    def process_batch(self, dx, dy, dt, gain):
+        """
+        Versão vetorizada: a velocidade filtrada e o resíduo são recorrências
+        lineares, resolvidas com o mesmo prefix-scan do `AdaptiveEMA.update_batch`.
+        """
+        import numpy as np
+
+        dx = np.asarray(dx, dtype=np.float64)
+        dy = np.asarray(dy, dtype=np.float64)
+        dt = np.asarray(dt, dtype=np.float64)
+        n = len(dx)
+        if n == 0:
+            return np.empty(0), np.empty(0), np.empty(0)
+        p = self.params
+        ad = 1.0 / (1.0 + 1.0 / (2.0 * np.pi * p.d_cutoff * dt))
+        decay = (1.0 - ad)[:, None]
+        drive = ad[:, None] * np.column_stack((dx / dt, dy / dt))
+        first_free = not self._initialized
+        if first_free:
+            decay[0] = 0.0
+            drive[0] = 0.0
+        velocity = _linear_recurrence(np, decay, drive, np.array([self._vx, self._vy]))
+
+        cutoff = p.min_cutoff + p.beta * np.hypot(velocity[:, 0], velocity[:, 1])
+        a = np.asarray(gain, dtype=np.float64) / (1.0 + 1.0 / (2.0 * np.pi * cutoff * dt))
+        keep = (1.0 - a)[:, None]
+        deltas = np.column_stack((dx, dy))
+        if first_free:
+            keep[0] = 0.0
+        r0 = np.array([self._rx, self._ry])
+        residual = _linear_recurrence(np, keep, keep * deltas, r0)
+        previous = np.vstack((r0, residual[:-1]))
+        # Quantização com transporte da fração: a saída inteira acumulada é o
+        # arredondamento da saída contínua acumulada (mais a fração pendente).
+        continuous = np.cumsum(deltas + previous - residual, axis=0) + np.array([self._cx, self._cy])
+        emitted = np.rint(continuous)
+        out = np.diff(emitted, axis=0, prepend=np.zeros((1, 2)))
+        self._cx, self._cy = float(continuous[-1, 0] - emitted[-1, 0]), float(continuous[-1, 1] - emitted[-1, 1])
+
+        self._vx, self._vy = float(velocity[-1, 0]), float(velocity[-1, 1])
+        self._rx, self._ry = float(residual[-1, 0]), float(residual[-1, 1])
+        self._initialized = True
+        return out[:, 0], out[:, 1], np.ones(n)
+
+
+@dataclass(frozen=True)
+class PredictorParams:
+    """
+    Parâmetros do estágio preditivo (filtro alpha-beta de velocidade constante).
+
+    `horizon_ms` é quanto a saída é projetada à frente; `alpha`/`beta` são os
+    ganhos de posição/velocidade do rastreador; após uma inversão de direção a
+    projeção é zerada e volta ao horizonte completo em ~`recovery_ms`;
+    `max_lead_px` limita a projeção.
+    """
+    horizon_ms: float = 8.0
+    alpha: float = 0.5
+    beta: float = 0.05
+    recovery_ms: float = 40.0
+    max_lead_px: float = 25.0
+
+
+class PredictorStage:
+    """
+    Compensa o atraso de fase dos suavizadores projetando a saída à frente.
+
+    Um filtro alpha-beta acompanha a posição acumulada da saída suavizada e
+    estima sua velocidade; a saída é a posição suavizada mais `velocidade *
+    horizonte` (a "dianteira"), emitida como a diferença entre a dianteira atual
+    e a anterior. Um mouse parado não gera eventos, então a dianteira não se
+    desfaz sozinha: quem chama o estágio invoca `settle` depois de
+    `SETTLE_IDLE_SEC` sem eventos (o timer da thread do hook, o agendador de
+    saída ou, no replay, `process_batch`), e o delta devolvido leva o cursor de
+    volta à posição suavizada. Assim o deslocamento total não muda e a sobra
+    no fim de um flick dura só até o mouse parar. Quando o movimento inverte de
+    direção contra a velocidade estimada, a confiança cai a zero para não
+    ultrapassar o alvo e se recupera com `recovery_ms`. Como o One Euro, entrega
+    pixels inteiros e guarda a fração para o próximo evento.
+
+    `latency_removed_ms` é a dianteira realmente aplicada, convertida em tempo
+    (horizonte x confiança, reduzido na mesma proporção quando `max_lead_px`
+    corta a projeção), em média nos eventos com movimento: o atraso que o
+    estágio compensa em média.
+    """
+    name = "predict"
+
+    def __init__(self, params: PredictorParams):
+        self.params = params
+        self.reset()
+
+    def reset(self) -> None:
+        # Erro da estimativa em relação à posição suavizada (estimativa - posição).
+        self._ex = self._ey = 0.0
+        self._vx = self._vy = 0.0
+        self._lx = self._ly = 0.0
+        self._cx = self._cy = 0.0
+        self._confidence = 1.0
+        self.reversals = 0
+        self._moving = 0
+        self._lead_ms_sum = 0.0
+
+    @property
+    def latency_removed_ms(self) -> float:
+        return self._lead_ms_sum / self._moving if self._moving else 0.0
+
+    def process(self, dx: float, dy: float, dt: float, gain: float) -> tuple[float, float, float]:
+        p = self.params
+        vx, vy = self._vx, self._vy
+        # Rastreador alpha-beta: prevê com a velocidade atual, corrige pelo resíduo.
+        ex = self._ex + vx * dt - dx
+        ey = self._ey + vy * dt - dy
+        vx -= p.beta * ex / dt
+        vy -= p.beta * ey / dt
+        self._ex = (1.0 - p.alpha) * ex
+        self._ey = (1.0 - p.alpha) * ey
+        self._vx, self._vy = vx, vy
+
+        confidence = self._confidence
+        # Inversão: a velocidade do evento aponta contra a estimada com pelo
+        # menos 1/4 da magnitude dela (ignora o ruído de sub-pixel).
+        if (dx * vx + dy * vy) / dt < -0.25 * (vx * vx + vy * vy):
+            confidence = 0.0
+            self.reversals += 1
+        else:
+            confidence += (1.0 - confidence) * min(dt * 1000.0 / p.recovery_ms, 1.0)
+        self._confidence = confidence
+
+        horizon = p.horizon_ms * 1e-3 * confidence
+        lx = vx * horizon
+        ly = vy * horizon
+        lead_ms = p.horizon_ms * confidence
+        lead = hypot(lx, ly)
+        if lead > p.max_lead_px:
+            scale = p.max_lead_px / lead
+            lx *= scale
+            ly *= scale
+            lead_ms *= scale
+        if dx or dy:
+            self._moving += 1
+            self._lead_ms_sum += lead_ms
+
+        fx = dx + lx - self._lx + self._cx
+        fy = dy + ly - self._ly + self._cy
+        self._lx, self._ly = lx, ly
+        ox = float(round(fx))
+        oy = float(round(fy))
+        self._cx = fx - ox
+        self._cy = fy - oy
+        return ox, oy, gain
+
+    def settle(self) -> tuple[float, float]:
+        """
+        O mouse parou: devolve a dianteira e zera a velocidade estimada.
+
+        Retorna o delta (inteiro) a injetar; a fração fica guardada como nos eventos.
+        """
+        fx = self._cx - self._lx
+        fy = self._cy - self._ly
+        self._lx = self._ly = 0.0
+        self._ex = self._ey = 0.0
+        self._vx = self._vy = 0.0
+        ox = float(round(fx))
+        oy = float(round(fy))
+        self._cx = fx - ox
+        self._cy = fy - oy
+        return ox, oy
+
+    def process_batch(self, dx, dy, dt, gain):
+        """
+        Laço escalar sobre os arrays: a confiança torna a recorrência não linear.
+
+        Reproduz o `settle` do hook: antes de um evento que chega depois de
+        `SETTLE_IDLE_SEC` parado, e ao fim do traço, a dianteira devolvida é
+        somada à saída do evento anterior.
+        """
+        import numpy as np
+
+        n = len(dt)
+        ox, oy = np.empty(n), np.empty(n)
+        process, settle = self.process, self.settle
+        for i, (sdx, sdy, step) in enumerate(zip(np.asarray(dx).tolist(), np.asarray(dy).tolist(), np.asarray(dt).tolist())):
+            if i and step > SETTLE_IDLE_SEC:
+                rx, ry = settle()
+                ox[i - 1] += rx
+                oy[i - 1] += ry
+            ox[i], oy[i], _ = process(sdx, sdy, step, 1.0)
+        if n:
+            rx, ry = settle()
+            ox[n - 1] += rx
+            oy[n - 1] += ry
+        return ox, oy, gain
+
+    def report(self) -> None:
+        p = self.params
+        print(
+            f"[Cadeia] {self.name}: ~{self.latency_removed_ms:.1f} ms de atraso compensado em média "
+            f"(horizonte {p.horizon_ms:.1f} ms, {self.reversals} inversões)"
+        )
+
+
+class FilterChain:
+    """
+    Sequência de estágios aplicada a cada delta.
+
+    Com `timing`, cada estágio registra seu custo em um `LatencyHistogram`
+    próprio (`stage_timings`), para identificar qual estágio consome o orçamento.
+    """
+
+    def __init__(self, stages: Sequence[FilterStage], *, timing: bool = False):
+        if not stages:
+            raise ValueError("A cadeia de filtros precisa de pelo menos um estágio.")
+        self.stages = tuple(stages)
+        self.timing = timing
+        self.stage_timings = {stage.name: LatencyHistogram() for stage in self.stages} if timing else {}
+        self.process = self._process_timed if timing else self._process
+        # Se `report` imprime algo (medição por estágio ou estágios com relatório próprio).
+        self.reports = timing or any(hasattr(stage, "report") for stage in self.stages)
+        # Estágios que precisam de `settle` quando os eventos param (ex.: `predict`).
+        self._settling = tuple(stage for stage in self.stages if hasattr(stage, "settle"))
+        self.settles = bool(self._settling)
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return tuple(stage.name for stage in self.stages)
+
+    def fusable(self, tremor: TremorGuard, ema: AdaptiveEMA) -> bool:
+        """Se a cadeia equivale ao pipeline fundido TremorGuard + AdaptiveEMA do hook."""
+        if self.timing or len(self.stages) != 2:
+            return False
+        first, second = self.stages
+        return (
+            isinstance(first, TremorStage) and first.guard is tremor
+            and isinstance(second, EMAStage) and second.ema is ema
+        )
+
+    def _process(self, dx: float, dy: float, dt: float) -> tuple[float, float]:
+        gain = 1.0
+        for stage in self.stages:
+            dx, dy, gain = stage.process(dx, dy, dt, gain)
+        return dx, dy
+
+    def _process_timed(self, dx: float, dy: float, dt: float) -> tuple[float, float]:
+        gain = 1.0
+        perf_ns = time.perf_counter_ns
+        timings = self.stage_timings
+        for stage in self.stages:
+            start = perf_ns()
+            dx, dy, gain = stage.process(dx, dy, dt, gain)
+            timings[stage.name].record((perf_ns() - start) / 1000.0)
+        return dx, dy
+
+    def process_batch(self, dx, dy, dt):
+        """Aplica a cadeia a arrays inteiros (todos os estágios precisam de `process_batch`)."""
+        import numpy as np
+
+        gain = np.ones(len(dt))
+        for stage in self.stages:
+            dx, dy, gain = stage.process_batch(dx, dy, dt, gain)
+        return dx, dy
+
+    def settle(self) -> tuple[float, float]:
+        """
+        Delta a injetar quando os eventos param (a dianteira devolvida pelos
+        estágios preditivos, que ficam no fim da cadeia). (0, 0) se não há nada.
+        """
+        dx = dy = 0.0
+        for stage in self._settling:
+            sx, sy = stage.settle()
+            dx += sx
+            dy += sy
+        return dx, dy
+
+    def reset(self) -> None:
+        for stage in self.stages:
+            stage.reset()
+
+    def report(self) -> None:
+        """Imprime o custo acumulado de cada estágio (com `timing`) e os relatórios dos estágios."""
+        for name, histogram in self.stage_timings.items():
+            if histogram.count:
+                print(f"[Cadeia] {name}: {format_summary(histogram.summary())}")
+        for stage in self.stages:
+            report = getattr(stage, "report", None)
+            if report is not None:
+                report()
+
+
+def build_chain(
+    names: Sequence[str],
+    tremor: TremorGuard,
+    ema: AdaptiveEMA,
+    *,
+    one_euro: Optional[OneEuroParams] = None,
+    predictor: Optional[PredictorParams] = None,
+    timing: bool = False,
+) -> FilterChain:
+    """Monta a cadeia pelos nomes de `STAGE_NAMES`, reutilizando os filtros existentes."""
+    stages: list[FilterStage] = []
+    for name in names:
+        if name == "tremor":
+            stages.append(TremorStage(tremor))
+        elif name == "ema":
+            stages.append(EMAStage(ema))
+        elif name == "one_euro":
+            stages.append(OneEuroStage(one_euro or OneEuroParams()))
+        elif name == "predict":
+            stages.append(PredictorStage(predictor or PredictorParams()))
+        else:
+            raise ValueError(f"Estágio de filtro desconhecido: '{name}'.")
+    return FilterChain(stages, timing=timing)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import fnmatch
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+
+def compile_blacklist(patterns: Iterable[str]) -> Callable[[str], bool]:
+    """
+    Compila os itens da blacklist em um único matcher (sem diferenciar maiúsculas).
+
+    Itens comuns são globs (`valorant.exe`, `*-win64-shipping.exe`); itens com o
+    prefixo `re:` são expressões regulares. Em ambos os casos o nome inteiro do
+    executável precisa casar.
+    """
+    alternatives = []
+    for pattern in patterns:
+        if not pattern:
+            continue
+        if pattern.startswith("re:"):
+            alternatives.append(f"(?:{pattern[3:]})")
+        else:
+            alternatives.append(f"(?:{fnmatch.translate(pattern)})")
+    if not alternatives:
+        return lambda name: False
+    fullmatch = re.compile("|".join(alternatives), re.IGNORECASE).fullmatch
+    return lambda name: fullmatch(name) is not None
+
+
+class ProcessNameCache:
+    """
+    Cache LRU limitado de pid -> (hora de criação, nome do executável).
+
+    Cada consulta confere a hora de criação do processo (`create_time`, mais
+    barata que `name`): um pid reciclado por outro processo não casa com a
+    entrada e o nome é lido de novo. Entradas de processos que terminaram são
+    descartadas quando a consulta falha (`NoSuchProcess`) e na poda periódica
+    (`prune`, com o barato `psutil.pid_exists`), que só limita o tamanho do cache.
+    """
+
+    def __init__(self, psutil_mod, *, capacity: int = 128):
+        self._psutil = psutil_mod
+        self.capacity = max(capacity, 1)
+        self._names: OrderedDict[int, tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def name(self, pid: int) -> Optional[str]:
+        """Nome (minúsculo) do processo, ou None se ele já terminou."""
+        names = self._names
+        try:
+            process = self._psutil.Process(pid)
+            created = process.create_time()
+            entry = names.get(pid)
+            if entry is not None and entry[0] == created:
+                names.move_to_end(pid)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            name = process.name().lower()
+        except self._psutil.NoSuchProcess:
+            names.pop(pid, None)
+            return None
+        names[pid] = (created, name)
+        names.move_to_end(pid)
+        if len(names) > self.capacity:
+            names.popitem(last=False)
+            self.evictions += 1
+        return name
+
+    def prune(self) -> int:
+        """Remove os pids que não existem mais. Retorna quantos foram removidos."""
+        pid_exists = self._psutil.pid_exists
+        dead = [pid for pid in self._names if not pid_exists(pid)]
+        for pid in dead:
+            del self._names[pid]
+        self.evictions += len(dead)
+        return len(dead)
+
+
+class ForegroundWatcher:
+    """
+    Observa a janela em foco e pausa/resume a suavização conforme a blacklist.
+
+    Com `on_process`, cada troca de processo em foco também é repassada (ex.:
+    `ProfileSelector.apply`, que ativa o perfil do processo).
+
+    Cada verificação custa apenas `GetForegroundWindow` enquanto o foco não muda;
+    o pid e o nome só são consultados quando o hwnd muda, e o nome vem do
+    `ProcessNameCache`. O intervalo de verificação cai para `min_interval_sec`
+    logo após uma troca de foco e cresce (fator `backoff`) até
+    `max_interval_sec` enquanto o foco fica estável.
+
+    `gui`, `proc` e `psutil_mod` são os provedores (win32gui, win32process,
+    psutil) e podem ser substituídos por simulações fora do Windows.
+    """
+
+    def __init__(
+        self,
+        engine,
+        blacklist: Iterable[str],
+        gui,
+        proc,
+        psutil_mod,
+        *,
+        min_interval_sec: float = 0.05,
+        max_interval_sec: float = 0.5,
+        backoff: float = 1.5,
+        cache_size: int = 128,
+        prune_interval_sec: float = 10.0,
+        on_process: Optional[Callable[[str], None]] = None,
+    ):
+        self.engine = engine
+        self.matches = compile_blacklist(blacklist)
+        self.on_process = on_process
+        self.gui = gui
+        self.proc = proc
+        self.names = ProcessNameCache(psutil_mod, capacity=cache_size)
+        self.min_interval = max(min_interval_sec, 0.01)
+        self.max_interval = max(max_interval_sec, self.min_interval)
+        self.backoff = max(backoff, 1.0)
+        self.prune_interval = prune_interval_sec
+        self.interval = self.min_interval
+        self.blocked_active = False
+        self.polls = 0
+        self.focus_changes = 0
+        self._last_hwnd = None
+        self._last_pid = None
+        self._next_prune = time.monotonic() + prune_interval_sec
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def poll(self) -> float:
+        """Faz uma verificação e retorna o intervalo até a próxima."""
+        self.polls += 1
+        hwnd = self.gui.GetForegroundWindow()
+        if not hwnd or hwnd == self._last_hwnd:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+            return self.interval
+
+        self.interval = self.min_interval
+        _, pid = self.proc.GetWindowThreadProcessId(hwnd)
+        if not pid or pid == self._last_pid:
+            self._last_hwnd = hwnd
+            return self.interval
+        name = self.names.name(pid)
+        if name is None:
+            # O processo terminou entre as consultas; tenta de novo na próxima.
+            return self.interval
+        self.focus_changes += 1
+        self._apply(name)
+        # Só depois da decisão aplicada: se algo acima falhar, o mesmo hwnd é
+        # consultado de novo na próxima verificação.
+        self._last_hwnd = hwnd
+        self._last_pid = pid
+        return self.interval
+
+    def _apply(self, name: str) -> None:
+        if self.on_process is not None:
+            self.on_process(name)
+        blocked = self.matches(name)
+        if blocked and not self.blocked_active:
+            self.blocked_active = True
+            self.engine.pause("blacklist")
+            print(f"Processo '{name}' está na blacklist. Suavização pausada automaticamente.")
+        elif not blocked and self.blocked_active:
+            self.blocked_active = False
+            self.engine.resume("blacklist")
+            status = "ATIVADO" if self.engine.enabled else "DESATIVADO"
+            print(f"Processo liberado. Suavização: {status}.")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="foreground-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.5)
+        self._thread = None
+
+    def _run(self) -> None:
+        interval = self.min_interval
+        while not self._stop.wait(interval):
+            try:
+                interval = self.poll()
+                if time.monotonic() >= self._next_prune:
+                    self.names.prune()
+                    self._next_prune = time.monotonic() + self.prune_interval
+            except Exception as exc:  # noqa: BLE001
+                print(f"Monitor de processos encontrou um erro: {exc}")
+                interval = max(self.max_interval, 1.0)
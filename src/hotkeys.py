@@ -1,7 +1,10 @@
 import ctypes
+import sys
 from ctypes import wintypes
 
-user32 = ctypes.windll.user32
+# Fora do Windows o módulo continua importável (validação da configuração e
+# ferramentas offline), mas as hotkeys só podem ser registradas no Windows.
+user32 = ctypes.windll.user32 if sys.platform == "win32" else None
 
 MOD_NOREPEAT = 0x4000
 
@@ -1,4 +1,6 @@
 
+from __future__ import annotations
+
 import ctypes
 from ctypes import wintypes
 
@@ -34,25 +36,90 @@ class INPUT(ctypes.Structure):
     _fields_ = [("type", wintypes.DWORD),
                 ("i", _I)]
 
+def _default_user32():
+    return ctypes.windll.user32
+
+
+class Injector:
+    """
+    Injetor de movimentos com buffers reutilizáveis.
+
+    Pré-aloca um array de `INPUT` já preenchido (tipo, flags e dwExtraInfo), de
+    modo que cada envio apenas escreve dx/dy nas estruturas existentes e chama
+    `SendInput`. O valor de dwExtraInfo aponta para um `c_ulong` persistente com o
+    número mágico; seu endereço (`extra_address`) identifica os eventos sintéticos
+    no hook sem precisar desreferenciar ponteiros de terceiros.
+
+    Args:
+        magic_number: Número que marca os eventos como sintéticos.
+        capacity: Quantidade de movimentos que cabem em uma única chamada de `SendInput`.
+        user32: Binding do user32 (injetável para testes/benchmarks fora do Windows).
+    """
+    def __init__(self, magic_number: int, *, capacity: int = 16, user32=None):
+        self.magic_number = magic_number
+        self.capacity = max(1, capacity)
+        self._user32 = user32 if user32 is not None else _default_user32()
+        self._send_input = self._user32.SendInput
+        self._size = ctypes.sizeof(INPUT)
+
+        self._extra = ctypes.c_ulong(magic_number)
+        self.extra_address = ctypes.addressof(self._extra)
+        extra_ptr = ctypes.pointer(self._extra)
+
+        self._inputs = (INPUT * self.capacity)()
+        for inp in self._inputs:
+            inp.type = INPUT_MOUSE
+            inp.mi.dwFlags = MOUSEEVENTF_MOVE
+            inp.mi.dwExtraInfo = extra_ptr
+        # Visões pré-criadas de cada MOUSEINPUT: escrever nelas não aloca estruturas novas.
+        self._mi = [self._inputs[i].mi for i in range(self.capacity)]
+        self._first = self._mi[0]
+
+    def send(self, dx: int, dy: int) -> None:
+        """Envia um único movimento relativo."""
+        mi = self._first
+        mi.dx = dx
+        mi.dy = dy
+        self._send_input(1, self._inputs, self._size)
+
+    def send_many(self, moves) -> int:
+        """
+        Envia vários movimentos com o menor número possível de chamadas a
+        `SendInput` (uma a cada `capacity` movimentos). Retorna quantos foram enviados.
+        """
+        mis, capacity = self._mi, self.capacity
+        n = total = 0
+        for dx, dy in moves:
+            mi = mis[n]
+            mi.dx = dx
+            mi.dy = dy
+            n += 1
+            if n == capacity:
+                self._send_input(n, self._inputs, self._size)
+                total += n
+                n = 0
+        if n:
+            self._send_input(n, self._inputs, self._size)
+            total += n
+        return total
+
+
+_default_injector: Injector | None = None
+
+
 def send_mouse_move(dx: int, dy: int, magic_number: int):
     """
     Cria e envia um evento de movimento de mouse relativo para a fila de input do sistema.
 
+    Mantido por compatibilidade: reutiliza um `Injector` padrão em vez de alocar
+    as estruturas a cada chamada.
+
     Args:
         dx: O movimento relativo no eixo X.
         dy: O movimento relativo no eixo Y.
         magic_number: Um número para marcar o evento como sintético, evitando loops de feedback.
     """
-    extra = ctypes.c_ulong(magic_number)
-    inp = INPUT()
-    inp.type = INPUT_MOUSE
-    inp.i.mi = MOUSEINPUT(dx=dx, 
-                          dy=dy, 
-                          mouseData=0, 
-                          dwFlags=MOUSEEVENTF_MOVE, 
-                          time=0, 
-                          dwExtraInfo=ctypes.pointer(extra))
-    
-    # A chamada para a API do Windows.
-    # Envia 1 estrutura INPUT, cujo tamanho é especificado.
-    ctypes.windll.user32.SendInput(1, ctypes.byref(inp), ctypes.sizeof(INPUT))
+    global _default_injector
+    if _default_injector is None or _default_injector.magic_number != magic_number:
+        _default_injector = Injector(magic_number)
+    _default_injector.send(dx, dy)
@@ -0,0 +1,132 @@
+"""
+Latência de ponta a ponta a partir do carimbo de tempo do evento.
+
+O Windows marca cada evento do hook com `MSLLHOOKSTRUCT.time` (milissegundos do
+relógio de ticks do sistema). O hook grava, para cada evento suavizado, esse
+carimbo, o instante em que o callback começou e o instante logo após a injeção
+(`perf_counter_ns`); o `InputLatencyTracker` separa:
+
+* fila: do carimbo do SO até o callback começar (entrega do evento pelo
+  Windows, espera pelo GIL enquanto outra thread Python roda, ...);
+* processamento: do início do callback até a injeção (os filtros e o
+  `SendInput`);
+* total: a soma dos dois.
+
+Os dois relógios não têm origem comum, então a fila é estimada pela correlação
+de deslocamento mínimo: `entrada - carimbo` só tem ruído positivo, e o menor
+valor recente é tomado como "fila zero". A fila reportada é o atraso acima do
+melhor caso observado, com a resolução do relógio de ticks do SO (também
+reportada). O mínimo é renovado a cada `floor_window_sec` para acompanhar a
+deriva entre os relógios.
+
+Como no `LatencyProfiler` em modo background, o hook só escreve as três
+medições em um buffer circular pré-alocado; a correlação e os histogramas ficam
+para `drain`, chamado no relatório.
+"""
+from __future__ import annotations
+
+from array import array
+
+from .profiler import LatencyHistogram, format_summary
+
+_TICK_WRAP = 1 << 32
+
+
+class InputLatencyTracker:
+    """Fila, processamento e latência total por evento, em percentis."""
+
+    def __init__(self, *, ring_capacity: int = 65536, floor_window_sec: float = 10.0):
+        capacity = 1 << max(ring_capacity - 1, 1).bit_length()
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._os_ms = array("Q", bytes(8 * capacity))
+        self._entry_ns = array("Q", bytes(8 * capacity))
+        self._done_ns = array("Q", bytes(8 * capacity))
+        self._head = 0  # escrito apenas pela thread do hook
+        self._tail = 0  # escrito apenas por quem drena
+        self.dropped = 0
+        self.floor_window_ms = floor_window_sec * 1000.0
+
+        self.queue = LatencyHistogram()
+        self.processing = LatencyHistogram()
+        self.total = LatencyHistogram()
+        # Estado da correlação (só usado por `drain`).
+        self._epoch = 0
+        self._last_os_ms: int | None = None
+        self._floor = float("inf")
+        self._previous_floor = float("inf")
+        self._window_end = float("-inf")
+        self.tick_ms = 0  # menor intervalo positivo entre carimbos do SO (resolução observada)
+
+    def record(self, os_ms: int, entry_ns: int, done_ns: int) -> None:
+        """Chamado pelo hook: só grava no buffer circular."""
+        head = self._head
+        if head - self._tail >= self._capacity:
+            self.dropped += 1
+            return
+        index = head & self._mask
+        self._os_ms[index] = os_ms
+        self._entry_ns[index] = entry_ns
+        self._done_ns[index] = done_ns
+        self._head = head + 1
+
+    def drain(self) -> int:
+        """Correlaciona as medições pendentes e as soma aos histogramas."""
+        head = self._head
+        tail = self._tail
+        mask = self._mask
+        os_times, entries, dones = self._os_ms, self._entry_ns, self._done_ns
+        record_queue, record_processing, record_total = self.queue.record, self.processing.record, self.total.record
+        for position in range(tail, head):
+            index = position & mask
+            os_ms = os_times[index]
+            entry_ms = entries[index] * 1e-6
+            last = self._last_os_ms
+            if last is not None:
+                if os_ms < last - (_TICK_WRAP >> 1):
+                    self._epoch += _TICK_WRAP  # GetTickCount volta a zero a cada ~49,7 dias
+                elif os_ms > last and (self.tick_ms == 0 or os_ms - last < self.tick_ms):
+                    self.tick_ms = os_ms - last
+            self._last_os_ms = os_ms
+            offset = entry_ms - (os_ms + self._epoch)
+            if entry_ms >= self._window_end:
+                self._previous_floor, self._floor = self._floor, float("inf")
+                self._window_end = entry_ms + self.floor_window_ms
+            if offset < self._floor:
+                self._floor = offset
+            floor = self._floor if self._floor < self._previous_floor else self._previous_floor
+            queue_us = (offset - floor) * 1000.0
+            processing_us = (dones[index] - entries[index]) / 1000.0
+            record_queue(queue_us)
+            record_processing(processing_us)
+            record_total(queue_us + processing_us)
+        self._tail = head
+        return head - tail
+
+    def reset(self) -> None:
+        self.queue.reset()
+        self.processing.reset()
+        self.total.reset()
+
+    def as_dict(self) -> dict:
+        return {
+            "queue_us": self.queue.summary(),
+            "processing_us": self.processing.summary(),
+            "total_us": self.total.summary(),
+            "os_tick_ms": self.tick_ms,
+            "dropped": self.dropped,
+        }
+
+    def report(self) -> None:
+        """Imprime os percentis acumulados (registrado em `LatencyProfiler.reporters`)."""
+        self.drain()
+        if not self.total.count:
+            return
+        tick = f"{self.tick_ms} ms" if self.tick_ms else "desconhecida"
+        dropped = f" | descartadas: {self.dropped}" if self.dropped else ""
+        print(f"[Latência] fila (SO -> callback): {format_summary(self.queue.summary())}")
+        print(f"[Latência] processamento (callback -> injeção): {format_summary(self.processing.summary())}")
+        print(
+            f"[Latência] total ({self.total.count} eventos): {format_summary(self.total.summary())} "
+            f"| resolução do relógio do SO: {tick}{dropped}"
+        )
@@ -1,42 +1,261 @@
+from __future__ import annotations
 
+import math
+import threading
 import time
+from array import array
+from typing import Callable
+
+# Percentis reportados a cada intervalo (fração, rótulo).
+REPORT_PERCENTILES = ((0.50, "p50"), (0.90, "p90"), (0.99, "p99"), (0.999, "p99.9"))
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências com baldes logarítmicos e tamanho fixo.
+
+    Cada oitava (potência de 2) é dividida em `buckets_per_octave` baldes, o que
+    dá um erro relativo máximo de ~9% com o padrão (8 baldes). Os contadores são
+    um `array("Q")` alocado uma única vez; registrar uma amostra apenas
+    incrementa um balde, sem guardar objetos int novos. O total (`count`) é
+    somado dos baldes na leitura, fora do caminho quente.
+    """
+    def __init__(self, min_us: float = 0.1, max_us: float = 10_000_000.0, buckets_per_octave: int = 8):
+        self.min_us = min_us
+        self.buckets_per_octave = buckets_per_octave
+        self._scale = float(buckets_per_octave)
+        self._offset = -math.log2(min_us) * buckets_per_octave
+        self._last = int(math.ceil(math.log2(max_us / min_us) * buckets_per_octave))
+        self.counts = array("Q", bytes(8 * (self._last + 1)))
+        self.max_us = 0.0
+
+    def record(self, latency_us: float) -> None:
+        """Registra uma amostra (em µs) sem alocar estruturas novas."""
+        if latency_us > self.min_us:
+            index = int(math.log2(latency_us) * self._scale + self._offset)
+            if index > self._last:
+                index = self._last
+        else:
+            index = 0
+        self.counts[index] += 1
+        if latency_us > self.max_us:
+            self.max_us = latency_us
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def bucket_upper_us(self, index: int) -> float:
+        """Limite superior (em µs) do balde `index`."""
+        return self.min_us * 2.0 ** ((index + 1) / self._scale)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Estima o percentil pedido (0..1) pelo limite superior do balde que o contém.
+        A estimativa nunca passa do máximo observado.
+        """
+        count = self.count
+        if count == 0:
+            return 0.0
+        target = max(1, math.ceil(fraction * count))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= target:
+                return min(self.bucket_upper_us(index), self.max_us)
+        return self.max_us
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Soma os contadores de outro histograma com a mesma geometria."""
+        counts = self.counts
+        for index, bucket in enumerate(other.counts):
+            if bucket:
+                counts[index] += bucket
+        if other.max_us > self.max_us:
+            self.max_us = other.max_us
+
+    def reset(self) -> None:
+        """Zera os contadores reaproveitando o mesmo array."""
+        counts = self.counts
+        for index in range(len(counts)):
+            counts[index] = 0
+        self.max_us = 0.0
+
+    def summary(self) -> dict:
+        """Resumo com contagem, percentis e máximo (em µs)."""
+        result = {"count": self.count}
+        for fraction, label in REPORT_PERCENTILES:
+            result[label] = self.percentile(fraction)
+        result["max"] = self.max_us
+        return result
+
+
+def format_summary(summary: dict) -> str:
+    """Formata um resumo de `LatencyHistogram.summary` para o console."""
+    parts = [f"{label}={summary[label]:.1f}" for _, label in REPORT_PERCENTILES]
+    parts.append(f"max={summary['max']:.1f} µs")
+    return " ".join(parts)
+
+
+class RateLimitedLog:
+    """
+    Imprime no máximo `burst` mensagens a cada `interval_sec`; as demais só são contadas.
+
+    Ao abrir uma nova janela, informa quantas foram suprimidas na anterior. Usado
+    no caminho de erro do hook, onde um `print` por evento agravaria o problema.
+    """
+
+    def __init__(self, prefix: str, *, interval_sec: float = 5.0, burst: int = 3, clock=time.monotonic):
+        self.prefix = prefix
+        self.interval = interval_sec
+        self.burst = max(burst, 1)
+        self.clock = clock
+        self.suppressed = 0
+        self.suppressed_total = 0
+        self._window_end = float("-inf")
+        self._printed = 0
+
+    def __call__(self, error) -> None:
+        now = self.clock()
+        if now >= self._window_end:
+            if self.suppressed:
+                print(f"{self.prefix}: {self.suppressed} mensagens suprimidas nos últimos {self.interval:.0f}s.")
+            self._window_end = now + self.interval
+            self._printed = 0
+            self.suppressed = 0
+        if self._printed < self.burst:
+            self._printed += 1
+            print(f"{self.prefix}: {error}")
+        else:
+            self.suppressed += 1
+            self.suppressed_total += 1
+
 
 class LatencyProfiler:
     """
     Agrega dados de latência de processamento de eventos e os loga periodicamente.
-    
+
     Esta abordagem evita a sobrecarga de I/O (chamadas a `print`) que ocorreria
     se logássemos cada evento individualmente, o que poderia mascarar ou até mesmo
     causar a latência que estamos tentando medir.
+
+    As latências vão para um histograma logarítmico do intervalo corrente, que a
+    cada relatório é somado ao histograma acumulado da sessão. Assim os picos
+    (p99/p99.9/máximo) aparecem, em vez de ficarem escondidos em uma média.
+
+    No modo `background`, `log` apenas grava a medição em um buffer circular
+    pré-alocado; uma thread de relatório (`start`/`stop`) drena o buffer, agrega
+    no histograma e imprime os resumos. A thread do hook nunca faz I/O nem
+    formata strings, e medições que não cabem no buffer são contadas como
+    descartadas em vez de bloquear.
     """
-    def __init__(self, log_interval_sec: float = 5.0):
+    def __init__(
+        self,
+        log_interval_sec: float = 5.0,
+        *,
+        background: bool = False,
+        ring_capacity: int = 8192,
+        drain_interval_sec: float = 0.05,
+    ):
         """
         Inicializa o profiler.
 
         Args:
-            log_interval_sec: O intervalo em segundos entre cada log de média.
+            log_interval_sec: O intervalo em segundos entre cada relatório.
+            background: Usa o buffer circular e a thread de relatório.
+            ring_capacity: Capacidade do buffer (arredondada para potência de 2).
+            drain_interval_sec: Frequência com que a thread de relatório drena o buffer.
         """
         self.log_interval = log_interval_sec
         self.last_log_time = time.time()
-        self.event_count = 0
-        self.total_latency_us = 0
+        self.interval = LatencyHistogram()
+        self.total = LatencyHistogram()
+        self.background = background
+        self.dropped = 0
+        # Relatórios extras impressos junto com o do profiler (ex.: `FilterChain.report`).
+        self.reporters: list[Callable[[], None]] = []
+
+        capacity = 1 << max(ring_capacity - 1, 1).bit_length()
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._ring = array("d", bytes(8 * capacity)) if background else None
+        self._head = 0  # escrito apenas pela thread do hook
+        self._tail = 0  # escrito apenas pela thread de relatório
+        self._drain_interval = drain_interval_sec
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        if background:
+            self.log = self._enqueue
 
     def log(self, latency_us: float):
         """
         Registra uma única medição de latência em micro-segundos (µs).
-        Acumula os valores e, se o intervalo de log for atingido, imprime a média.
+        Acumula os valores e, se o intervalo de log for atingido, imprime os percentis.
         """
-        self.event_count += 1
-        self.total_latency_us += latency_us
+        self.interval.record(latency_us)
 
         current_time = time.time()
         if current_time - self.last_log_time > self.log_interval:
-            if self.event_count > 0:
-                avg_latency = self.total_latency_us / self.event_count
-                # O f-string formatado garante uma saída limpa e legível no console.
-                print(f"[Profiler] Latência média de processamento nos últimos {self.log_interval:.1f}s: {avg_latency:.2f} µs ({self.event_count} eventos)")
-            
+            self.report()
             # Reseta as estatísticas para o próximo intervalo de medição.
             self.last_log_time = current_time
-            self.event_count = 0
-            self.total_latency_us = 0
+
+    def _enqueue(self, latency_us: float) -> None:
+        """Versão de `log` do modo background: só escreve no buffer circular."""
+        head = self._head
+        if head - self._tail >= self._capacity:
+            self.dropped += 1
+            return
+        self._ring[head & self._mask] = latency_us
+        self._head = head + 1
+
+    def drain(self) -> int:
+        """Move as medições pendentes do buffer para o histograma do intervalo."""
+        head = self._head
+        tail = self._tail
+        ring, mask, record = self._ring, self._mask, self.interval.record
+        for index in range(tail, head):
+            record(ring[index & mask])
+        self._tail = head
+        return head - tail
+
+    def start(self) -> None:
+        """Inicia a thread de relatório (apenas no modo background)."""
+        if not self.background or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler-reporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Para a thread de relatório, drenando e reportando o que restou."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        self.drain()
+        self.report()
+
+    def _run(self) -> None:
+        next_report = time.monotonic() + self.log_interval
+        while not self._stop.wait(self._drain_interval):
+            self.drain()
+            now = time.monotonic()
+            if now >= next_report:
+                self.report()
+                next_report = now + self.log_interval
+
+    def report(self) -> None:
+        """Imprime o resumo do intervalo corrente e o acumulado, e reinicia o intervalo."""
+        if self.interval.count > 0:
+            self.total.merge(self.interval)
+            dropped = f" | descartadas: {self.dropped}" if self.dropped else ""
+            print(
+                f"[Profiler] Últimos {self.log_interval:.1f}s ({self.interval.count} eventos): "
+                f"{format_summary(self.interval.summary())} | "
+                f"acumulado ({self.total.count} eventos): {format_summary(self.total.summary())}{dropped}"
+            )
+            for reporter in self.reporters:
+                reporter()
+        self.interval.reset()
@@ -0,0 +1,131 @@
+"""
+Perfis de suavização por processo.
+
+Cada perfil de `profiles` no `defaults.json` é um conjunto completo de
+parâmetros do EMA e do TremorGuard (as chaves de `config.PROFILE_KEYS`; as omitidas
+herdam o valor do nível principal da configuração) e a lista de processos
+(`processes`, globs ou `re:` como na blacklist) em que ele vale. O nível
+principal é o perfil `default`, usado quando nenhum outro casa.
+
+Cada perfil tem seus próprios filtros e o `HookEngine` mantém um pipeline
+pré-compilado para cada um, então trocar de perfil quando o foco muda é uma
+troca de referência (`HookEngine.activate_profile`), sem reconstruir filtros.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from .config import (
+    ParamsSnapshot, ema_params_from_config, filter_chain_from_config, response_curve_from_config,
+    tremor_params_from_config,
+)
+from .filters import FilterChain
+from .foreground import compile_blacklist
+from .profiler import LatencyHistogram, format_summary
+from .smoothing import AdaptiveEMA
+from .tremor import TremorGuard
+from .win_hook import DEFAULT_PROFILE
+
+
+def profile_configs(cfg: dict) -> dict[str, dict]:
+    """Configuração efetiva de cada perfil (nível principal + campos do perfil), `default` primeiro."""
+    configs = {DEFAULT_PROFILE: cfg}
+    for name, fields in (cfg.get("profiles") or {}).items():
+        merged = dict(cfg)
+        merged.update({key: value for key, value in fields.items() if key != "processes"})
+        configs[name] = merged
+    return configs
+
+
+def profile_snapshots(cfg: dict, alpha_table_step: Optional[float] = None) -> dict[str, ParamsSnapshot]:
+    """`ParamsSnapshot` de cada perfil (usado na recarga em tempo real)."""
+    step = float(cfg.get("alpha_table_step", 1.0)) if alpha_table_step is None else alpha_table_step
+    return {
+        name: ParamsSnapshot(
+            ema=ema_params_from_config(merged),
+            tremor=tremor_params_from_config(merged),
+            curve=response_curve_from_config(merged),
+            alpha_table_step=step,
+        )
+        for name, merged in profile_configs(cfg).items()
+    }
+
+
+class Profile:
+    """
+    Filtros de um perfil e os processos em que ele vale.
+
+    `compiled` guarda `(pipeline, flush, resume)` pré-compilados pelo engine
+    para o estado atual; é refeito a cada `rebuild_pipeline`.
+    """
+
+    def __init__(self, name: str, ema: AdaptiveEMA, tremor: TremorGuard, chain: FilterChain, processes=()):
+        self.name = name
+        self.ema = ema
+        self.tremor = tremor
+        self.chain = chain
+        self.processes = tuple(processes)
+        self.compiled = None
+
+    def reset(self) -> None:
+        """Zera o estado dos filtros (o perfil volta a valer depois de um tempo inativo)."""
+        self.ema.reset()
+        self.chain.reset()
+
+
+def build_profile(name: str, cfg: dict, processes=()) -> Profile:
+    ema = AdaptiveEMA(ema_params_from_config(cfg), response_curve_from_config(cfg))
+    tremor = TremorGuard(tremor_params_from_config(cfg))
+    return Profile(name, ema, tremor, filter_chain_from_config(cfg, tremor, ema), processes)
+
+
+def profiles_from_config(cfg: dict, default: Profile) -> list[Profile]:
+    """
+    `default` (os filtros já criados pelo `main`) seguido de um `Profile` por
+    entrada de `profiles`, cada um com filtros próprios.
+    """
+    sections = cfg.get("profiles") or {}
+    return [default] + [
+        build_profile(name, merged, sections[name].get("processes", ()))
+        for name, merged in profile_configs(cfg).items()
+        if name != DEFAULT_PROFILE
+    ]
+
+
+class ProfileSelector:
+    """
+    Escolhe o perfil de um processo e o ativa no engine, medindo a troca.
+
+    Os perfis são testados na ordem do arquivo; o primeiro cujo `processes`
+    casa com o nome do executável vence, senão vale `default`.
+    """
+
+    def __init__(self, engine, profiles: list[Profile]):
+        self.engine = engine
+        self._rules = [(profile.name, compile_blacklist(profile.processes)) for profile in profiles if profile.processes]
+        self.switches = 0
+        self.switch_latency = LatencyHistogram()
+        self.last_switch_us = 0.0
+
+    def select(self, process_name: str) -> str:
+        for name, matches in self._rules:
+            if matches(process_name):
+                return name
+        return DEFAULT_PROFILE
+
+    def apply(self, process_name: str) -> None:
+        """Ativa o perfil de `process_name` (chamado pelo `ForegroundWatcher` a cada troca de foco)."""
+        name = self.select(process_name)
+        if name == self.engine.active_profile:
+            return
+        latency_us = self.engine.activate_profile(name)
+        self.switches += 1
+        self.last_switch_us = latency_us
+        self.switch_latency.record(latency_us)
+        print(f"[Perfil] '{name}' ativo para '{process_name}' (troca em {latency_us:.1f} µs).")
+
+    def report(self) -> None:
+        line = f"[Perfil] Ativo: '{self.engine.active_profile}' | trocas: {self.switches}"
+        if self.switch_latency.count:
+            line += f" | latência da troca: {format_summary(self.switch_latency.summary())}"
+        print(line)
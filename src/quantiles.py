@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+
+class P2Quantile:
+    """
+    Estimador de quantil em fluxo pelo algoritmo P² (Jain & Chlamtac, 1985).
+
+    Mantém apenas cinco marcadores, então a memória é constante e cada amostra
+    custa O(1), independentemente de quantas amostras já foram vistas. Enquanto
+    houver menos de cinco amostras, o quantil é lido diretamente delas.
+    """
+    __slots__ = ("p", "count", "_q", "_n", "_np", "_dn")
+
+    def __init__(self, p: float):
+        if not 0.0 < p < 1.0:
+            raise ValueError("O quantil deve estar entre 0 e 1 (exclusivo).")
+        self.p = p
+        self.count = 0
+        self._q: list[float] = []
+        self._n = [0, 1, 2, 3, 4]
+        self._np = [0.0, 2.0 * p, 4.0 * p, 2.0 + 2.0 * p, 4.0]
+        self._dn = (0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0)
+
+    def add(self, x: float) -> None:
+        """Incorpora uma amostra."""
+        self.count += 1
+        q = self._q
+        if self.count <= 5:
+            q.append(x)
+            if self.count == 5:
+                q.sort()
+            return
+
+        n = self._n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired, dn = self._np, self._dn
+        for i in range(5):
+            desired[i] += dn[i]
+
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1.0 and n[i + 1] - n[i] > 1) or (d <= -1.0 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = candidate
+                n[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self._q, self._n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> float:
+        """Estimativa atual do quantil (0.0 sem amostras)."""
+        if self.count == 0:
+            return 0.0
+        if self.count < 5:
+            ordered = sorted(self._q)
+            return ordered[int(round((len(ordered) - 1) * self.p))]
+        return self._q[2]
@@ -0,0 +1,202 @@
+"""
+Reprodução offline de traços gravados pelo hook.
+
+Uso:
+    python -m src.replay [--config caminho.json] [--csv saida.csv] [--batch] traco1.aimtrace [traco2 ...]
+
+Empurra cada traço pelo `TremorGuard.preprocess` e `AdaptiveEMA.update` o mais
+rápido possível, sem nenhuma chamada à API do Windows, e imprime o custo dos
+filtros e um resumo da saída para comparar configurações. A cadeia de filtros
+segue `filter_chain` da configuração. Com `--batch`, usa as entradas vetorizadas
+(`preprocess_batch`/`update_batch`/`process_batch`, requer NumPy).
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .config import (
+    read_config, ema_params_from_config, tremor_params_from_config, response_curve_from_config,
+    filter_chain_from_config,
+)
+from .filters import FilterChain
+from .smoothing import AdaptiveEMA
+from .tremor import TremorGuard
+from .trace import load_trace, load_trace_arrays
+
+
+@dataclass
+class ReplayResult:
+    """Resultado da reprodução de um traço."""
+    events: int
+    injected: int
+    elapsed_ns: int
+    path_x: int
+    path_y: int
+    outputs: Optional[list[tuple[int, int]]] = field(default=None, repr=False)
+
+    @property
+    def ns_per_event(self) -> float:
+        return self.elapsed_ns / self.events if self.events else 0.0
+
+    @property
+    def events_per_sec(self) -> float:
+        return self.events * 1e9 / self.elapsed_ns if self.elapsed_ns else 0.0
+
+
+def replay(
+    samples: Iterable[tuple[int, int, float]],
+    tremor: TremorGuard,
+    ema: AdaptiveEMA,
+    *,
+    collect: bool = False,
+    chain: Optional[FilterChain] = None,
+) -> ReplayResult:
+    """
+    Processa uma sequência de amostras (dx, dy, t) exatamente como o hook faria.
+
+    A primeira amostra apenas semeia o relógio, como no primeiro evento do hook.
+    As saídas são arredondadas para inteiros, como no `injector`. Com `collect`,
+    a lista de saídas (uma por evento filtrado) é devolvida no resultado. Uma
+    `chain` que não seja a padrão substitui o par `tremor`/`ema`, como no hook.
+    """
+    preprocess = tremor.preprocess
+    update = ema.update
+    process = chain.process if chain is not None and not chain.fusable(tremor, ema) else None
+    outputs: Optional[list[tuple[int, int]]] = [] if collect else None
+    events = injected = path_x = path_y = 0
+    last_t = None
+
+    start = time.perf_counter_ns()
+    for dx, dy, t in samples:
+        if last_t is None:
+            last_t = t
+            continue
+        dt = t - last_t
+        last_t = t
+        if dt <= 0:
+            continue
+        events += 1
+        if process is None:
+            pdx, pdy, gain = preprocess(dx, dy, dt)
+            sdx, sdy = update(pdx, pdy, dt, gain)
+        else:
+            sdx, sdy = process(dx, dy, dt)
+        ox, oy = int(round(sdx)), int(round(sdy))
+        if ox or oy:
+            injected += 1
+            path_x += abs(ox)
+            path_y += abs(oy)
+        if outputs is not None:
+            outputs.append((ox, oy))
+    elapsed = time.perf_counter_ns() - start
+
+    return ReplayResult(events, injected, elapsed, path_x, path_y, outputs)
+
+
+def filter_arrays(dx, dy, t, tremor: TremorGuard, ema: AdaptiveEMA, *, chain: Optional[FilterChain] = None):
+    """
+    Passa os arrays (dx, dy, t) de um traço pelos filtros em lote (ou pela `chain`).
+
+    Descarta a amostra-semente e as de dt <= 0, como o hook. Retorna
+    (t, dx, dy, ox, oy): os tempos e deltas brutos das amostras filtradas e as
+    saídas arredondadas para inteiros, como seriam injetadas.
+    """
+    import numpy as np
+
+    dt = np.diff(t)
+    keep = dt > 0
+    t_kept, dx, dy, dt = t[1:][keep], dx[1:][keep], dy[1:][keep], dt[keep]
+    if chain is not None and not chain.fusable(tremor, ema):
+        sdx, sdy = chain.process_batch(dx, dy, dt)
+    else:
+        pdx, pdy, gain = tremor.preprocess_batch(dx, dy, dt)
+        sdx, sdy = ema.update_batch(pdx, pdy, dt, gain)
+    return t_kept, dx, dy, np.rint(sdx).astype(np.int64), np.rint(sdy).astype(np.int64)
+
+
+def replay_batch(
+    dx, dy, t, tremor: TremorGuard, ema: AdaptiveEMA, *, collect: bool = False, chain: Optional[FilterChain] = None,
+) -> ReplayResult:
+    """
+    Equivalente vetorizado de `replay`, recebendo os arrays (dx, dy, t) de um traço.
+
+    O resultado coincide com o caminho escalar dentro da tolerância de ponto
+    flutuante (pode divergir em saídas exatamente na fronteira de arredondamento).
+    """
+    import numpy as np
+
+    start = time.perf_counter_ns()
+    t_kept, _, _, ox, oy = filter_arrays(dx, dy, t, tremor, ema, chain=chain)
+    elapsed = time.perf_counter_ns() - start
+
+    moved = (ox != 0) | (oy != 0)
+    outputs = list(zip(ox.tolist(), oy.tolist())) if collect else None
+    return ReplayResult(
+        events=len(t_kept),
+        injected=int(moved.sum()),
+        elapsed_ns=elapsed,
+        path_x=int(np.abs(ox).sum()),
+        path_y=int(np.abs(oy).sum()),
+        outputs=outputs,
+    )
+
+
+def replay_file(path: Path, cfg: dict, *, collect: bool = False, batch: bool = False) -> ReplayResult:
+    """Carrega um traço e o reproduz com filtros novos montados a partir de `cfg`."""
+    tremor = TremorGuard(tremor_params_from_config(cfg))
+    ema = AdaptiveEMA(ema_params_from_config(cfg), response_curve_from_config(cfg))
+    chain = filter_chain_from_config(cfg, tremor, ema)
+    if batch:
+        result = replay_batch(*load_trace_arrays(path), tremor, ema, collect=collect, chain=chain)
+    else:
+        result = replay(load_trace(path), tremor, ema, collect=collect, chain=chain)
+    chain.report()
+    return result
+
+
+def _write_csv(path: Path, outputs: list[tuple[int, int]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("dx,dy\n")
+        for ox, oy in outputs:
+            f.write(f"{ox},{oy}\n")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.replay", description="Reproduz traços gravados pelos filtros.")
+    parser.add_argument("traces", nargs="+", type=Path, help="Arquivos .aimtrace gravados pelo hook.")
+    parser.add_argument("--config", type=Path, default=None, help="Configuração a usar (padrão: config/defaults.json).")
+    parser.add_argument("--csv", type=Path, default=None, help="Grava a saída do último traço em CSV (dx,dy).")
+    parser.add_argument("--batch", action="store_true", help="Usa as entradas vetorizadas dos filtros (requer NumPy).")
+    args = parser.parse_args(argv)
+
+    cfg = read_config(args.config)
+    total_events = total_ns = 0
+    last: Optional[ReplayResult] = None
+    for trace_path in args.traces:
+        try:
+            last = replay_file(trace_path, cfg, collect=args.csv is not None, batch=args.batch)
+        except (OSError, ValueError) as exc:
+            print(f"[Replay] {trace_path}: ignorado ({exc})", file=sys.stderr)
+            continue
+        total_events += last.events
+        total_ns += last.elapsed_ns
+        print(
+            f"[Replay] {trace_path.name}: {last.events} eventos, {last.ns_per_event:.0f} ns/evento, "
+            f"{last.injected} injeções, trajeto=({last.path_x}, {last.path_y}) px"
+        )
+
+    if total_events:
+        print(f"[Replay] Total: {total_events} eventos, {total_ns / total_events:.0f} ns/evento, "
+              f"{total_events * 1e9 / total_ns:.0f} eventos/s")
+    if args.csv is not None and last is not None and last.outputs is not None:
+        _write_csv(args.csv, last.outputs)
+    return 0 if total_events else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from math import hypot
+from typing import Callable, Optional
+
+from .filters import SETTLE_IDLE_SEC, FilterChain
+from .injector import Injector
+from .smoothing import AdaptiveEMA
+from .tremor import TremorGuard
+
+
+class OutputScheduler:
+    """
+    Desacopla o hook da filtragem/injeção para mouses de alta taxa de polling.
+
+    A thread do hook apenas empurra os deltas brutos (`push`) em um buffer
+    circular pré-alocado de produtor único/consumidor único e retorna. Uma thread
+    de saída acorda a uma taxa fixa (`rate_hz`), soma (coalesce) todos os deltas
+    pendentes, passa o resultado pelo `TremorGuard`/`AdaptiveEMA` e injeta no
+    máximo um movimento por ciclo. Assim o custo de CPU depende da taxa de saída,
+    não da taxa de polling do mouse.
+
+    O buffer não usa locks: com o GIL, o produtor só escreve `_head` e o
+    consumidor só escreve `_tail`. Se o buffer encher, o delta é contado como
+    descartado em vez de bloquear o hook.
+
+    A precisão do período depende de `time.sleep` (no Windows, a partir do
+    Python 3.11, usa timers de alta resolução).
+    """
+    def __init__(
+        self,
+        tremor: TremorGuard,
+        ema: AdaptiveEMA,
+        injector: Injector,
+        *,
+        rate_hz: float = 1000.0,
+        capacity: int = 4096,
+        report_interval_sec: float = 5.0,
+        chain: Optional[FilterChain] = None,
+    ):
+        self.tremor = tremor
+        self.ema = ema
+        # Cadeia de filtros alternativa; sem ela, TremorGuard + AdaptiveEMA.
+        self.chain = chain
+        self.injector = injector
+        self.period = 1.0 / max(rate_hz, 1.0)
+        self.report_interval = report_interval_sec
+
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._dx = array("l", bytes(array("l").itemsize * capacity))
+        self._dy = array("l", bytes(array("l").itemsize * capacity))
+        self._t = array("d", bytes(8 * capacity))
+        self._head = 0  # escrito apenas pela thread do hook
+        self._tail = 0  # escrito apenas pela thread de saída
+        self._last_t: Optional[float] = None
+        self._settled = True
+        # Recebe a velocidade de cada lote coalescido (ex.: `AutoCalibrator.observe`).
+        self.observer: Optional[Callable[[float], None]] = None
+        # Recebe (bruto_dx, bruto_dy, filtrado_dx, filtrado_dy, t) de cada lote (ex.: `MotionTap.push`).
+        self.tap: Optional[Callable[[float, float, float, float, float], None]] = None
+
+        self.dropped = 0
+        self.cycles = 0
+        self.raw_events = 0
+        self.batches = 0
+        self.injected = 0
+        self.max_depth = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def push(self, dx: int, dy: int, t: float) -> None:
+        """Enfileira um delta bruto. Chamado na thread do hook; nunca bloqueia."""
+        head = self._head
+        if head - self._tail >= self._capacity:
+            self.dropped += 1
+            return
+        index = head & self._mask
+        self._dx[index] = dx
+        self._dy[index] = dy
+        self._t[index] = t
+        self._head = head + 1
+
+    def pending(self) -> int:
+        """Profundidade atual da fila."""
+        return self._head - self._tail
+
+    def tick(self) -> bool:
+        """Coalesce os deltas pendentes, filtra e injeta. Retorna se houve dados."""
+        self.cycles += 1
+        head = self._head
+        tail = self._tail
+        count = head - tail
+        if count == 0:
+            chain = self.chain
+            if (not self._settled and chain is not None and chain.settles
+                    and time.perf_counter() - self._last_t >= SETTLE_IDLE_SEC):
+                # O mouse parou: devolve a dianteira do estágio preditivo.
+                self._settled = True
+                sdx, sdy = chain.settle()
+                if sdx or sdy:
+                    self.injector.send(int(sdx), int(sdy))
+                    self.injected += 1
+            return False
+
+        mask, dxs, dys = self._mask, self._dx, self._dy
+        sum_dx = sum_dy = 0
+        for index in range(tail, head):
+            slot = index & mask
+            sum_dx += dxs[slot]
+            sum_dy += dys[slot]
+        last_t = self._t[(head - 1) & mask]
+        first_t = self._t[tail & mask]
+        self._tail = head
+        self._settled = False
+
+        # dt cobre do último evento consumido até o mais recente do lote.
+        dt = last_t - self._last_t if self._last_t is not None else last_t - first_t
+        if dt <= 0:
+            dt = self.period
+        self._last_t = last_t
+
+        observer = self.observer
+        if observer is not None:
+            observer(hypot(sum_dx, sum_dy) / dt)
+        chain = self.chain
+        if chain is not None:
+            sdx, sdy = chain.process(sum_dx, sum_dy, dt)
+        else:
+            pdx, pdy, gain = self.tremor.preprocess(sum_dx, sum_dy, dt)
+            sdx, sdy = self.ema.update(pdx, pdy, dt, gain)
+        tap = self.tap
+        if tap is not None:
+            tap(sum_dx, sum_dy, sdx, sdy, last_t)
+        if sdx != 0 or sdy != 0:
+            self.injector.send(int(round(sdx)), int(round(sdy)))
+            self.injected += 1
+
+        self.raw_events += count
+        self.batches += 1
+        if count > self.max_depth:
+            self.max_depth = count
+        return True
+
+    def start(self) -> None:
+        """Inicia a thread de saída."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="output-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Para a thread de saída."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        period = self.period
+        next_tick = time.perf_counter()
+        next_report = next_tick + self.report_interval
+        while not self._stop.is_set():
+            next_tick += period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -period:
+                # Atrasou mais de um ciclo (ex.: suspensão): realinha em vez de disparar em rajada.
+                next_tick = time.perf_counter()
+            try:
+                self.tick()
+            except Exception as exc:  # noqa: BLE001
+                print(f"Erro no agendador de saída: {exc}")
+            if next_tick >= next_report:
+                self.report()
+                next_report = next_tick + self.report_interval
+
+    def stats(self) -> dict:
+        """Contadores acumulados: profundidade da fila e razão de coalescência."""
+        return {
+            "raw_events": self.raw_events,
+            "batches": self.batches,
+            "injected": self.injected,
+            "dropped": self.dropped,
+            "depth": self.pending(),
+            "max_depth": self.max_depth,
+            "mean_depth": self.raw_events / self.cycles if self.cycles else 0.0,
+            "coalescing_ratio": self.raw_events / self.batches if self.batches else 0.0,
+        }
+
+    def report(self) -> None:
+        """Imprime profundidade da fila e razão de coalescência desde o início."""
+        if not self.batches:
+            return
+        s = self.stats()
+        print(
+            f"[Saída] {1.0 / self.period:.0f} Hz: {s['raw_events']} eventos em {s['batches']} ciclos "
+            f"(coalescência {s['coalescing_ratio']:.1f}:1, fila média {s['mean_depth']:.1f}, máx {s['max_depth']}), "
+            f"{s['injected']} injeções, {s['dropped']} descartados"
+        )
@@ -1,14 +1,30 @@
 
+from array import array
 from dataclasses import dataclass
 from math import hypot
 
-@dataclass
+@dataclass(frozen=True)
 class LinearEMAParams:
-    """Armazena os parâmetros de configuração para o filtro EMA adaptativo."""
+    """
+    Armazena os parâmetros de configuração para o filtro EMA adaptativo.
+
+    É imutável: para alterar a curva, publique um novo objeto (ver
+    `HookEngine.publish`), assim nenhum leitor vê um conjunto pela metade.
+
+    Com `time_constant_mode`, o alpha da curva vale para um evento a
+    `reference_rate_hz` e é convertido para o `dt` real
+    (alpha_efetivo = 1 - (1 - alpha) ** (dt * reference_rate_hz)), então a
+    suavização em tempo real é a mesma em qualquer taxa de polling. Com
+    `speed_window_ms` > 0, a velocidade usada na curva é a média do trajeto nos
+    últimos `speed_window_ms` em vez da de um único evento.
+    """
     v_min: float
     v_max: float
     alpha_min: float
     alpha_max: float
+    time_constant_mode: bool = False
+    reference_rate_hz: float = 1000.0
+    speed_window_ms: float = 0.0
 
     def alpha_for_speed(self, v: float) -> float:
         """
@@ -27,14 +43,161 @@ class LinearEMAParams:
         # Interpolação linear
         return self.alpha_min + t * (self.alpha_max - self.alpha_min)
 
+    def alpha_for_speed_batch(self, v):
+        """Versão vetorizada (NumPy) de `alpha_for_speed` para um array de velocidades."""
+        import numpy as np
+
+        v = np.asarray(v, dtype=np.float64)
+        if self.v_max <= self.v_min:
+            return np.full(v.shape, self.alpha_max)
+        t = np.clip((v - self.v_min) / (self.v_max - self.v_min), 0.0, 1.0)
+        return self.alpha_min + t * (self.alpha_max - self.alpha_min)
+
+
+def _linear_recurrence(np, c, b, s0):
+    """
+    Resolve s[n] = c[n] * s[n-1] + b[n] para todos os n sem laço por amostra.
+
+    Usa um prefix-scan (Hillis-Steele) sobre o operador associativo
+    (c1, b1) ∘ (c2, b2) = (c1 * c2, c2 * b1 + b2): log2(N) passadas vetorizadas,
+    apenas multiplicações e somas (sem divisões), portanto numericamente estável.
+    `b` pode ter colunas extras (um eixo por coluna) que compartilham o mesmo `c`.
+    """
+    c = c.copy()
+    b = b.copy()
+    n = len(c)
+    shift = 1
+    while shift < n:
+        b[shift:] = b[shift:] + c[shift:] * b[:-shift]
+        c[shift:] = c[shift:] * c[:-shift]
+        shift *= 2
+    return b + c * s0
+
+class SpeedWindow:
+    """
+    Velocidade média (trajeto / tempo) dos eventos dos últimos `window_sec` segundos.
+
+    Guarda (distância, dt) de cada evento em um buffer circular pré-alocado e
+    mantém as somas correntes: cada `update` custa O(1) amortizado. As somas são
+    recalculadas a cada volta do buffer para não acumular erro de arredondamento.
+    O evento mais antigo sai enquanto os restantes ainda cobrem a janela; com
+    eventos mais espaçados que a janela (ex.: 125 Hz e 4 ms), vale o último evento.
+    """
+
+    def __init__(self, window_sec: float, *, max_rate_hz: float = 16000.0):
+        self.window = window_sec
+        capacity = max(int(window_sec * max_rate_hz) + 1, 64)
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._dist = array("d", bytes(8 * capacity))
+        self._dt = array("d", bytes(8 * capacity))
+        self._head = 0
+        self._tail = 0
+        self._sum_dist = 0.0
+        self._sum_dt = 0.0
+
+    def reset(self) -> None:
+        self._head = self._tail = 0
+        self._sum_dist = self._sum_dt = 0.0
+
+    def update(self, dist: float, dt: float) -> float:
+        """Acrescenta um evento e devolve a velocidade média da janela (px/s)."""
+        mask, dists, dts = self._mask, self._dist, self._dt
+        head, tail = self._head, self._tail
+        if head - tail == self._capacity:
+            self._sum_dist -= dists[tail & mask]
+            self._sum_dt -= dts[tail & mask]
+            tail += 1
+        slot = head & mask
+        dists[slot] = dist
+        dts[slot] = dt
+        head += 1
+        if slot == mask:
+            # Uma volta completa: recalcula as somas a partir do conteúdo.
+            self._sum_dist = sum(dists[i & mask] for i in range(tail, head - 1)) + dist
+            self._sum_dt = sum(dts[i & mask] for i in range(tail, head - 1)) + dt
+        else:
+            self._sum_dist += dist
+            self._sum_dt += dt
+        window = self.window
+        while head - tail > 1 and self._sum_dt - dts[tail & mask] >= window:
+            self._sum_dist -= dists[tail & mask]
+            self._sum_dt -= dts[tail & mask]
+            tail += 1
+        self._head, self._tail = head, tail
+        return self._sum_dist / self._sum_dt if self._sum_dt > 0 else 0.0
+
+    def update_batch(self, dist, dt):
+        """
+        Versão vetorizada de `update`: velocidades da janela para arrays inteiros
+        (somas prefixadas + `searchsorted`), continuando do conteúdo atual.
+        """
+        import numpy as np
+
+        mask = self._mask
+        stored = range(self._tail, self._head)
+        all_dist = np.concatenate(([self._dist[i & mask] for i in stored], np.asarray(dist, dtype=np.float64)))
+        all_dt = np.concatenate(([self._dt[i & mask] for i in stored], np.asarray(dt, dtype=np.float64)))
+        n = len(dist)
+        if n == 0:
+            return np.empty(0)
+        cum_dist = np.concatenate(([0.0], np.cumsum(all_dist)))
+        cum_dt = np.concatenate(([0.0], np.cumsum(all_dt)))
+        ends = np.arange(len(all_dist) - n, len(all_dist)) + 1
+        # Início de cada janela: o maior j com cum_dt[fim] - cum_dt[j] >= janela.
+        starts = np.searchsorted(cum_dt, cum_dt[ends] - self.window, side="right") - 1
+        starts = np.clip(starts, np.maximum(ends - self._capacity, 0), ends - 1)
+        span = cum_dt[ends] - cum_dt[starts]
+        speeds = np.divide(cum_dist[ends] - cum_dist[starts], span, out=np.zeros(n), where=span > 0)
+
+        self.reset()
+        for d, step in zip(all_dist[starts[-1]:].tolist(), all_dt[starts[-1]:].tolist()):
+            self.update(d, step)
+        return speeds
+
+
 class AdaptiveEMA:
-    """Implementa o filtro de Média Móvel Exponencial (EMA) adaptativo."""
-    def __init__(self, params: LinearEMAParams):
+    """
+    Implementa o filtro de Média Móvel Exponencial (EMA) adaptativo.
+
+    `curve` é uma curva de resposta opcional (`src.curves`); sem ela, o alpha
+    segue a reta de `LinearEMAParams`.
+    """
+    def __init__(self, params: LinearEMAParams, curve=None):
+        self._params = None
+        self.speed_window: SpeedWindow | None = None
         self.params = params
+        self.curve = curve
         self._sx = 0.0
         self._sy = 0.0
         self._initialized = False
 
+    @property
+    def params(self) -> LinearEMAParams:
+        return self._params
+
+    @params.setter
+    def params(self, value: LinearEMAParams) -> None:
+        """Troca os parâmetros; a janela de velocidade só é recriada se o tamanho mudar."""
+        previous = self._params
+        self._params = value
+        if previous is None or previous.speed_window_ms != value.speed_window_ms:
+            window_ms = value.speed_window_ms
+            self.speed_window = SpeedWindow(window_ms / 1000.0) if window_ms > 0 else None
+
+    def reset(self) -> None:
+        """Descarta o estado do filtro e da janela de velocidade."""
+        self._sx, self._sy, self._initialized = 0.0, 0.0, False
+        if self.speed_window is not None:
+            self.speed_window.reset()
+
+    def alpha_for_speed(self, speed: float) -> float:
+        """Alpha da curva de resposta ativa para a velocidade informada."""
+        if self.curve is None:
+            return self.params.alpha_for_speed(speed)
+        return self.curve.alpha(speed, self.params)
+
     def update(self, dx: float, dy: float, dt: float, gain: float) -> tuple[float, float]:
         """
         Atualiza o filtro com um novo delta de movimento e retorna o delta suavizado.
@@ -52,10 +215,15 @@ class AdaptiveEMA:
             # No primeiro evento, não há histórico para suavizar. Apenas inicializa.
             self._sx, self._sy, self._initialized = dx, dy, True
             return dx, dy
-        
-        speed = hypot(dx, dy) / dt
-        alpha = self.params.alpha_for_speed(speed)
+
+        window = self.speed_window
+        speed = window.update(hypot(dx, dy), dt) if window is not None else hypot(dx, dy) / dt
+        alpha = self.alpha_for_speed(speed)
         final_alpha = alpha * gain # Aplica o amortecimento extra do TremorGuard
+        p = self._params
+        if p.time_constant_mode:
+            # Converte o alpha (definido por evento à taxa de referência) para o dt real.
+            final_alpha = 1.0 - (1.0 - final_alpha) ** (dt * p.reference_rate_hz)
 
         # Fórmula do filtro EMA aplicada a cada eixo independentemente.
         # O novo valor suavizado é uma média ponderada entre o input atual e o valor suavizado anterior.
@@ -63,3 +231,46 @@ class AdaptiveEMA:
         self._sy = (final_alpha * dy) + (1.0 - final_alpha) * self._sy
         
         return self._sx, self._sy
+
+    def update_batch(self, dx, dy, dt, gain):
+        """
+        Versão vetorizada de `update` para um traço inteiro.
+
+        Recebe arrays de mesmo tamanho (dt > 0 em todas as amostras, como no hook)
+        e devolve os arrays (sx, sy) suavizados. O estado interno avança como se
+        `update` tivesse sido chamado amostra a amostra, então chamadas em lote e
+        escalares podem ser intercaladas.
+        """
+        import numpy as np
+
+        dx = np.asarray(dx, dtype=np.float64)
+        dy = np.asarray(dy, dtype=np.float64)
+        n = len(dx)
+        if n == 0:
+            return np.empty(0), np.empty(0)
+
+        dt = np.asarray(dt, dtype=np.float64)
+        dist = np.hypot(dx, dy)
+        if self.speed_window is not None:
+            speed = self.speed_window.update_batch(dist, dt)
+        else:
+            speed = dist / dt
+        if self.curve is None:
+            alpha = self.params.alpha_for_speed_batch(speed)
+        else:
+            alpha = self.curve.alpha_batch(speed, self.params)
+        final_alpha = alpha * np.asarray(gain, dtype=np.float64)
+        if self.params.time_constant_mode:
+            final_alpha = 1.0 - (1.0 - final_alpha) ** (dt * self.params.reference_rate_hz)
+
+        decay = (1.0 - final_alpha)[:, None]
+        drive = final_alpha[:, None] * np.column_stack((dx, dy))
+        if not self._initialized:
+            # Primeiro evento: passa direto e inicializa o estado, como no caminho escalar.
+            decay[0] = 0.0
+            drive[0, 0], drive[0, 1] = dx[0], dy[0]
+
+        smoothed = _linear_recurrence(np, decay, drive, np.array([self._sx, self._sy]))
+        self._sx, self._sy = float(smoothed[-1, 0]), float(smoothed[-1, 1])
+        self._initialized = True
+        return smoothed[:, 0], smoothed[:, 1]
@@ -0,0 +1,209 @@
+"""
+Linha do tempo da inicialização.
+
+Uso (portão de regressão, headless):
+    python -m src.startup [--runs 5] [--max-ms 150] [--json]
+
+`StartupTimeline` mede cada fase do `main` (tempo total e quanto dele foi gasto
+importando módulos, no estilo de um `-X importtime` resumido) e o instante em
+que o hook ficou ativo. O tempo antes do Python executar nosso código
+(inicialização do interpretador) vem da hora de criação do processo quando o
+sistema a fornece.
+
+O modo CLI mede, em processos novos, o custo de importar os módulos de que o
+`main` precisa antes de instalar o hook (`CORE_MODULES`) e falha se algum módulo
+opcional (`DEFERRED_MODULES`) for carregado nesse caminho.
+"""
+from __future__ import annotations
+
+import builtins
+import ctypes
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# O que o `main` importa antes de instalar o hook.
+CORE_MODULES = ("src.config", "src.smoothing", "src.tremor", "src.filters", "src.profiler", "src.win_hook",
+                "src.hotkeys", "src.supervisor")
+# Só devem ser carregados quando o recurso correspondente é usado.
+DEFERRED_MODULES = ("tkinter", "psutil", "win32gui", "win32process", "numpy", "argparse", "tempfile", "src.telemetry")
+
+
+def process_age_sec() -> Optional[float]:
+    """Segundos desde a criação do processo, ou None se o sistema não informar."""
+    if sys.platform == "win32":
+        kernel32 = ctypes.windll.kernel32
+        creation, exit_, kernel, user, now = (ctypes.c_ulonglong() for _ in range(5))
+        if not kernel32.GetProcessTimes(kernel32.GetCurrentProcess(), ctypes.byref(creation),
+                                        ctypes.byref(exit_), ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+        kernel32.GetSystemTimePreciseAsFileTime(ctypes.byref(now))
+        return (now.value - creation.value) / 1e7  # FILETIME: intervalos de 100 ns
+    try:
+        with open("/proc/self/stat", "r") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimeline:
+    """
+    Fases da inicialização, com o custo de importação de cada uma.
+
+    Enquanto `track_imports()` está ativo, `builtins.__import__` é envolvido: o
+    tempo de cada importação de primeiro nível (feita pela thread que criou a
+    linha do tempo) que carrega módulos novos é somado à fase corrente.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.origin = clock()
+        age = process_age_sec()
+        self.before_origin_ms = age * 1000.0 if age is not None else None
+        self.phases: list[dict] = []
+        self.marks: dict[str, float] = {}
+        self._current: Optional[dict] = None
+        self._thread = threading.get_ident()
+        self._depth = 0
+        self._original_import = None
+
+    def elapsed_ms(self) -> float:
+        return (self.clock() - self.origin) * 1000.0
+
+    @contextmanager
+    def phase(self, name: str):
+        entry = {"name": name, "ms": 0.0, "import_ms": 0.0, "modules": 0}
+        outer = self._current
+        self._current = entry
+        start = self.clock()
+        try:
+            yield entry
+        finally:
+            entry["ms"] = (self.clock() - start) * 1000.0
+            self._current = outer
+            self.phases.append(entry)
+
+    def mark(self, name: str) -> float:
+        """Registra um instante (ms desde a origem) e o retorna."""
+        self.marks[name] = self.elapsed_ms()
+        return self.marks[name]
+
+    def track_imports(self) -> None:
+        if self._original_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+        modules = sys.modules
+        clock = self.clock
+        timeline = self
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            entry = timeline._current
+            if entry is None or timeline._depth or threading.get_ident() != timeline._thread:
+                return original(name, globals, locals, fromlist, level)
+            before = len(modules)
+            timeline._depth = 1
+            start = clock()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                timeline._depth = 0
+                loaded = len(modules) - before
+                if loaded > 0:
+                    entry["import_ms"] += (clock() - start) * 1000.0
+                    entry["modules"] += loaded
+
+        builtins.__import__ = timed_import
+
+    def stop_tracking(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def as_dict(self) -> dict:
+        return {
+            "before_origin_ms": self.before_origin_ms,
+            "phases": list(self.phases),
+            "marks": dict(self.marks),
+        }
+
+    def report(self) -> None:
+        if self.before_origin_ms is not None:
+            print(f"[Início] interpretador: {self.before_origin_ms:.1f} ms até o primeiro módulo do app")
+        for entry in self.phases:
+            imports = f" (importações {entry['import_ms']:.1f} ms, {entry['modules']} módulos)" if entry["modules"] else ""
+            print(f"[Início] {entry['name']:<14} {entry['ms']:>7.1f} ms{imports}")
+        for name, at_ms in self.marks.items():
+            total = f", {at_ms + self.before_origin_ms:.1f} ms desde o lançamento" if self.before_origin_ms is not None else ""
+            print(f"[Início] {name}: {at_ms:.1f} ms{total}")
+
+
+def probe() -> dict:
+    """Importa `CORE_MODULES` como o `main` faria e lista módulos adiados carregados cedo."""
+    timeline = StartupTimeline()
+    timeline.track_imports()
+    with timeline.phase("imports"):
+        for name in CORE_MODULES:
+            __import__(name)
+    timeline.stop_tracking()
+    result = timeline.as_dict()
+    result["import_ms"] = timeline.phases[0]["ms"]
+    result["early"] = [name for name in DEFERRED_MODULES if name in sys.modules]
+    return result
+
+
+def measure(runs: int) -> list[dict]:
+    """Executa `probe` em `runs` interpretadores novos (cold start)."""
+    import json
+    import subprocess
+    from pathlib import Path
+
+    root = Path(__file__).resolve().parent.parent
+    code = "import json, src.startup as s; print(json.dumps(s.probe()))"
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+        results.append(json.loads(output.stdout.splitlines()[-1]))
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+    import json
+    import statistics
+
+    parser = argparse.ArgumentParser(prog="python -m src.startup", description="Mede o custo de inicialização até o hook.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="Falha se a mediana das importações exceder este valor.")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados em JSON.")
+    args = parser.parse_args(argv)
+
+    results = measure(max(args.runs, 1))
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    launch = [r["before_origin_ms"] for r in results if r["before_origin_ms"] is not None]
+    early = sorted({name for r in results for name in r["early"]})
+    if args.json:
+        print(json.dumps({"import_ms": import_ms, "interpreter_ms": statistics.median(launch) if launch else None,
+                          "early": early, "runs": results}, indent=2))
+    else:
+        if launch:
+            print(f"[Início] interpretador: mediana {statistics.median(launch):.1f} ms")
+        print(f"[Início] importações até o hook: mediana {import_ms:.1f} ms ({len(results)} execuções)")
+
+    failures = []
+    if early:
+        failures.append(f"módulos adiados carregados antes do hook: {', '.join(early)}")
+    if args.max_ms is not None and import_ms > args.max_ms:
+        failures.append(f"importações em {import_ms:.1f} ms acima do limite de {args.max_ms:.1f} ms")
+    for failure in failures:
+        print(f"[Início] FALHA {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Supervisor de threads do aplicativo.
+
+O hook de baixo nível (`WH_MOUSE_LL`) é atendido pela fila de mensagens da thread
+que o instalou. O `Supervisor` dá a essa fila uma thread própria ("hook-pump"),
+com prioridade alta, que instala o hook, registra as hotkeys e roda o loop
+`GetMessageW` sem fazer mais nada. Interface (assistente de calibração em Tk),
+monitor da blacklist e demais serviços ficam em outras threads:
+
+* bomba -> resto do app: `events` (`queue.Queue`) com avisos como hotkeys e saída;
+  a bomba só aplica o toggle (barato) e deixa os prints para a thread principal;
+* resto do app -> bomba: `PostThreadMessageW` (`WM_QUIT` para encerrar,
+  `WM_SUPERVISOR_CALL` para executar algo na thread do hook, ex.: reinstalá-lo).
+
+Com um estágio preditivo na cadeia, a bomba também recebe um `WM_TIMER` a cada
+`SETTLE_TIMER_MS` e chama `HookEngine.settle`, que devolve a dianteira quando o
+mouse para (um mouse parado não gera eventos para o hook fazer isso).
+
+Com o GIL, uma thread Python ocupada (ex.: o timer do Tk) ainda pode atrasar o
+callback até o próximo intervalo de troca do interpretador; por isso o
+supervisor reduz `sys.setswitchinterval` enquanto está ativo.
+"""
+from __future__ import annotations
+
+import ctypes
+import queue
+import sys
+import threading
+from ctypes import byref, wintypes
+from typing import Callable, Optional
+
+from .hotkeys import ID_QUIT_HOTKEY, ID_TOGGLE_HOTKEY
+
+if sys.platform == "win32":
+    user32 = ctypes.windll.user32
+    kernel32 = ctypes.windll.kernel32
+else:
+    user32 = None
+    kernel32 = None
+
+WM_QUIT = 0x0012
+WM_HOTKEY = 0x0312
+WM_TIMER = 0x0113
+WM_APP = 0x8000
+WM_SUPERVISOR_CALL = WM_APP + 1
+# USER_TIMER_MINIMUM: o Windows não dispara timers mais curtos que isso.
+SETTLE_TIMER_MS = 10
+
+THREAD_PRIORITIES = {
+    "normal": 0,
+    "above_normal": 1,
+    "highest": 2,
+    "time_critical": 15,
+}
+
+# Avisos publicados em `Supervisor.events`: `(tipo, dado)`. O dado de EVENT_TOGGLE
+# é o novo estado; o de EVENT_QUIT é a origem ("hotkey" ou "bomba").
+EVENT_TOGGLE = "toggle"
+EVENT_QUIT = "quit"
+EVENT_CALL = "call"
+
+
+class Supervisor:
+    """Dono da thread do hook e da fila de eventos consumida pela thread principal."""
+
+    def __init__(
+        self,
+        engine,
+        hotkeys,
+        *,
+        priority: str = "highest",
+        switch_interval_sec: Optional[float] = 0.0005,
+        user32=None,
+        kernel32=None,
+    ):
+        if priority not in THREAD_PRIORITIES:
+            raise ValueError(f"Prioridade desconhecida: {priority!r}")
+        self.engine = engine
+        self.hotkeys = hotkeys
+        self.priority = priority
+        self.switch_interval = switch_interval_sec
+        self._user32 = user32 if user32 is not None else globals()["user32"]
+        self._kernel32 = kernel32 if kernel32 is not None else globals()["kernel32"]
+        self.events: queue.Queue = queue.Queue()
+        self._calls: queue.Queue = queue.Queue()
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread: threading.Thread | None = None
+        self._thread_id = 0
+        self._previous_switch_interval: Optional[float] = None
+
+    @property
+    def pump_thread_id(self) -> int:
+        return self._thread_id
+
+    def start(self, timeout_sec: float = 5.0) -> None:
+        """Inicia a thread do hook e espera a instalação. Repassa a falha, se houver."""
+        if self._thread is not None:
+            return
+        if self.switch_interval is not None:
+            self._previous_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(self.switch_interval)
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._pump, name="hook-pump", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout_sec):
+            raise OSError("A thread do hook não respondeu a tempo.")
+        if self._error is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+            raise self._error
+
+    def stop(self) -> None:
+        """Encerra o loop da bomba (que desinstala hook e hotkeys) e restaura o GIL."""
+        if self._thread is not None:
+            if self._thread_id:
+                self._user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._previous_switch_interval is not None:
+            sys.setswitchinterval(self._previous_switch_interval)
+            self._previous_switch_interval = None
+
+    def call_in_pump(self, fn: Callable[[], None]) -> bool:
+        """Agenda `fn` na thread do hook (ex.: reinstalar o hook). False se a bomba não está ativa."""
+        if not self._thread_id:
+            return False
+        self._calls.put(fn)
+        return bool(self._user32.PostThreadMessageW(self._thread_id, WM_SUPERVISOR_CALL, 0, 0))
+
+    def post(self, fn: Callable[[], None]) -> None:
+        """Agenda `fn` na thread principal (interface, calibração, prints)."""
+        self.events.put((EVENT_CALL, fn))
+
+    def run(self, *, on_event: Optional[Callable[[str, object], None]] = None, poll_sec: float = 0.25) -> None:
+        """
+        Loop da thread principal: consome `events` até a hotkey de saída ou o fim da bomba.
+
+        Usa `get` com timeout para que Ctrl+C continue funcionando no Windows.
+        """
+        while True:
+            try:
+                kind, payload = self.events.get(timeout=poll_sec)
+            except queue.Empty:
+                if self._thread is None or not self._thread.is_alive():
+                    return
+                continue
+            if kind == EVENT_CALL:
+                try:
+                    payload()
+                except Exception as exc:  # noqa: BLE001
+                    print(f"Erro em tarefa da thread principal: {exc}")
+            elif on_event is not None:
+                on_event(kind, payload)
+            if kind == EVENT_QUIT:
+                return
+
+    def _pump(self) -> None:
+        user32 = self._user32
+        self._thread_id = self._kernel32.GetCurrentThreadId()
+        if self.priority != "normal":
+            self._kernel32.SetThreadPriority(self._kernel32.GetCurrentThread(), THREAD_PRIORITIES[self.priority])
+        msg = wintypes.MSG()
+        # Garante a fila de mensagens da thread antes que alguém use PostThreadMessageW.
+        user32.PeekMessageW(byref(msg), 0, 0, 0, 0)
+        try:
+            self.engine.install()
+            try:
+                self.hotkeys.register()
+            except BaseException:
+                self.engine.uninstall()
+                raise
+        except BaseException as exc:  # noqa: BLE001
+            self._error = exc
+            self._thread_id = 0
+            self._ready.set()
+            return
+        self._ready.set()
+        settle_timer = user32.SetTimer(None, 0, SETTLE_TIMER_MS, None) if self.engine.needs_settle else 0
+        try:
+            while user32.GetMessageW(byref(msg), 0, 0, 0) > 0:
+                if msg.message == WM_TIMER and settle_timer:
+                    self.engine.settle()
+                    continue
+                if msg.message == WM_HOTKEY:
+                    if msg.wParam == ID_TOGGLE_HOTKEY:
+                        self.events.put((EVENT_TOGGLE, self.engine.toggle_user_enabled()))
+                    elif msg.wParam == ID_QUIT_HOTKEY:
+                        self.events.put((EVENT_QUIT, "hotkey"))
+                elif msg.message == WM_SUPERVISOR_CALL:
+                    self._drain_calls()
+                user32.TranslateMessage(byref(msg))
+                user32.DispatchMessageW(byref(msg))
+        except Exception as exc:  # noqa: BLE001
+            print(f"Erro na thread do hook: {exc}")
+        finally:
+            self._thread_id = 0
+            if settle_timer:
+                user32.KillTimer(None, settle_timer)
+            self.hotkeys.unregister()
+            self.engine.uninstall()
+            self.events.put((EVENT_QUIT, "bomba"))
+
+    def _drain_calls(self) -> None:
+        while True:
+            try:
+                fn = self._calls.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                fn()
+            except Exception as exc:  # noqa: BLE001
+                print(f"Erro em tarefa da thread do hook: {exc}")
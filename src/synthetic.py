@@ -0,0 +1,137 @@
+"""
+Geradores determinísticos (com semente) de movimento sintético do mouse.
+
+Cada gerador produz a trajetória "intencional" (sem tremor) e a trajetória
+observada pelo hook: intenção + tremor fisiológico (8-12 Hz) + ruído do sensor,
+quantizada em contagens inteiras como um mouse real. Requer NumPy.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class SyntheticTrace:
+    """Traço sintético: deltas inteiros (dx, dy), tempos `t` e posição intencional."""
+    dx: np.ndarray
+    dy: np.ndarray
+    t: np.ndarray
+    clean_x: np.ndarray
+    clean_y: np.ndarray
+    name: str = "synthetic"
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+
+def _timestamps(rng: np.random.Generator, duration_sec: float, rate_hz: float) -> np.ndarray:
+    n = max(int(duration_sec * rate_hz), 2)
+    intervals = np.full(n, 1.0 / rate_hz) * rng.uniform(0.9, 1.1, n)
+    return np.cumsum(intervals)
+
+
+def _observe(
+    rng: np.random.Generator,
+    t: np.ndarray,
+    clean_x: np.ndarray,
+    clean_y: np.ndarray,
+    *,
+    tremor_px: float,
+    noise_px: float,
+    name: str,
+) -> SyntheticTrace:
+    freq = rng.uniform(8.0, 12.0)
+    phase = rng.uniform(0.0, 2 * np.pi, 2)
+    # A amplitude do tremor oscila lentamente, como em uma mão real.
+    envelope = tremor_px * (0.7 + 0.3 * np.sin(2 * np.pi * 0.3 * t + phase[0]))
+    x = clean_x + envelope * np.sin(2 * np.pi * freq * t + phase[0]) + rng.normal(0.0, noise_px, len(t))
+    y = clean_y + envelope * np.cos(2 * np.pi * freq * t + phase[1]) + rng.normal(0.0, noise_px, len(t))
+    counts_x = np.rint(x)
+    counts_y = np.rint(y)
+    dx = np.diff(counts_x, prepend=counts_x[0])
+    dy = np.diff(counts_y, prepend=counts_y[0])
+    return SyntheticTrace(dx, dy, t, clean_x, clean_y, name)
+
+
+def slow_tremor(duration_sec: float = 5.0, rate_hz: float = 1000.0, *, seed: int = 0, tremor_px: float = 1.2) -> SyntheticTrace:
+    """Mão quase parada (mirando um alvo fixo) com tremor e pequenas correções lentas."""
+    rng = np.random.default_rng(seed)
+    t = _timestamps(rng, duration_sec, rate_hz)
+    drift = np.cumsum(rng.normal(0.0, 0.02, len(t)))
+    return _observe(rng, t, drift, drift[::-1].copy(), tremor_px=tremor_px, noise_px=0.15, name="slow_tremor")
+
+
+def steady_tracking(duration_sec: float = 5.0, rate_hz: float = 1000.0, *, seed: int = 0, speed_px_s: float = 300.0) -> SyntheticTrace:
+    """Rastreamento contínuo de um alvo em movimento, com mudanças suaves de direção."""
+    rng = np.random.default_rng(seed)
+    t = _timestamps(rng, duration_sec, rate_hz)
+    heading = np.cumsum(rng.normal(0.0, 0.002, len(t))) + rng.uniform(0.0, 2 * np.pi)
+    dt = np.diff(t, prepend=0.0)
+    clean_x = np.cumsum(speed_px_s * np.cos(heading) * dt)
+    clean_y = np.cumsum(speed_px_s * np.sin(heading) * dt)
+    return _observe(rng, t, clean_x, clean_y, tremor_px=0.8, noise_px=0.15, name="steady_tracking")
+
+
+def fast_flicks(
+    duration_sec: float = 5.0,
+    rate_hz: float = 1000.0,
+    *,
+    seed: int = 0,
+    flick_px: float = 600.0,
+    flick_sec: float = 0.12,
+    rest_sec: float = 0.5,
+) -> SyntheticTrace:
+    """Repouso com tremor intercalado com flicks rápidos (perfil de velocidade em sino)."""
+    rng = np.random.default_rng(seed)
+    t = _timestamps(rng, duration_sec, rate_hz)
+    clean_x = np.zeros(len(t))
+    clean_y = np.zeros(len(t))
+    start, base_x, base_y = rest_sec, 0.0, 0.0
+    while start < t[-1]:
+        angle = rng.uniform(0.0, 2 * np.pi)
+        distance = flick_px * rng.uniform(0.5, 1.5)
+        # Perfil de posição de mínimo jerk: s(u) = 10u^3 - 15u^4 + 6u^5.
+        u = np.clip((t - start) / flick_sec, 0.0, 1.0)
+        s = 10 * u**3 - 15 * u**4 + 6 * u**5
+        active = t >= start
+        clean_x[active] = base_x + distance * np.cos(angle) * s[active]
+        clean_y[active] = base_y + distance * np.sin(angle) * s[active]
+        base_x += distance * np.cos(angle)
+        base_y += distance * np.sin(angle)
+        start += flick_sec + rest_sec * rng.uniform(0.6, 1.4)
+    return _observe(rng, t, clean_x, clean_y, tremor_px=1.0, noise_px=0.15, name="fast_flicks")
+
+
+def tremor_plus_flicks(duration_sec: float = 10.0, rate_hz: float = 1000.0, *, seed: int = 0) -> SyntheticTrace:
+    """Sessão mista: mira parada, rastreamento e flicks, em sequência."""
+    third = duration_sec / 3.0
+    parts = [
+        slow_tremor(third, rate_hz, seed=seed),
+        steady_tracking(third, rate_hz, seed=seed + 1),
+        fast_flicks(third, rate_hz, seed=seed + 2),
+    ]
+    t_offset = 0.0
+    x_offset = y_offset = 0.0
+    dx, dy, t, cx, cy = [], [], [], [], []
+    for part in parts:
+        dx.append(part.dx)
+        dy.append(part.dy)
+        t.append(part.t + t_offset)
+        cx.append(part.clean_x - part.clean_x[0] + x_offset)
+        cy.append(part.clean_y - part.clean_y[0] + y_offset)
+        t_offset = t[-1][-1]
+        x_offset, y_offset = cx[-1][-1], cy[-1][-1]
+    return SyntheticTrace(
+        np.concatenate(dx), np.concatenate(dy), np.concatenate(t),
+        np.concatenate(cx), np.concatenate(cy), "tremor_plus_flicks",
+    )
+
+
+GENERATORS = {
+    "slow_tremor": slow_tremor,
+    "steady_tracking": steady_tracking,
+    "fast_flicks": fast_flicks,
+    "tremor_plus_flicks": tremor_plus_flicks,
+}
@@ -0,0 +1,347 @@
+"""
+Telemetria ao vivo em memória compartilhada.
+
+Uso (leitor):
+    python -m src.telemetry [--path arquivo] [--watch 1.0] [--motion 10]
+
+O `TelemetryPublisher` mantém um bloco de layout fixo (`TelemetryBlock`) em um
+arquivo mapeado em memória e o atualiza no lugar, a partir de uma thread
+própria: a thread do hook nunca é tocada. Qualquer outro processo pode mapear o
+mesmo arquivo e ler o bloco diretamente. As gravações são protegidas por um
+seqlock (`sequence` ímpar durante a escrita), então o leitor repete a leitura
+até obter um bloco consistente.
+"""
+from __future__ import annotations
+
+import ctypes
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from .counters import (
+    COUNTER_ERRORS, COUNTER_EVENTS, COUNTER_HOOK_REINSTALLS, COUNTER_INJECTED, COUNTER_OVERRUNS, COUNTER_PASSTHROUGH,
+    COUNTER_WATCHDOG_RECOVERIES, COUNTER_WATCHDOG_TRIPS,
+)
+from .profiler import LatencyHistogram
+
+TELEMETRY_MAGIC = b"AIMTELEM"
+TELEMETRY_VERSION = 2
+MOTION_SLOTS = 256
+TELEMETRY_FILENAME = "aimsmoother.telemetry"
+
+
+def default_telemetry_path() -> Path:
+    """`aimsmoother.telemetry` na pasta temporária (tempfile só é importado quando usado)."""
+    import tempfile
+
+    return Path(tempfile.gettempdir()) / TELEMETRY_FILENAME
+
+
+class MotionSample(ctypes.Structure):
+    _fields_ = [("raw_dx", ctypes.c_float),
+                ("raw_dy", ctypes.c_float),
+                ("out_dx", ctypes.c_float),
+                ("out_dy", ctypes.c_float),
+                ("t", ctypes.c_double)]
+
+
+class TelemetryBlock(ctypes.Structure):
+    """Layout fixo do bloco compartilhado (versão `TELEMETRY_VERSION`)."""
+    _fields_ = [("magic", ctypes.c_char * 8),
+                ("version", ctypes.c_uint32),
+                ("sequence", ctypes.c_uint32),
+                ("updated_at", ctypes.c_double),
+                ("publishes", ctypes.c_uint64),
+                # Estado do engine.
+                ("state", ctypes.c_int32),
+                ("user_enabled", ctypes.c_uint32),
+                ("pause_reasons", ctypes.c_char * 64),
+                # Contadores acumulados.
+                ("events", ctypes.c_uint64),
+                ("injected", ctypes.c_uint64),
+                ("passthrough", ctypes.c_uint64),
+                ("errors", ctypes.c_uint64),
+                ("overruns", ctypes.c_uint64),
+                ("watchdog_trips", ctypes.c_uint64),
+                ("watchdog_recoveries", ctypes.c_uint64),
+                ("hook_reinstalls", ctypes.c_uint64),
+                ("dropped_profiler", ctypes.c_uint64),
+                ("dropped_scheduler", ctypes.c_uint64),
+                # Parâmetros publicados.
+                ("v_min", ctypes.c_double),
+                ("v_max", ctypes.c_double),
+                ("alpha_min", ctypes.c_double),
+                ("alpha_max", ctypes.c_double),
+                ("jitter_deadzone_px", ctypes.c_double),
+                ("jitter_speed_max", ctypes.c_double),
+                ("extra_damp_factor", ctypes.c_double),
+                # Latência do callback (histograma acumulado do profiler), em µs.
+                ("latency_count", ctypes.c_uint64),
+                ("latency_p50_us", ctypes.c_double),
+                ("latency_p90_us", ctypes.c_double),
+                ("latency_p99_us", ctypes.c_double),
+                ("latency_p999_us", ctypes.c_double),
+                ("latency_max_us", ctypes.c_double),
+                # Últimos deltas brutos/filtrados, do mais antigo ao mais recente.
+                ("motion_total", ctypes.c_uint64),
+                ("motion_count", ctypes.c_uint32),
+                ("motion_capacity", ctypes.c_uint32),
+                ("motion", MotionSample * MOTION_SLOTS)]
+
+
+_SEQUENCE = struct.Struct("<I")
+
+
+class MotionTap:
+    """
+    Buffer circular de difusão com os últimos deltas brutos e filtrados.
+
+    O produtor (hook ou agendador de saída) nunca bloqueia nem descarta: ele
+    sobrescreve as amostras mais antigas. Os leitores copiam as amostras e
+    descartam as que foram sobrescritas durante a cópia.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self.capacity = capacity
+        self._mask = capacity - 1
+        zeros = bytes(8 * capacity)
+        self._raw_dx = array("d", zeros)
+        self._raw_dy = array("d", zeros)
+        self._out_dx = array("d", zeros)
+        self._out_dy = array("d", zeros)
+        self._t = array("d", zeros)
+        self.head = 0  # escrito apenas pelo produtor
+
+    def push(self, raw_dx: float, raw_dy: float, out_dx: float, out_dy: float, t: float) -> None:
+        index = self.head & self._mask
+        self._raw_dx[index] = raw_dx
+        self._raw_dy[index] = raw_dy
+        self._out_dx[index] = out_dx
+        self._out_dy[index] = out_dy
+        self._t[index] = t
+        self.head += 1
+
+    def read_since(self, start: int, limit: Optional[int] = None) -> tuple[int, list[tuple[float, float, float, float, float]]]:
+        """
+        Amostras com índice >= `start` ainda disponíveis (no máximo `limit`, as mais recentes).
+
+        Retorna `(próximo_start, amostras)`; amostras perdidas por sobrescrita são puladas.
+        """
+        head = self.head
+        first = max(start, head - self.capacity)
+        if limit is not None:
+            first = max(first, head - limit)
+        mask = self._mask
+        samples = [
+            (self._raw_dx[i & mask], self._raw_dy[i & mask], self._out_dx[i & mask], self._out_dy[i & mask], self._t[i & mask])
+            for i in range(first, head)
+        ]
+        # O produtor pode ter sobrescrito o início durante a cópia (inclusive o
+        # slot que ele está gravando agora, antes de avançar `head`).
+        overwritten = self.head + 1 - self.capacity - first
+        if overwritten > 0:
+            samples = samples[overwritten:]
+        return head, samples
+
+    def latest(self, count: int) -> list[tuple[float, float, float, float, float]]:
+        """As `count` amostras mais recentes, da mais antiga à mais nova."""
+        return self.read_since(0, count)[1]
+
+
+class TelemetryPublisher:
+    """
+    Atualiza o bloco de telemetria a cada `interval_sec` a partir de uma thread própria.
+
+    Lê os contadores do engine (`HookEngine.counters`), os parâmetros publicados,
+    os percentis do profiler e o `MotionTap`, sem nenhuma cooperação do hook.
+    """
+
+    def __init__(self, engine, path: Optional[Path] = None, *, interval_sec: float = 0.05):
+        self.engine = engine
+        self.path = Path(path) if path is not None else default_telemetry_path()
+        self.interval = max(interval_sec, 0.005)
+        size = ctypes.sizeof(TelemetryBlock)
+        self._file = open(self.path, "w+b")
+        self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._block = TelemetryBlock.from_buffer(self._mm)
+        self._block.magic = TELEMETRY_MAGIC
+        self._block.version = TELEMETRY_VERSION
+        self._block.motion_capacity = MOTION_SLOTS
+        self._latency = LatencyHistogram()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def publish(self) -> None:
+        """Copia o estado atual para o bloco compartilhado sob o seqlock."""
+        engine = self.engine
+        block = self._block
+        counters = engine.counters
+        ema, tremor = engine.ema.params, engine.tremor.p
+        profiler = engine.profiler
+        scheduler = engine.scheduler
+        tap = engine.motion_tap
+        # Acumulado + intervalo corrente, para não esperar o próximo relatório do profiler.
+        total = self._latency
+        total.reset()
+        total.merge(profiler.total)
+        total.merge(profiler.interval)
+        motion = tap.latest(MOTION_SLOTS) if tap is not None else []
+
+        block.sequence += 1
+        block.updated_at = time.time()
+        block.publishes += 1
+        block.state = engine.state
+        block.user_enabled = 1 if engine.user_enabled else 0
+        block.pause_reasons = ",".join(sorted(engine.pause_reasons)).encode("utf-8")[:63]
+        block.events = counters[COUNTER_EVENTS]
+        block.injected = counters[COUNTER_INJECTED]
+        block.passthrough = counters[COUNTER_PASSTHROUGH]
+        block.errors = counters[COUNTER_ERRORS]
+        block.overruns = counters[COUNTER_OVERRUNS]
+        block.watchdog_trips = counters[COUNTER_WATCHDOG_TRIPS]
+        block.watchdog_recoveries = counters[COUNTER_WATCHDOG_RECOVERIES]
+        block.hook_reinstalls = counters[COUNTER_HOOK_REINSTALLS]
+        block.dropped_profiler = profiler.dropped
+        block.dropped_scheduler = scheduler.dropped if scheduler is not None else 0
+        block.v_min, block.v_max = ema.v_min, ema.v_max
+        block.alpha_min, block.alpha_max = ema.alpha_min, ema.alpha_max
+        block.jitter_deadzone_px = tremor.jitter_deadzone_px
+        block.jitter_speed_max = tremor.jitter_speed_max
+        block.extra_damp_factor = tremor.extra_damp_factor
+        block.latency_count = total.count
+        block.latency_p50_us = total.percentile(0.5)
+        block.latency_p90_us = total.percentile(0.9)
+        block.latency_p99_us = total.percentile(0.99)
+        block.latency_p999_us = total.percentile(0.999)
+        block.latency_max_us = total.max_us
+        block.motion_total = tap.head if tap is not None else 0
+        block.motion_count = len(motion)
+        slots = block.motion
+        for slot, (raw_dx, raw_dy, out_dx, out_dy, t) in zip(slots, motion):
+            slot.raw_dx, slot.raw_dy, slot.out_dx, slot.out_dy, slot.t = raw_dx, raw_dy, out_dx, out_dy, t
+        block.sequence += 1
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def close(self) -> None:
+        """Para a thread, publica o estado final e libera o mapeamento."""
+        self.stop()
+        if self._mm is None:
+            return
+        self.publish()
+        del self._block
+        self._mm.close()
+        self._file.close()
+        self._mm = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except Exception as exc:  # noqa: BLE001
+                print(f"Erro ao publicar a telemetria: {exc}")
+
+
+def read_block(buffer, *, retries: int = 1000) -> TelemetryBlock:
+    """
+    Lê uma cópia consistente do bloco a partir de um buffer mapeado.
+
+    Repete a leitura enquanto o escritor estiver no meio de uma atualização.
+    """
+    offset = TelemetryBlock.sequence.offset
+    for _ in range(retries):
+        (before,) = _SEQUENCE.unpack_from(buffer, offset)
+        if before & 1:
+            continue
+        block = TelemetryBlock.from_buffer_copy(buffer)
+        if block.sequence == before:
+            if block.magic != TELEMETRY_MAGIC or block.version != TELEMETRY_VERSION:
+                raise ValueError("Bloco de telemetria com assinatura ou versão incompatível.")
+            return block
+    raise TimeoutError("O bloco de telemetria não estabilizou durante a leitura.")
+
+
+def format_block(block: TelemetryBlock, motion: int = 0) -> str:
+    state_names = {0: "passthrough", 1: "suavizando", 2: "calibração", 3: "agendado"}
+    age = time.time() - block.updated_at
+    lines = [
+        f"[Telemetria] estado={state_names.get(block.state, block.state)} "
+        f"usuário={'ligado' if block.user_enabled else 'desligado'} "
+        f"pausas={block.pause_reasons.decode('utf-8') or '-'} (atualizado há {age * 1000:.0f} ms)",
+        f"[Telemetria] eventos={block.events} injeções={block.injected} passthrough={block.passthrough} "
+        f"erros={block.errors} descartes(profiler={block.dropped_profiler}, saída={block.dropped_scheduler})",
+        f"[Telemetria] watchdog: acima do orçamento={block.overruns} disparos={block.watchdog_trips} "
+        f"recuperações={block.watchdog_recoveries} reinstalações do hook={block.hook_reinstalls}",
+        f"[Telemetria] v_min={block.v_min:g} v_max={block.v_max:g} alpha_min={block.alpha_min:g} "
+        f"alpha_max={block.alpha_max:g} deadzone={block.jitter_deadzone_px:g} "
+        f"jitter_speed_max={block.jitter_speed_max:g} damp={block.extra_damp_factor:g}",
+        f"[Telemetria] latência ({block.latency_count} amostras): p50={block.latency_p50_us:.1f} "
+        f"p90={block.latency_p90_us:.1f} p99={block.latency_p99_us:.1f} p99.9={block.latency_p999_us:.1f} "
+        f"máx={block.latency_max_us:.1f} µs",
+    ]
+    count = min(motion, block.motion_count)
+    for sample in block.motion[block.motion_count - count: block.motion_count]:
+        lines.append(
+            f"[Telemetria]   t={sample.t:.4f} bruto=({sample.raw_dx:+.0f}, {sample.raw_dy:+.0f}) "
+            f"filtrado=({sample.out_dx:+.2f}, {sample.out_dy:+.2f})"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    # Importado aqui: o engine importa este módulo antes de instalar o hook.
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m src.telemetry", description="Lê a telemetria ao vivo do AimSmoother.")
+    parser.add_argument("--path", type=Path, default=default_telemetry_path())
+    parser.add_argument("--watch", type=float, default=0.0, help="Reimprime a cada N segundos (0 = uma vez).")
+    parser.add_argument("--motion", type=int, default=0, help="Quantidade de deltas recentes a exibir.")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < ctypes.sizeof(TelemetryBlock):
+                print(f"[Telemetria] '{args.path}' não contém um bloco de telemetria.", file=sys.stderr)
+                return 1
+            mm = mmap.mmap(f.fileno(), ctypes.sizeof(TelemetryBlock), access=mmap.ACCESS_READ)
+    except OSError as exc:
+        print(f"[Telemetria] Não foi possível abrir '{args.path}' ({exc}).", file=sys.stderr)
+        return 1
+
+    try:
+        while True:
+            print(format_block(read_block(mm), args.motion))
+            if args.watch <= 0:
+                return 0
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        return 0
+    except (ValueError, TimeoutError) as exc:
+        print(f"[Telemetria] {exc}", file=sys.stderr)
+        return 1
+    finally:
+        mm.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterator, Union
+
+# Formato binário de traços (.aimtrace):
+#   cabeçalho de 16 bytes: magic (8s), versão (H), tamanho do registro (H), reservado (I)
+#   registros de 16 bytes: dx (int32), dy (int32), t (float64, segundos de perf_counter)
+# Tudo em little-endian. O número de registros é derivado do tamanho do arquivo.
+TRACE_MAGIC = b"AIMTRACE"
+TRACE_VERSION = 1
+HEADER = struct.Struct("<8sHHI")
+RECORD = struct.Struct("<iid")
+
+PathLike = Union[str, Path]
+
+
+class TraceRecorder:
+    """
+    Grava amostras brutas (dx, dy, t) do hook em um arquivo mapeado em memória.
+
+    O custo por evento é um `pack_into` em um buffer pré-alocado; quando o buffer
+    enche, ele é copiado de uma vez para o mapeamento (um memcpy, sem syscalls,
+    exceto quando o arquivo precisa crescer). Deve ser alimentado por uma única
+    thread (a do hook).
+    """
+
+    def __init__(self, path: PathLike, *, buffer_records: int = 4096, chunk_records: int = 262144):
+        self.path = Path(path)
+        self._record_size = RECORD.size
+        self._buf = bytearray(max(buffer_records, 1) * self._record_size)
+        self._buf_view = memoryview(self._buf)
+        self._capacity = len(self._buf)
+        self._offset = 0
+        self._chunk_bytes = max(chunk_records, buffer_records) * self._record_size
+        self._pack = RECORD.pack_into
+        self.records = 0
+
+        self._file = open(self.path, "w+b")
+        self._file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size, 0))
+        self._file.truncate(HEADER.size + self._chunk_bytes)
+        self._file.flush()
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self._written = HEADER.size
+
+    def record(self, dx: int, dy: int, t: float) -> None:
+        """Registra uma amostra. Chamado no caminho quente do hook."""
+        self._pack(self._buf, self._offset, dx, dy, t)
+        self._offset += self._record_size
+        if self._offset == self._capacity:
+            self.flush()
+
+    def flush(self) -> None:
+        """Copia o buffer pendente para o arquivo mapeado, crescendo-o se necessário."""
+        n = self._offset
+        if n == 0 or self._mm is None:
+            return
+        end = self._written + n
+        if end > len(self._mm):
+            self._mm.resize(end + self._chunk_bytes)
+        self._mm[self._written:end] = self._buf_view[:n]
+        self._written = end
+        self.records += n // self._record_size
+        self._offset = 0
+
+    def close(self) -> None:
+        """Descarrega o buffer e ajusta o arquivo ao tamanho exato dos registros gravados."""
+        if self._mm is None:
+            return
+        self.flush()
+        self._mm.flush()
+        self._mm.close()
+        self._mm = None
+        self._file.truncate(self._written)
+        self._file.close()
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _check_header(buf) -> None:
+    if len(buf) < HEADER.size:
+        raise ValueError("Arquivo de traço truncado: cabeçalho incompleto.")
+    magic, version, record_size, _ = HEADER.unpack_from(buf, 0)
+    if magic != TRACE_MAGIC:
+        raise ValueError("Arquivo não é um traço do AimSmoother (magic inválido).")
+    if version != TRACE_VERSION or record_size != RECORD.size:
+        raise ValueError(f"Versão de traço não suportada: v{version} (registro de {record_size} bytes).")
+
+
+def iter_trace(path: PathLike) -> Iterator[tuple[int, int, float]]:
+    """Itera sobre os registros (dx, dy, t) de um arquivo de traço."""
+    with open(path, "rb") as f:
+        data = f.read()
+    _check_header(data)
+    usable = (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    yield from RECORD.iter_unpack(memoryview(data)[HEADER.size:HEADER.size + usable])
+
+
+def load_trace(path: PathLike) -> list[tuple[int, int, float]]:
+    """Carrega todos os registros de um traço em memória."""
+    return list(iter_trace(path))
+
+
+def load_trace_arrays(path: PathLike):
+    """
+    Carrega um traço como arrays NumPy (dx, dy, t), sem laço em Python.
+
+    Requer NumPy; útil para as entradas em lote dos filtros.
+    """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        data = f.read()
+    _check_header(data)
+    count = (len(data) - HEADER.size) // RECORD.size
+    dtype = np.dtype([("dx", "<i4"), ("dy", "<i4"), ("t", "<f8")])
+    records = np.frombuffer(data, dtype=dtype, count=count, offset=HEADER.size)
+    return records["dx"].astype(np.float64), records["dy"].astype(np.float64), records["t"].copy()
@@ -2,9 +2,9 @@
 from dataclasses import dataclass
 from math import hypot
 
-@dataclass
+@dataclass(frozen=True)
 class TremorParams:
-    """Armazena os parâmetros de configuração para o filtro de tremor."""
+    """Armazena os parâmetros de configuração para o filtro de tremor (imutável)."""
     jitter_deadzone_px: float
     jitter_speed_max: float
     extra_damp_factor: float
@@ -44,3 +44,27 @@ class TremorGuard:
             gain_extra = 1.0 - self.p.extra_damp_factor
             
         return dx, dy, gain_extra
+
+    def preprocess_batch(self, dx, dy, dt):
+        """
+        Versão vetorizada (NumPy) de `preprocess` para um traço inteiro.
+
+        Returns:
+            Uma tupla de arrays (dx, dy, gain), com a mesma semântica do caminho
+            escalar amostra a amostra (incluindo dt <= 0, que passa intacto).
+        """
+        import numpy as np
+
+        dx = np.asarray(dx, dtype=np.float64)
+        dy = np.asarray(dy, dtype=np.float64)
+        dt = np.asarray(dt, dtype=np.float64)
+
+        valid = dt > 0
+        dist = np.hypot(dx, dy)
+        speed = np.divide(dist, dt, out=np.zeros_like(dist), where=valid)
+
+        dead = valid & (speed < self.p.jitter_speed_max) & (dist < self.p.jitter_deadzone_px)
+        out_dx = np.where(dead, 0.0, dx)
+        out_dy = np.where(dead, 0.0, dy)
+        gain = np.where(valid & (speed < 50.0), 1.0 - self.p.extra_damp_factor, 1.0)
+        return out_dx, out_dy, gain
@@ -0,0 +1,174 @@
+"""
+Ajuste automático e offline dos parâmetros de suavização.
+
+Uso:
+    python -m src.tune [--traces arquivo ...] [--synthetic N] [--candidates 400] [--top 5] [--out pasta]
+
+Busca combinações dos parâmetros de `SEARCH_SPACE` (EMA e TremorGuard, sobre o
+resto da configuração base: curva, cadeia de filtros etc.) em um conjunto de
+traços (arquivos .aimtrace, CSV `dx,dy,t` ou NumPy `.npy` com colunas dx, dy, t)
+e/ou sessões sintéticas de tremor + flicks. Cada candidato é pontuado pela
+supressão de jitter contra o atraso adicionado (métricas de `src.analysis`),
+usando todos os núcleos via um pool de processos, e os melhores são gravados
+como candidatos a `defaults.json`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .analysis import GRID_RATE_HZ, jitter_energy, lag_ms, load_input_trace, uniform_positions
+from .config import (
+    ema_params_from_config, filter_chain_from_config, read_config, response_curve_from_config,
+    tremor_params_from_config,
+)
+from .replay import filter_arrays
+from .smoothing import AdaptiveEMA
+from .synthetic import tremor_plus_flicks
+from .tremor import TremorGuard
+
+# Intervalos de busca (mínimo, máximo) de cada parâmetro.
+SEARCH_SPACE: dict[str, tuple[float, float]] = {
+    "v_min": (0.0, 300.0),
+    "v_max": (300.0, 3000.0),
+    "alpha_min": (0.02, 0.30),
+    "alpha_max": (0.40, 1.00),
+    "jitter_deadzone_px": (0.0, 1.5),
+    "jitter_speed_max": (50.0, 400.0),
+    "extra_damp_factor": (0.0, 0.8),
+}
+PARAM_KEYS = tuple(SEARCH_SPACE)
+
+
+def score_candidate(params: dict, traces: list, lag_weight: float, base: Optional[dict] = None) -> dict:
+    """
+    Pontua um candidato em todos os traços. Menor `score` é melhor.
+
+    Os filtros são montados a partir de `base` com os parâmetros do candidato
+    (curva de resposta, modo de constante de tempo, janela de velocidade e
+    `filter_chain` incluídos), ou seja, a mesma configuração que será gravada
+    e usada pelo hook, e passam pela mesma cadeia de `analysis.analyze_trace`.
+    """
+    cfg = {**(base or {}), **params}
+    jitter_ratios, lags = [], []
+    for dx, dy, t in traces:
+        tremor = TremorGuard(tremor_params_from_config(cfg))
+        ema = AdaptiveEMA(ema_params_from_config(cfg), response_curve_from_config(cfg))
+        chain = filter_chain_from_config(cfg, tremor, ema)
+        t_kept, raw_dx, raw_dy, ox, oy = filter_arrays(dx, dy, t, tremor, ema, chain=chain)
+        if len(t_kept) < 4:
+            continue
+        grid = np.arange(t_kept[0], t_kept[-1], 1.0 / GRID_RATE_HZ)
+        rx, ry = uniform_positions(t_kept, raw_dx, raw_dy, grid)
+        fx, fy = uniform_positions(t_kept, ox, oy, grid)
+        raw_jitter = jitter_energy(rx, ry)
+        jitter_ratios.append(jitter_energy(fx, fy) / raw_jitter if raw_jitter else 1.0)
+        lags.append(lag_ms(np.diff(rx), np.diff(ry), np.diff(fx), np.diff(fy)))
+    jitter_ratio = float(np.mean(jitter_ratios)) if jitter_ratios else 1.0
+    lag = float(np.mean(lags)) if lags else 0.0
+    return {"params": params, "jitter_ratio": jitter_ratio, "lag_ms": lag, "score": jitter_ratio + lag_weight * lag}
+
+
+def sample_candidates(rng: np.random.Generator, count: int, base: dict) -> list[dict]:
+    """Sorteia candidatos dentro de `SEARCH_SPACE`; o primeiro é sempre a configuração atual."""
+    candidates = [{key: float(base[key]) for key in PARAM_KEYS}]
+    while len(candidates) < count:
+        candidate = {key: float(rng.uniform(low, high)) for key, (low, high) in SEARCH_SPACE.items()}
+        if candidate["v_max"] < candidate["v_min"] + 50.0 or candidate["alpha_max"] < candidate["alpha_min"]:
+            continue
+        candidates.append({key: round(value, 4) for key, value in candidate.items()})
+    return candidates
+
+
+_worker_traces: list = []
+_worker_lag_weight = 0.0
+_worker_base: dict = {}
+
+
+def _init_worker(traces: list, lag_weight: float, base: dict) -> None:
+    global _worker_traces, _worker_lag_weight, _worker_base
+    _worker_traces = traces
+    _worker_lag_weight = lag_weight
+    _worker_base = base
+
+
+def _evaluate(params: dict) -> dict:
+    return score_candidate(params, _worker_traces, _worker_lag_weight, _worker_base)
+
+
+def tune(
+    traces: list, candidates: list[dict], *, lag_weight: float, base: Optional[dict] = None, workers: Optional[int] = None,
+) -> list[dict]:
+    """Avalia todos os candidatos (sobre a configuração `base`) em paralelo e devolve os resultados em ordem de pontuação."""
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(candidates) // (workers * 4))
+    initargs = (traces, lag_weight, base or {})
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        results = list(pool.map(_evaluate, candidates, chunksize=chunksize))
+    return sorted(results, key=lambda r: r["score"])
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.tune", description="Ajuste offline dos parâmetros de suavização.")
+    parser.add_argument("--traces", nargs="*", type=Path, default=[], help="Traços .aimtrace, .csv (dx,dy,t) ou .npy.")
+    parser.add_argument("--synthetic", type=int, default=0, help="Quantidade de sessões sintéticas de tremor + flicks.")
+    parser.add_argument("--synthetic-rate", type=float, default=1000.0, help="Taxa de polling das sessões sintéticas (Hz).")
+    parser.add_argument("--candidates", type=int, default=400)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--lag-weight", type=float, default=0.05, help="Peso de cada ms de atraso na pontuação.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", type=Path, default=None, help="Configuração base (padrão: config/defaults.json).")
+    parser.add_argument("--out", type=Path, default=None, help="Pasta onde gravar os melhores candidatos.")
+    args = parser.parse_args(argv)
+
+    base = read_config(args.config)
+    traces = []
+    for path in args.traces:
+        try:
+            traces.append(load_input_trace(path))
+        except (OSError, ValueError) as exc:
+            print(f"[Tune] {path}: ignorado ({exc})", file=sys.stderr)
+    synthetic = args.synthetic if args.synthetic or traces else 4
+    for i in range(synthetic):
+        session = tremor_plus_flicks(rate_hz=args.synthetic_rate, seed=args.seed + i)
+        traces.append((session.dx, session.dy, session.t))
+    if not traces:
+        print("[Tune] Nenhum traço disponível.", file=sys.stderr)
+        return 1
+
+    rng = np.random.default_rng(args.seed)
+    candidates = sample_candidates(rng, max(args.candidates, 1), base)
+    started = time.perf_counter()
+    results = tune(traces, candidates, lag_weight=args.lag_weight, base=base, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"[Tune] {len(candidates)} candidatos x {len(traces)} traços em {elapsed:.1f}s")
+
+    baseline = next(r for r in results if r["params"] == candidates[0])
+    print(f"[Tune] Configuração atual: score={baseline['score']:.4f} jitter={baseline['jitter_ratio']:.4f} atraso={baseline['lag_ms']:.1f} ms")
+    for rank, result in enumerate(results[: args.top], start=1):
+        params = ", ".join(f"{key}={value}" for key, value in result["params"].items())
+        print(f"[Tune] #{rank}: score={result['score']:.4f} jitter={result['jitter_ratio']:.4f} "
+              f"atraso={result['lag_ms']:.1f} ms | {params}")
+
+    if args.out is not None:
+        args.out.mkdir(parents=True, exist_ok=True)
+        for rank, result in enumerate(results[: args.top], start=1):
+            with open(args.out / f"candidate-{rank:02d}.json", "w", encoding="utf-8") as f:
+                json.dump({**base, **result["params"]}, f, indent=2)
+        with open(args.out / "ranking.json", "w", encoding="utf-8") as f:
+            json.dump(results[: args.top], f, indent=2)
+        print(f"[Tune] Candidatos gravados em '{args.out}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Fluxo decimado de movimento para gráficos ao vivo (painel de controle).
+
+O `VisualizationFeed` lê o `MotionTap` do engine a partir de uma thread própria,
+agrupa os deltas brutos e filtrados em baldes de tempo fixos (`bucket_hz`) e
+guarda, por balde, mínimo/máximo/média de cada canal em arrays NumPy
+pré-alocados. A interface sempre recebe `history_sec * bucket_hz` pontos, seja
+o mouse de 125 Hz ou de 8 kHz, e nunca toca a thread do hook. Requer NumPy.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from .smoothing import AdaptiveEMA
+from .telemetry import MotionTap
+from .tremor import TremorGuard
+
+CHANNELS = ("raw_dx", "raw_dy", "out_dx", "out_dy")
+STATS = ("min", "max", "mean")
+
+
+class VisualizationFeed:
+    """
+    Reduz o fluxo do `MotionTap` a min/máx/média por balde de `1 / bucket_hz` s.
+
+    `update()` (chamado pela thread do feed a `display_hz`) fecha os baldes cujo
+    fim já passou; intervalos sem movimento viram baldes vazios (zeros), então o
+    eixo do tempo fica contínuo. `frame()` devolve cópias prontas para plotar.
+    """
+
+    def __init__(
+        self,
+        tap: MotionTap,
+        *,
+        display_hz: float = 30.0,
+        bucket_hz: float = 120.0,
+        history_sec: float = 10.0,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.tap = tap
+        self.display_interval = 1.0 / max(display_hz, 1.0)
+        self.bucket_hz = max(bucket_hz, 1.0)
+        self.clock = clock
+        self.size = max(int(history_sec * self.bucket_hz), 1)
+        self.lost = 0  # amostras sobrescritas no tap antes de serem lidas
+        self.late = 0  # amostras que chegaram depois de o balde ser fechado
+
+        size = self.size
+        self._t = np.zeros(size)
+        self._count = np.zeros(size, dtype=np.int64)
+        self._stats = {stat: np.zeros((size, len(CHANNELS))) for stat in STATS}
+        self._cursor = tap.head
+        self._carry = np.empty((0, 5))
+        self._next_bucket: Optional[int] = None
+        self._written = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def update(self) -> int:
+        """Drena o tap e fecha os baldes completos. Retorna quantos baldes foram fechados."""
+        head, samples = self.tap.read_since(self._cursor)
+        self.lost += (head - self._cursor) - len(samples)
+        self._cursor = head
+        data = np.array(samples, dtype=np.float64).reshape(-1, 5)
+        if len(self._carry):
+            data = np.concatenate((self._carry, data))
+
+        closed_until = int(np.floor(self.clock() * self.bucket_hz))
+        if self._next_bucket is None:
+            self._next_bucket = closed_until
+        first = self._next_bucket
+        if closed_until <= first:
+            self._carry = data
+            return 0
+        if closed_until - first > self.size:
+            first = closed_until - self.size
+
+        ids = np.floor(data[:, 4] * self.bucket_hz).astype(np.int64)
+        self._carry = data[ids >= closed_until]
+        keep = (ids >= first) & (ids < closed_until)
+        self.late += int(np.count_nonzero(ids < first))
+        data, ids = data[keep], ids[keep]
+
+        rows = np.arange(first, closed_until) % self.size
+        with self._lock:
+            self._t[rows] = np.arange(first, closed_until) / self.bucket_hz
+            self._count[rows] = 0
+            for values in self._stats.values():
+                values[rows] = 0.0
+            if len(ids):
+                starts = np.concatenate(([0], np.flatnonzero(np.diff(ids)) + 1))
+                bucket_rows = ids[starts] % self.size
+                channels = data[:, :4]
+                counts = np.diff(np.append(starts, len(ids)))
+                self._count[bucket_rows] = counts
+                self._stats["min"][bucket_rows] = np.minimum.reduceat(channels, starts)
+                self._stats["max"][bucket_rows] = np.maximum.reduceat(channels, starts)
+                self._stats["mean"][bucket_rows] = np.add.reduceat(channels, starts) / counts[:, None]
+            self._next_bucket = closed_until
+            self._written += closed_until - first
+        return closed_until - first
+
+    def frame(self) -> dict[str, np.ndarray]:
+        """
+        Baldes fechados, do mais antigo ao mais recente.
+
+        Chaves: `t` (início do balde, mesmo relógio do hook), `count` (eventos no
+        balde) e `<canal>_<estatística>` para cada canal de `CHANNELS` e
+        estatística de `STATS` (ex.: `out_dx_mean`).
+        """
+        with self._lock:
+            filled = min(self._written, self.size)
+            end = self._next_bucket if self._next_bucket is not None else 0
+            rows = np.arange(end - filled, end) % self.size
+            frame = {"t": self._t[rows], "count": self._count[rows]}
+            for stat, values in self._stats.items():
+                selected = values[rows]
+                for column, channel in enumerate(CHANNELS):
+                    frame[f"{channel}_{stat}"] = selected[:, column]
+        return frame
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="viz-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.display_interval):
+            try:
+                self.update()
+            except Exception as exc:  # noqa: BLE001
+                print(f"Erro no fluxo de visualização: {exc}")
+
+
+def curve_arrays(
+    ema: AdaptiveEMA,
+    tremor: Optional[TremorGuard] = None,
+    *,
+    points: int = 256,
+    v_max: Optional[float] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Curva velocidade -> alpha atual, pronta para plotar.
+
+    Retorna `v`, `alpha` (curva de resposta) e, com `tremor`, `alpha_effective`
+    com o amortecimento extra do TremorGuard aplicado abaixo de 50 px/s.
+    """
+    params = ema.params
+    if v_max is None:
+        saturation = ema.curve.saturation_speed(params) if ema.curve is not None else params.v_max
+        v_max = max(saturation * 1.25, 100.0)
+    v = np.linspace(0.0, v_max, max(points, 2))
+    if ema.curve is not None:
+        alpha = np.asarray(ema.curve.alpha_batch(v, params), dtype=np.float64)
+    else:
+        alpha = params.alpha_for_speed_batch(v)
+    arrays = {"v": v, "alpha": alpha}
+    if tremor is not None:
+        arrays["alpha_effective"] = np.where(v < 50.0, alpha * (1.0 - tremor.p.extra_damp_factor), alpha)
+    return arrays
@@ -0,0 +1,207 @@
+"""
+Watchdog do callback do hook.
+
+O hook só mede e conta (`COUNTER_OVERRUNS` para callbacks acima do orçamento,
+`COUNTER_ERRORS` para exceções); toda a decisão fica na thread do
+`HookWatchdog`, que a cada `interval_sec` compara os contadores com a leitura
+anterior:
+
+* disjuntor: se a fração de callbacks acima do orçamento passar de
+  `overrun_ratio` por `trip_after` verificações seguidas, ou se houver
+  `error_storm` erros em uma verificação, o engine é pausado com o motivo
+  "watchdog" (pipeline passthrough, que só acompanha a posição e chama
+  `CallNextHookEx`). Depois de `probe_after_sec` a suavização é religada como
+  teste; se a primeira verificação com eventos ainda estiver ruim, o disjuntor
+  abre de novo com o dobro da espera
+  (até `max_probe_after_sec`), senão conta uma recuperação;
+* vivacidade: o Windows remove em silêncio um hook que estoura o
+  `LowLevelHooksTimeout`. Se o cursor continua se movendo por
+  `liveness_timeout_sec` sem que o hook veja nenhum evento, o hook é
+  reinstalado na thread da bomba de mensagens.
+
+Disparos, recuperações e reinstalações ficam em `HookEngine.counters` (e, por
+eles, na telemetria).
+"""
+from __future__ import annotations
+
+import ctypes
+import threading
+import time
+from ctypes import wintypes
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .counters import (
+    COUNTER_ERRORS, COUNTER_EVENTS, COUNTER_HOOK_REINSTALLS, COUNTER_OVERRUNS, COUNTER_PASSTHROUGH,
+    COUNTER_WATCHDOG_RECOVERIES, COUNTER_WATCHDOG_TRIPS,
+)
+
+PAUSE_REASON = "watchdog"
+
+
+@dataclass(frozen=True)
+class WatchdogParams:
+    budget_us: float = 500.0
+    interval_sec: float = 0.25
+    overrun_ratio: float = 0.5
+    min_events: int = 20
+    trip_after: int = 4
+    error_storm: int = 20
+    probe_after_sec: float = 5.0
+    max_probe_after_sec: float = 120.0
+    liveness_timeout_sec: float = 2.0
+
+
+def cursor_position(user32) -> Callable[[], Optional[tuple[int, int]]]:
+    """Leitor de `GetCursorPos` para a verificação de vivacidade."""
+    point = wintypes.POINT()
+    ref = ctypes.byref(point)
+
+    def read() -> Optional[tuple[int, int]]:
+        if not user32.GetCursorPos(ref):
+            return None
+        return point.x, point.y
+
+    return read
+
+
+class HookWatchdog:
+    """Disjuntor e verificação de vivacidade do hook, em uma thread própria."""
+
+    def __init__(
+        self,
+        engine,
+        params: WatchdogParams = WatchdogParams(),
+        *,
+        reinstall: Optional[Callable[[], None]] = None,
+        cursor_pos: Optional[Callable[[], Optional[tuple[int, int]]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.engine = engine
+        self.p = params
+        self.reinstall = reinstall if reinstall is not None else engine.reinstall
+        self.cursor_pos = cursor_pos
+        self.clock = clock
+        self.tripped = False
+        self.probing = False
+        self.backoff = params.probe_after_sec
+        self._strikes = 0
+        self._probe_at = 0.0
+        self._last = self._read()
+        self._last_pos = cursor_pos() if cursor_pos is not None else None
+        self._silent_since: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def trips(self) -> int:
+        return self.engine.counters[COUNTER_WATCHDOG_TRIPS]
+
+    @property
+    def recoveries(self) -> int:
+        return self.engine.counters[COUNTER_WATCHDOG_RECOVERIES]
+
+    @property
+    def reinstalls(self) -> int:
+        return self.engine.counters[COUNTER_HOOK_REINSTALLS]
+
+    def _read(self) -> tuple[int, int, int, int]:
+        counters = self.engine.counters
+        return (counters[COUNTER_EVENTS], counters[COUNTER_OVERRUNS],
+                counters[COUNTER_ERRORS], counters[COUNTER_PASSTHROUGH])
+
+    def check(self) -> None:
+        """Uma verificação: compara os contadores com a anterior e decide."""
+        now = self.clock()
+        current = self._read()
+        events, overruns, errors, passthrough = (a - b for a, b in zip(current, self._last))
+        self._last = current
+        self._check_liveness(events + errors + passthrough, now)
+
+        if self.tripped:
+            if now >= self._probe_at:
+                self._probe()
+            return
+
+        p = self.p
+        storm = errors >= p.error_storm
+        slow = events >= p.min_events and overruns >= p.overrun_ratio * events
+        self._strikes = self._strikes + 1 if slow or storm else 0
+        if storm:
+            self._trip(now, f"{errors} erros em {p.interval_sec:g}s")
+        elif self._strikes >= p.trip_after or (self.probing and slow):
+            # Durante o teste uma única verificação ruim basta.
+            self._trip(now, f"{overruns} de {events} callbacks acima de {p.budget_us:g} µs")
+        elif self.probing and events >= p.min_events:
+            self.probing = False
+            self.backoff = p.probe_after_sec
+            self.engine.counters[COUNTER_WATCHDOG_RECOVERIES] += 1
+            print("[Watchdog] Callback dentro do orçamento novamente; suavização restabelecida.")
+
+    def _trip(self, now: float, reason: str) -> None:
+        if self.probing:
+            # O teste falhou: espera o dobro antes do próximo.
+            self.backoff = min(self.backoff * 2.0, self.p.max_probe_after_sec)
+        self.tripped = True
+        self.probing = False
+        self._strikes = 0
+        self._probe_at = now + self.backoff
+        self.engine.counters[COUNTER_WATCHDOG_TRIPS] += 1
+        self.engine.pause(PAUSE_REASON)
+        print(f"[Watchdog] Disjuntor aberto ({reason}); hook em passthrough por {self.backoff:g}s.")
+
+    def _probe(self) -> None:
+        self.tripped = False
+        self.probing = True
+        self.engine.resume(PAUSE_REASON)
+        print("[Watchdog] Testando a suavização novamente...")
+
+    def _check_liveness(self, activity: int, now: float) -> None:
+        if self.cursor_pos is None:
+            return
+        position = self.cursor_pos()
+        moved = position is not None and position != self._last_pos
+        self._last_pos = position
+        if activity or not self.engine.installed or self.engine.mode != "smoothing":
+            # Na calibração o hook não conta eventos; sem hook não há o que vigiar.
+            self._silent_since = None
+            return
+        if not moved:
+            return
+        if self._silent_since is None:
+            self._silent_since = now
+        elif now - self._silent_since >= self.p.liveness_timeout_sec:
+            self._silent_since = None
+            self.engine.counters[COUNTER_HOOK_REINSTALLS] += 1
+            print("[Watchdog] O cursor se move mas o hook não recebe eventos; reinstalando o hook.")
+            self.reinstall()
+
+    def report(self) -> None:
+        if self.trips or self.reinstalls:
+            state = "aberto" if self.tripped else ("em teste" if self.probing else "fechado")
+            print(
+                f"[Watchdog] Disjuntor {state} | disparos: {self.trips} | recuperações: {self.recoveries} | "
+                f"reinstalações do hook: {self.reinstalls} | erros suprimidos: {self.engine.error_log.suppressed_total}"
+            )
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._last = self._read()
+        self._thread = threading.Thread(target=self._run, name="hook-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.p.interval_sec):
+            try:
+                self.check()
+            except Exception as exc:  # noqa: BLE001
+                print(f"Erro no watchdog do hook: {exc}")
@@ -1,21 +1,56 @@
 from __future__ import annotations
 
 import ctypes
+import sys
+import threading
 import time
-from ctypes import wintypes, byref, cast, POINTER
+from array import array
+from ctypes import wintypes, byref
+from math import hypot
+from typing import TYPE_CHECKING, Callable, Optional
 
+from .config import ParamsSnapshot
+from .curves import AlphaTable, ResponseCurve, build_alpha_table
+from .filters import FilterChain
 from .smoothing import AdaptiveEMA
 from .tremor import TremorGuard
-from .profiler import LatencyProfiler
-from . import injector
+from .profiler import LatencyProfiler, RateLimitedLog
+from .counters import (
+    COUNTER_COUNT, COUNTER_ERRORS, COUNTER_EVENTS, COUNTER_INJECTED, COUNTER_OVERRUNS, COUNTER_PASSTHROUGH,
+)
+from . import injector as injector_mod
 
-user32 = ctypes.windll.user32
-kernel32 = ctypes.windll.kernel32
+DEFAULT_PROFILE = "default"
+
+if TYPE_CHECKING:
+    # Só anotações: gravação, saída agendada e tap são carregados pelo `main` quando usados.
+    from .input_latency import InputLatencyTracker
+    from .profiles import Profile
+    from .scheduler import OutputScheduler
+    from .telemetry import MotionTap
+    from .trace import TraceRecorder
+
+if sys.platform == "win32":
+    user32 = ctypes.windll.user32
+    kernel32 = ctypes.windll.kernel32
+    LowLevelMouseProc = ctypes.WINFUNCTYPE(ctypes.c_long, wintypes.WPARAM, wintypes.LPARAM, ctypes.c_void_p)
+else:
+    # Fora do Windows o módulo continua importável (benchmarks e ferramentas offline),
+    # mas o hook só pode ser instalado com um `user32` real.
+    user32 = None
+    kernel32 = None
+    LowLevelMouseProc = ctypes.CFUNCTYPE(ctypes.c_long, wintypes.WPARAM, wintypes.LPARAM, ctypes.c_void_p)
 
 WH_MOUSE_LL = 14
 WM_MOUSEMOVE = 0x0200
+# `MSLLHOOKSTRUCT.time` é um DWORD em ms (relógio de ticks do sistema).
+_TICK_MASK = 0xFFFFFFFF
 
-LowLevelMouseProc = ctypes.WINFUNCTYPE(ctypes.c_long, wintypes.WPARAM, wintypes.LPARAM, ctypes.c_void_p)
+# Estados do pipeline compilado.
+STATE_PASSTHROUGH = 0
+STATE_SMOOTHING = 1
+STATE_CALIBRATION = 2
+STATE_SCHEDULED = 3
 
 class POINT(ctypes.Structure):
     _fields_ = [("x", wintypes.LONG), ("y", wintypes.LONG)]
@@ -27,109 +62,814 @@ class MSLLHOOKSTRUCT(ctypes.Structure):
                 ("time", wintypes.DWORD),
                 ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong))]
 
+class _MSLLHOOKFLAT(ctypes.Structure):
+    """
+    Mesmo layout de MSLLHOOKSTRUCT, achatado para o caminho rápido: lê x/y direto
+    e expõe dwExtraInfo como inteiro (ULONG_PTR), sem criar objetos de ponteiro.
+    Os eventos injetados são reconhecidos comparando esse inteiro com o endereço
+    do marcador do `Injector`, sem desreferenciar valores de terceiros.
+    """
+    _fields_ = [("x", wintypes.LONG),
+                ("y", wintypes.LONG),
+                ("mouseData", wintypes.DWORD),
+                ("flags", wintypes.DWORD),
+                ("time", wintypes.DWORD),
+                ("dwExtraInfo", ctypes.c_size_t)]
+
+_LINEAR_CURVE = ResponseCurve()
+
+
 class HookEngine:
-    def __init__(self, ema: AdaptiveEMA, tremor: TremorGuard, profiler: LatencyProfiler, magic_number: int):
+    """
+    Hook de mouse de baixo nível com pipeline pré-compilado.
+
+    O callback registrado no Windows apenas delega para `self._pipeline`, uma
+    closure montada por `rebuild_pipeline` com tudo o que o evento precisa já
+    resolvido em variáveis locais (estado, parâmetros dos filtros, funções de
+    injeção e profiling). Ela é recompilada sempre que o modo, a pausa, o estado
+    ligado/desligado ou os parâmetros mudam, então o caminho quente não consulta
+    atributos nem propriedades do engine.
+    """
+    def __init__(
+        self,
+        ema: AdaptiveEMA,
+        tremor: TremorGuard,
+        profiler: LatencyProfiler,
+        magic_number: int,
+        *,
+        user32=None,
+        injector: Optional[injector_mod.Injector] = None,
+        alpha_table_step: float = 1.0,
+        chain: Optional[FilterChain] = None,
+        callback_budget_us: float = 500.0,
+        os_event_dt: bool = False,
+    ):
         self.ema = ema
         self.tremor = tremor
         self.profiler = profiler
         self.magic_number = magic_number
+        self._user32 = user32 if user32 is not None else globals()["user32"]
+        self.injector = injector if injector is not None else injector_mod.Injector(magic_number, user32=self._user32)
         self._user_enabled = True
         self._pause_reasons: set[str] = set()
-        self.mode = "smoothing"
+        self._mode = "smoothing"
         self._calibration_sink = None
+        self._recorder: TraceRecorder | None = None
+        self._scheduler: OutputScheduler | None = None
+        self._speed_observer: Optional[Callable[[float], None]] = None
+        self._motion_tap: MotionTap | None = None
+        self._latency_tracker: InputLatencyTracker | None = None
+        self._chain = chain
+        # `dt` do filtro pelo carimbo de tempo do SO (`MSLLHOOKSTRUCT.time`) em vez
+        # do `perf_counter` lido no callback, que inclui a espera até o callback rodar.
+        self.os_event_dt = os_event_dt
+        # Contadores acumulados (índices `COUNTER_*` de `src.telemetry`), lidos
+        # por outras threads sem sincronização.
+        self.counters = array("Q", bytes(8 * COUNTER_COUNT))
+        # Callbacks mais lentos que isto contam em `COUNTER_OVERRUNS` (lido pelo `HookWatchdog`).
+        self.callback_budget_us = callback_budget_us
+        # Erros no callback: no máximo alguns prints por janela, o resto só é contado.
+        self.error_log = RateLimitedLog("Erro no callback do hook")
+        self.alpha_table_step = alpha_table_step
+        # Tabelas por chave de parâmetros: com perfis, cada um reaproveita a sua.
+        self._alpha_tables: dict[tuple, AlphaTable] = {}
+        self._profiles: dict[str, Profile] = {}
+        self._active_profile = DEFAULT_PROFILE
         self.last_x = None
         self.last_y = None
         self.last_t = None
         self._hHook = None
+        self.state = STATE_PASSTHROUGH
+        self._pipeline = None
+        self._flush_state: Optional[Callable[[], None]] = None
+        # Serializa as recompilações vindas de threads diferentes (hotkeys,
+        # recarga da configuração, calibração contínua). O hook nunca o adquire.
+        self._rebuild_lock = threading.RLock()
+        # Eventos vistos na última chamada de `settle` (detecta o mouse parado).
+        self._settle_events = -1
+        self.rebuild_pipeline()
         self.callback_ptr = LowLevelMouseProc(self._callback)
 
     @property
     def enabled(self) -> bool:
         """Retorna se o pipeline de suavização deve estar ativo."""
-        return self._user_enabled and not self._pause_reasons and self.mode == "smoothing"
+        return self._user_enabled and not self._pause_reasons and self._mode == "smoothing"
 
     @enabled.setter
     def enabled(self, value: bool) -> None:
         self._user_enabled = bool(value)
+        self.rebuild_pipeline()
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def user_enabled(self) -> bool:
+        return self._user_enabled
+
+    @property
+    def pause_reasons(self) -> frozenset[str]:
+        return frozenset(self._pause_reasons)
+
+    @property
+    def recorder(self) -> TraceRecorder | None:
+        return self._recorder
+
+    @recorder.setter
+    def recorder(self, value: TraceRecorder | None) -> None:
+        self._recorder = value
+        self.rebuild_pipeline()
+
+    @property
+    def scheduler(self) -> OutputScheduler | None:
+        return self._scheduler
+
+    @scheduler.setter
+    def scheduler(self, value: OutputScheduler | None) -> None:
+        """Com um agendador, o hook só enfileira os deltas; filtragem e injeção ocorrem na thread de saída."""
+        self._scheduler = value
+        if value is not None:
+            value.observer = self._speed_observer
+            value.tap = self._motion_tap.push if self._motion_tap is not None else None
+        self.rebuild_pipeline()
+
+    @property
+    def speed_observer(self) -> Optional[Callable[[float], None]]:
+        return self._speed_observer
+
+    @speed_observer.setter
+    def speed_observer(self, value: Optional[Callable[[float], None]]) -> None:
+        """Função chamada com a velocidade bruta de cada evento suavizado (ex.: `AutoCalibrator.observe`)."""
+        self._speed_observer = value
+        if self._scheduler is not None:
+            self._scheduler.observer = value
+        self.rebuild_pipeline()
+
+    @property
+    def motion_tap(self) -> MotionTap | None:
+        return self._motion_tap
+
+    @motion_tap.setter
+    def motion_tap(self, value: MotionTap | None) -> None:
+        """Recebe os deltas brutos e filtrados de cada evento (no modo agendado, de cada lote)."""
+        self._motion_tap = value
+        if self._scheduler is not None:
+            self._scheduler.tap = value.push if value is not None else None
+        self.rebuild_pipeline()
+
+    @property
+    def latency_tracker(self) -> InputLatencyTracker | None:
+        return self._latency_tracker
+
+    @latency_tracker.setter
+    def latency_tracker(self, value: InputLatencyTracker | None) -> None:
+        """Recebe o carimbo do SO e os instantes de entrada e de injeção de cada evento suavizado."""
+        self._latency_tracker = value
+        self.rebuild_pipeline()
+
+    @property
+    def chain(self) -> FilterChain | None:
+        return self._chain
+
+    @chain.setter
+    def chain(self, value: FilterChain | None) -> None:
+        """
+        Cadeia de filtros do modo de suavização. Sem cadeia, ou com a cadeia
+        padrão (TremorGuard + AdaptiveEMA deste engine, sem medição por estágio),
+        o hook usa o pipeline fundido.
+        """
+        self._chain = value
+        self.rebuild_pipeline()
+
+    @property
+    def needs_settle(self) -> bool:
+        """Se alguma cadeia (deste engine ou de um perfil) tem estágio que precisa de `settle`."""
+        chains = [self._chain] + [profile.chain for profile in self._profiles.values()]
+        return any(chain is not None and chain.settles for chain in chains)
+
+    def settle(self) -> None:
+        """
+        Chamado periodicamente na thread da bomba (a mesma dos callbacks, sem
+        disputa com o pipeline). Se nenhum evento foi suavizado desde a chamada
+        anterior, injeta o que a cadeia devolve ao parar (a dianteira do `predict`).
+        """
+        chain = self._chain
+        if self.state != STATE_SMOOTHING or chain is None or not chain.settles:
+            return
+        events = self.counters[COUNTER_EVENTS]
+        if events != self._settle_events:
+            self._settle_events = events
+            return
+        dx, dy = chain.settle()
+        if dx or dy:
+            self.injector.send(int(dx), int(dy))
+            self.counters[COUNTER_INJECTED] += 1
 
     def toggle_user_enabled(self) -> bool:
         """Inverte o estado solicitado pelo usuário."""
         self._user_enabled = not self._user_enabled
+        self.rebuild_pipeline()
         return self.enabled
 
     def pause(self, reason: str) -> None:
         """Pausa o pipeline devido a uma condição externa (ex: jogo na blacklist)."""
         if reason not in self._pause_reasons:
             self._pause_reasons.add(reason)
+            self.rebuild_pipeline()
 
     def resume(self, reason: str) -> None:
         """Remove a pausa aplicada por um motivo específico."""
         if reason in self._pause_reasons:
             self._pause_reasons.remove(reason)
+            self.rebuild_pipeline()
 
     def start_calibration(self, phase: str, sink) -> None:
         """Configura o hook para coletar dados do mouse durante a calibração."""
-        self.mode = f"calibration_{phase}"
-        self._calibration_sink = sink
-        self.last_x = None
-        self.last_y = None
-        self.last_t = None
+        with self._rebuild_lock:
+            self._retire_pipeline()
+            self._mode = f"calibration_{phase}"
+            self._calibration_sink = sink
+            self.last_x = None
+            self.last_y = None
+            self.last_t = None
+            self.rebuild_pipeline()
 
     def stop_calibration(self) -> None:
         """Retorna o hook ao modo padrão de suavização."""
-        self.mode = "smoothing"
-        self._calibration_sink = None
-        self.last_x = None
-        self.last_y = None
-        self.last_t = None
+        with self._rebuild_lock:
+            self._retire_pipeline()
+            self._mode = "smoothing"
+            self._calibration_sink = None
+            self.last_x = None
+            self.last_y = None
+            self.last_t = None
+            self.rebuild_pipeline()
+
+    @property
+    def active_profile(self) -> str:
+        return self._active_profile
+
+    @property
+    def profiles(self) -> dict[str, Profile]:
+        return dict(self._profiles)
+
+    def set_profiles(self, profiles: list[Profile]) -> None:
+        """
+        Registra os perfis (o primeiro, `default`, deve usar o EMA, o TremorGuard e a
+        cadeia deste engine) e pré-compila um pipeline para cada um.
+        """
+        with self._rebuild_lock:
+            self._profiles = {profile.name: profile for profile in profiles}
+            self._active_profile = profiles[0].name if profiles else DEFAULT_PROFILE
+            self.rebuild_pipeline()
+
+    def activate_profile(self, name: str) -> float:
+        """
+        Passa a usar os filtros do perfil `name`. Retorna a duração da troca em µs.
+
+        No modo de suavização o pipeline do perfil já está compilado: a troca só
+        devolve o estado do pipeline atual, retoma a posição no novo e troca a
+        referência. Nos demais estados os filtros são trocados e o pipeline é
+        recompilado normalmente (ele ainda não usa os filtros do perfil).
+        """
+        start = time.perf_counter_ns()
+        with self._rebuild_lock:
+            profile = self._profiles[name]
+            if name == self._active_profile:
+                return 0.0
+            self._retire_pipeline()
+            self._active_profile = name
+            self.ema = profile.ema
+            self.tremor = profile.tremor
+            self._chain = profile.chain
+            profile.reset()
+            if self._scheduler is not None:
+                self._scheduler.tremor = profile.tremor
+                self._scheduler.ema = profile.ema
+                self._scheduler.chain = None if profile.chain.fusable(profile.tremor, profile.ema) else profile.chain
+            if self.state == STATE_SMOOTHING and profile.compiled is not None:
+                pipeline, flush, resume = profile.compiled
+                resume()
+                self._flush_state = flush
+                self._pipeline = pipeline
+            else:
+                self.rebuild_pipeline()
+        return (time.perf_counter_ns() - start) / 1000.0
+
+    def params_snapshot(self) -> ParamsSnapshot:
+        """Parâmetros atualmente publicados."""
+        return ParamsSnapshot(
+            ema=self.ema.params,
+            tremor=self.tremor.p,
+            curve=self.ema.curve if self.ema.curve is not None else _LINEAR_CURVE,
+            alpha_table_step=self.alpha_table_step,
+        )
+
+    def publish(self, snapshot: ParamsSnapshot) -> None:
+        """
+        Publica um novo conjunto de parâmetros (no perfil ativo).
+
+        Os objetos de parâmetros são imutáveis e trocados por referência; o hook
+        só passa a vê-los quando a nova closure, compilada com a versão completa,
+        substitui a anterior. Não há janela em que metade dos campos seja nova.
+        """
+        with self._rebuild_lock:
+            self.ema.params = snapshot.ema
+            self.ema.curve = snapshot.curve
+            self.tremor.p = snapshot.tremor
+            self.alpha_table_step = snapshot.alpha_table_step
+            self.rebuild_pipeline()
+
+    def publish_profiles(self, snapshots: dict[str, ParamsSnapshot]) -> None:
+        """Publica os parâmetros de vários perfis de uma vez (nomes desconhecidos são ignorados)."""
+        with self._rebuild_lock:
+            for name, snapshot in snapshots.items():
+                profile = self._profiles.get(name)
+                if profile is None:
+                    continue
+                profile.ema.params = snapshot.ema
+                profile.ema.curve = snapshot.curve
+                profile.tremor.p = snapshot.tremor
+                self.alpha_table_step = snapshot.alpha_table_step
+            self.rebuild_pipeline()
+
+    def rebuild_pipeline(self) -> None:
+        """
+        Recompila o pipeline para o estado atual e o publica com uma única troca de referência.
+
+        Os valores dos parâmetros ficam pré-carregados na closure; para trocá-los,
+        use `publish`, que chama este método. O estado dos
+        filtros e a última posição são devolvidos aos objetos antes da troca, para
+        que a nova closure continue exatamente de onde a anterior parou.
+        """
+        with self._rebuild_lock:
+            self._retire_pipeline()
+            compiled = None
+            if self._mode.startswith("calibration") and self._calibration_sink:
+                self.state = STATE_CALIBRATION
+                pipeline, flush = self._compile_calibration()
+            elif self.enabled and self._scheduler is not None:
+                self.state = STATE_SCHEDULED
+                pipeline, flush = self._compile_scheduled()
+            elif self.enabled:
+                self.state = STATE_SMOOTHING
+                compiled = self._compile_filters(self.ema, self.tremor, self._chain)
+                pipeline, flush, _ = compiled
+            else:
+                self.state = STATE_PASSTHROUGH
+                pipeline, flush = self._compile_passthrough()
+            self._precompile_profiles(compiled)
+            self._flush_state = flush
+            self._pipeline = pipeline
+
+    def _compile_filters(self, ema: AdaptiveEMA, tremor: TremorGuard, chain: Optional[FilterChain]):
+        if chain is None or chain.fusable(tremor, ema):
+            return self._compile_smoothing(ema, tremor)
+        return self._compile_chain(chain)
+
+    def _precompile_profiles(self, active) -> None:
+        """
+        Compila o pipeline de suavização de cada perfil inativo; o ativo guarda
+        `active`, o que acabou de ser publicado. Fora do modo de suavização não
+        há o que pré-compilar.
+        """
+        for name, profile in self._profiles.items():
+            if active is None:
+                profile.compiled = None
+            elif name == self._active_profile:
+                profile.compiled = active
+            else:
+                profile.compiled = self._compile_filters(profile.ema, profile.tremor, profile.chain)
+
+    def alpha_table(self, ema: Optional[AdaptiveEMA] = None, tremor: Optional[TremorGuard] = None) -> AlphaTable:
+        """
+        Tabela velocidade -> alpha (com o ganho do TremorGuard embutido) para os
+        parâmetros atuais. Só é reconstruída quando a curva, os parâmetros ou o
+        passo mudam; nas demais recompilações a mesma tabela é reaproveitada.
+        Com a janela de velocidade do EMA o ganho não é embutido: ele depende da
+        velocidade do evento, não da velocidade consultada. Sem argumentos, usa
+        os filtros do perfil ativo.
+        """
+        ema = ema if ema is not None else self.ema
+        tremor = tremor if tremor is not None else self.tremor
+        curve = ema.curve if ema.curve is not None else _LINEAR_CURVE
+        ep = ema.params
+        damp_gain = 1.0 - tremor.p.extra_damp_factor if ema.speed_window is None else 1.0
+        key = (curve, ep.v_min, ep.v_max, ep.alpha_min, ep.alpha_max, damp_gain, self.alpha_table_step)
+        tables = self._alpha_tables
+        table = tables.get(key)
+        if table is None:
+            if len(tables) > len(self._profiles) + 4:
+                tables.clear()
+            table = tables[key] = build_alpha_table(curve, ep, step=self.alpha_table_step, damp_gain=damp_gain)
+        return table
+
+    def _retire_pipeline(self) -> None:
+        if self._flush_state is not None:
+            self._flush_state()
+            self._flush_state = None
 
     def _callback(self, nCode, wParam, lParam):
-        start_time = time.perf_counter_ns()
-        try:
-            hook_struct = cast(lParam, POINTER(MSLLHOOKSTRUCT)).contents
-            if hook_struct.dwExtraInfo and hook_struct.dwExtraInfo.contents.value == self.magic_number:
-                return user32.CallNextHookEx(self._hHook, nCode, wParam, lParam)
-            if wParam == WM_MOUSEMOVE:
-                current_x = hook_struct.pt.x
-                current_y = hook_struct.pt.y
-                current_t = time.perf_counter()
-                if self.last_x is None:
-                    self.last_x, self.last_y, self.last_t = current_x, current_y, current_t
-                    return user32.CallNextHookEx(self._hHook, nCode, wParam, lParam)
-                dx = current_x - self.last_x
-                dy = current_y - self.last_y
-                dt = current_t - self.last_t
+        return self._pipeline(nCode, wParam, lParam)
+
+    def _compile_smoothing(self, ema: AdaptiveEMA, tremor: TremorGuard):
+        """
+        TremorGuard + AdaptiveEMA fundidos, com a velocidade calculada uma única vez.
+
+        O alpha final (curva de resposta x ganho do TremorGuard) vem de uma
+        consulta à `alpha_table`, com o mesmo custo para qualquer formato de curva.
+        Com a janela de velocidade do EMA, a consulta usa a velocidade da janela e
+        o ganho do TremorGuard (pela velocidade do evento) é aplicado à parte; no
+        modo de constante de tempo, o alpha é convertido para o `dt` do evento.
+
+        Com `os_event_dt`, o `dt` vem da diferença entre os carimbos do SO. Eventos
+        no mesmo tick (mouses mais rápidos que a resolução do relógio) usam o `dt`
+        do `perf_counter`, e esse tempo emprestado é descontado no próximo tick,
+        para que a soma dos `dt` acompanhe o relógio do SO. O primeiro evento
+        depois de uma recompilação também usa o `dt` do `perf_counter`.
+
+        Retorna `(pipeline, flush, resume)`: `resume` recarrega a posição do engine
+        e o estado do EMA, para um pipeline pré-compilado voltar a ser usado.
+        """
+        engine = self
+        call_next = self._user32.CallNextHookEx
+        send = self.injector.send
+        log = self.profiler.log
+        budget_us = self.callback_budget_us
+        record = self._recorder.record if self._recorder is not None else None
+        observe = self._speed_observer
+        tap = self._motion_tap.push if self._motion_tap is not None else None
+        track = self._latency_tracker.record if self._latency_tracker is not None else None
+        os_dt = self.os_event_dt
+        counters = self.counters
+        report_error = self.error_log
+        marker = self.injector.extra_address
+        read_struct = _MSLLHOOKFLAT.from_address
+        perf_ns = time.perf_counter_ns
+
+        tp = tremor.p
+        deadzone = tp.jitter_deadzone_px
+        jitter_speed_max = tp.jitter_speed_max
+        damp_gain = 1.0 - tp.extra_damp_factor
+        table = self.alpha_table(ema, tremor)
+        alphas, inv_step, last_index = table.values, table.inv_step, table.last
+        alpha_at_rest = table.alpha_at_rest
+
+        ep = ema.params
+        window = ema.speed_window.update if ema.speed_window is not None else None
+        time_constant = ep.time_constant_mode
+        reference_rate = ep.reference_rate_hz
+        sx, sy, initialized = ema._sx, ema._sy, ema._initialized
+        last_x, last_y, last_t = self.last_x, self.last_y, self.last_t
+        last_ms, borrowed = None, 0.0
+
+        def pipeline(nCode, wParam, lParam):
+            nonlocal sx, sy, initialized, last_x, last_y, last_t, last_ms, borrowed
+            start = perf_ns()
+            try:
+                if wParam != WM_MOUSEMOVE:
+                    return call_next(engine._hHook, nCode, wParam, lParam)
+                s = read_struct(lParam)
+                if s.dwExtraInfo == marker:
+                    return call_next(engine._hHook, nCode, wParam, lParam)
+                x = s.x
+                y = s.y
+                t = start * 1e-9
+                if last_x is None:
+                    last_x, last_y, last_t = x, y, t
+                    if record is not None:
+                        record(0, 0, t)
+                    return call_next(engine._hHook, nCode, wParam, lParam)
+                dx = x - last_x
+                dy = y - last_y
+                dt = t - last_t
+                last_x, last_y, last_t = x, y, t
+                if os_dt and dt > 0:
+                    ms = s.time
+                    if ms == last_ms:
+                        borrowed += dt
+                    elif last_ms is not None:
+                        tick_dt = ((ms - last_ms) & _TICK_MASK) * 0.001 - borrowed
+                        borrowed = 0.0
+                        if tick_dt > 0:
+                            dt = tick_dt
+                    last_ms = ms
+                if dt > 0:
+                    if record is not None:
+                        record(dx, dy, t)
+                    dist = hypot(dx, dy)
+                    speed = dist / dt
+                    if observe is not None:
+                        observe(speed)
+                    # TremorGuard: na deadzone o movimento é zerado e o EMA usa o
+                    # alpha de repouso, com o ganho calculado pela velocidade bruta.
+                    if speed < jitter_speed_max and dist < deadzone:
+                        fx = fy = 0.0
+                        if window is None:
+                            a = alpha_at_rest * damp_gain if speed < 50.0 else alpha_at_rest
+                        else:
+                            index = int(window(0.0, dt) * inv_step)
+                            a = alphas[index if index < last_index else last_index]
+                            if speed < 50.0:
+                                a *= damp_gain
+                    else:
+                        fx = dx
+                        fy = dy
+                        if window is None:
+                            index = int(speed * inv_step)
+                            a = alphas[index if index < last_index else last_index]
+                        else:
+                            index = int(window(dist, dt) * inv_step)
+                            a = alphas[index if index < last_index else last_index]
+                            if speed < 50.0:
+                                a *= damp_gain
+                    if time_constant:
+                        a = 1.0 - (1.0 - a) ** (dt * reference_rate)
+                    # AdaptiveEMA, reaproveitando a velocidade já calculada.
+                    if not initialized:
+                        sx, sy, initialized = fx, fy, True
+                    else:
+                        sx = (a * fx) + (1.0 - a) * sx
+                        sy = (a * fy) + (1.0 - a) * sy
+                    counters[COUNTER_EVENTS] += 1
+                    if tap is not None:
+                        tap(dx, dy, sx, sy, t)
+                    if sx != 0 or sy != 0:
+                        send(int(round(sx)), int(round(sy)))
+                        counters[COUNTER_INJECTED] += 1
+                    if track is not None:
+                        track(s.time, start, perf_ns())
+                elapsed_us = (perf_ns() - start) / 1000.0
+                log(elapsed_us)
+                if elapsed_us > budget_us:
+                    counters[COUNTER_OVERRUNS] += 1
+                return 1
+            except Exception as e:
+                counters[COUNTER_ERRORS] += 1
+                report_error(e)
+            return call_next(engine._hHook, nCode, wParam, lParam)
+
+        def flush():
+            engine.last_x, engine.last_y, engine.last_t = last_x, last_y, last_t
+            ema._sx, ema._sy, ema._initialized = sx, sy, initialized
+
+        def resume():
+            nonlocal sx, sy, initialized, last_x, last_y, last_t, last_ms, borrowed
+            last_x, last_y, last_t = engine.last_x, engine.last_y, engine.last_t
+            last_ms, borrowed = None, 0.0
+            sx, sy, initialized = ema._sx, ema._sy, ema._initialized
+
+        return pipeline, flush, resume
+
+    def _compile_chain(self, chain: FilterChain):
+        """
+        Suavização por uma `FilterChain` arbitrária (ex.: com o estágio One Euro).
+
+        Mesmo contrato do pipeline fundido (marcador, traço, observador, tap,
+        contadores, `dt` pelo carimbo do SO); o estado dos filtros fica nos
+        próprios estágios. Retorna `(pipeline, flush, resume)`, como `_compile_smoothing`.
+        """
+        engine = self
+        call_next = self._user32.CallNextHookEx
+        send = self.injector.send
+        log = self.profiler.log
+        budget_us = self.callback_budget_us
+        process = chain.process
+        record = self._recorder.record if self._recorder is not None else None
+        observe = self._speed_observer
+        tap = self._motion_tap.push if self._motion_tap is not None else None
+        track = self._latency_tracker.record if self._latency_tracker is not None else None
+        os_dt = self.os_event_dt
+        counters = self.counters
+        report_error = self.error_log
+        marker = self.injector.extra_address
+        read_struct = _MSLLHOOKFLAT.from_address
+        perf_ns = time.perf_counter_ns
+        last_x, last_y, last_t = self.last_x, self.last_y, self.last_t
+        last_ms, borrowed = None, 0.0
+
+        def pipeline(nCode, wParam, lParam):
+            nonlocal last_x, last_y, last_t, last_ms, borrowed
+            start = perf_ns()
+            try:
+                if wParam != WM_MOUSEMOVE:
+                    return call_next(engine._hHook, nCode, wParam, lParam)
+                s = read_struct(lParam)
+                if s.dwExtraInfo == marker:
+                    return call_next(engine._hHook, nCode, wParam, lParam)
+                x = s.x
+                y = s.y
+                t = start * 1e-9
+                if last_x is None:
+                    last_x, last_y, last_t = x, y, t
+                    if record is not None:
+                        record(0, 0, t)
+                    return call_next(engine._hHook, nCode, wParam, lParam)
+                dx = x - last_x
+                dy = y - last_y
+                dt = t - last_t
+                last_x, last_y, last_t = x, y, t
+                if os_dt and dt > 0:
+                    ms = s.time
+                    if ms == last_ms:
+                        borrowed += dt
+                    elif last_ms is not None:
+                        tick_dt = ((ms - last_ms) & _TICK_MASK) * 0.001 - borrowed
+                        borrowed = 0.0
+                        if tick_dt > 0:
+                            dt = tick_dt
+                    last_ms = ms
                 if dt > 0:
-                    if self.mode.startswith("calibration") and self._calibration_sink:
-                        phase = self.mode.split("_", 1)[1]
-                        self._calibration_sink(phase, dx, dy, dt)
-                        self.last_x, self.last_y, self.last_t = current_x, current_y, current_t
-                        return user32.CallNextHookEx(self._hHook, nCode, wParam, lParam)
-
-                    if self.enabled:
-                        processed_dx, processed_dy, gain = self.tremor.preprocess(dx, dy, dt)
-                        smoothed_dx, smoothed_dy = self.ema.update(processed_dx, processed_dy, dt, gain)
-                        if smoothed_dx != 0 or smoothed_dy != 0:
-                            injector.send_mouse_move(int(round(smoothed_dx)), int(round(smoothed_dy)), self.magic_number)
-                self.last_x, self.last_y, self.last_t = current_x, current_y, current_t
-                if self.enabled:
-                    end_time = time.perf_counter_ns()
-                    self.profiler.log((end_time - start_time) / 1000.0)
-                    return 1
-        except Exception as e:
-            print(f"Erro no callback do hook: {e}")
-        return user32.CallNextHookEx(self._hHook, nCode, wParam, lParam)
+                    if record is not None:
+                        record(dx, dy, t)
+                    if observe is not None:
+                        observe(hypot(dx, dy) / dt)
+                    sx, sy = process(dx, dy, dt)
+                    counters[COUNTER_EVENTS] += 1
+                    if tap is not None:
+                        tap(dx, dy, sx, sy, t)
+                    if sx != 0 or sy != 0:
+                        send(int(round(sx)), int(round(sy)))
+                        counters[COUNTER_INJECTED] += 1
+                    if track is not None:
+                        track(s.time, start, perf_ns())
+                elapsed_us = (perf_ns() - start) / 1000.0
+                log(elapsed_us)
+                if elapsed_us > budget_us:
+                    counters[COUNTER_OVERRUNS] += 1
+                return 1
+            except Exception as e:
+                counters[COUNTER_ERRORS] += 1
+                report_error(e)
+            return call_next(engine._hHook, nCode, wParam, lParam)
+
+        def flush():
+            engine.last_x, engine.last_y, engine.last_t = last_x, last_y, last_t
+
+        def resume():
+            nonlocal last_x, last_y, last_t, last_ms, borrowed
+            last_x, last_y, last_t = engine.last_x, engine.last_y, engine.last_t
+            last_ms, borrowed = None, 0.0
+
+        return pipeline, flush, resume
+
+    def _compile_scheduled(self):
+        """Modo desacoplado: o evento original é engolido e o delta vai para o agendador de saída."""
+        engine = self
+        call_next = self._user32.CallNextHookEx
+        push = self._scheduler.push
+        log = self.profiler.log
+        budget_us = self.callback_budget_us
+        record = self._recorder.record if self._recorder is not None else None
+        counters = self.counters
+        report_error = self.error_log
+        marker = self.injector.extra_address
+        read_struct = _MSLLHOOKFLAT.from_address
+        perf_ns = time.perf_counter_ns
+        last_x, last_y, last_t = self.last_x, self.last_y, self.last_t
+
+        def pipeline(nCode, wParam, lParam):
+            nonlocal last_x, last_y, last_t
+            start = perf_ns()
+            try:
+                if wParam != WM_MOUSEMOVE:
+                    return call_next(engine._hHook, nCode, wParam, lParam)
+                s = read_struct(lParam)
+                if s.dwExtraInfo == marker:
+                    return call_next(engine._hHook, nCode, wParam, lParam)
+                x = s.x
+                y = s.y
+                t = start * 1e-9
+                if last_x is None:
+                    last_x, last_y, last_t = x, y, t
+                    if record is not None:
+                        record(0, 0, t)
+                    return call_next(engine._hHook, nCode, wParam, lParam)
+                dx = x - last_x
+                dy = y - last_y
+                if t > last_t:
+                    if record is not None:
+                        record(dx, dy, t)
+                    push(dx, dy, t)
+                    counters[COUNTER_EVENTS] += 1
+                last_x, last_y, last_t = x, y, t
+                elapsed_us = (perf_ns() - start) / 1000.0
+                log(elapsed_us)
+                if elapsed_us > budget_us:
+                    counters[COUNTER_OVERRUNS] += 1
+                return 1
+            except Exception as e:
+                counters[COUNTER_ERRORS] += 1
+                report_error(e)
+            return call_next(engine._hHook, nCode, wParam, lParam)
+
+        def flush():
+            engine.last_x, engine.last_y, engine.last_t = last_x, last_y, last_t
+
+        return pipeline, flush
+
+    def _compile_passthrough(self):
+        """Suavização desligada ou pausada: só acompanha a posição (e grava o traço, se houver)."""
+        engine = self
+        call_next = self._user32.CallNextHookEx
+        record = self._recorder.record if self._recorder is not None and self._mode == "smoothing" else None
+        counters = self.counters
+        report_error = self.error_log
+        marker = self.injector.extra_address
+        read_struct = _MSLLHOOKFLAT.from_address
+        perf = time.perf_counter
+        last_x, last_y, last_t = self.last_x, self.last_y, self.last_t
+
+        def pipeline(nCode, wParam, lParam):
+            nonlocal last_x, last_y, last_t
+            try:
+                if wParam == WM_MOUSEMOVE:
+                    s = read_struct(lParam)
+                    if s.dwExtraInfo != marker:
+                        x = s.x
+                        y = s.y
+                        t = perf()
+                        if record is not None:
+                            if last_x is None:
+                                record(0, 0, t)
+                            elif t > last_t:
+                                record(x - last_x, y - last_y, t)
+                        last_x, last_y, last_t = x, y, t
+                        counters[COUNTER_PASSTHROUGH] += 1
+            except Exception as e:
+                counters[COUNTER_ERRORS] += 1
+                report_error(e)
+            return call_next(engine._hHook, nCode, wParam, lParam)
+
+        def flush():
+            engine.last_x, engine.last_y, engine.last_t = last_x, last_y, last_t
+
+        return pipeline, flush
+
+    def _compile_calibration(self):
+        """Encaminha as amostras para o coletor da calibração; o evento original segue intacto."""
+        engine = self
+        call_next = self._user32.CallNextHookEx
+        sink = self._calibration_sink
+        phase = self._mode.split("_", 1)[1]
+        report_error = self.error_log
+        marker = self.injector.extra_address
+        read_struct = _MSLLHOOKFLAT.from_address
+        perf = time.perf_counter
+        last_x, last_y, last_t = self.last_x, self.last_y, self.last_t
+
+        def pipeline(nCode, wParam, lParam):
+            nonlocal last_x, last_y, last_t
+            try:
+                if wParam == WM_MOUSEMOVE:
+                    s = read_struct(lParam)
+                    if s.dwExtraInfo != marker:
+                        x = s.x
+                        y = s.y
+                        t = perf()
+                        if last_x is not None and t > last_t:
+                            sink(phase, x - last_x, y - last_y, t - last_t)
+                        last_x, last_y, last_t = x, y, t
+            except Exception as e:
+                report_error(e)
+            return call_next(engine._hHook, nCode, wParam, lParam)
+
+        def flush():
+            engine.last_x, engine.last_y, engine.last_t = last_x, last_y, last_t
+
+        return pipeline, flush
 
     def install(self):
         # A CORREÇÃO DEFINITIVA: Usar o handle da user32.dll para ancorar o hook.
         h_module = kernel32.GetModuleHandleW("user32.dll")
-        self._hHook = user32.SetWindowsHookExA(WH_MOUSE_LL, self.callback_ptr, h_module, 0)
+        self._hHook = self._user32.SetWindowsHookExA(WH_MOUSE_LL, self.callback_ptr, h_module, 0)
         if not self._hHook:
             raise OSError(f"Falha ao instalar o hook. Código de erro: {ctypes.get_last_error()}")
         print("Hook de mouse (ctypes) instalado com sucesso.")
 
     def uninstall(self):
         if self._hHook:
-            user32.UnhookWindowsHookEx(self._hHook)
+            self._user32.UnhookWindowsHookEx(self._hHook)
             self._hHook = None
             print("Hook de mouse desinstalado.")
+
+    @property
+    def installed(self) -> bool:
+        return self._hHook is not None
+
+    def reinstall(self) -> None:
+        """
+        Reinstala o hook (ex.: depois que o Windows o removeu por `LowLevelHooksTimeout`).
+
+        Deve rodar na thread da bomba de mensagens (`Supervisor.call_in_pump`).
+        A posição é esquecida para o primeiro evento não gerar um salto.
+        """
+        with self._rebuild_lock:
+            self.uninstall()
+            self._retire_pipeline()
+            self.last_x = None
+            self.last_y = None
+            self.last_t = None
+            self.rebuild_pipeline()
+            self.install()